@@ -1,10 +1,10 @@
 """Data bundle definitions."""
 
 import copy
-from typing import List, NamedTuple, Optional, Set
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Set, Union
 
 from mtg_ssm.scryfall.models import (
-    ScryCard,
+    ScryCardCore,
     ScryCardLayout,
     ScryMigration,
     ScrySet,
@@ -16,12 +16,20 @@ class ScryfallDataSet(NamedTuple):
     """Bundle for storing Scryfall data."""
 
     sets: List[ScrySet]
-    cards: List[ScryCard]
+    cards: Sequence[ScryCardCore]
+    migrations: List[ScryMigration]
+
+
+class ScryfallDataStream(NamedTuple):
+    """Bundle for Scryfall data with cards decoded on demand."""
+
+    sets: List[ScrySet]
+    cards: Iterator[ScryCardCore]
     migrations: List[ScryMigration]
 
 
 def filter_cards_and_sets(  # noqa: C901
-    scryfall_data: ScryfallDataSet,
+    scryfall_data: Union[ScryfallDataSet, ScryfallDataStream],
     *,
     exclude_set_types: Optional[Set[ScrySetType]] = None,
     exclude_card_layouts: Optional[Set[ScryCardLayout]] = None,
@@ -29,7 +37,11 @@ def filter_cards_and_sets(  # noqa: C901
     exclude_foreing_only: bool = False,
     merge_promos: bool = False,
 ) -> ScryfallDataSet:
-    """Filter a ScryfallDataSet to exclude desired set types, card layouts, and digital only products."""
+    """Filter a ScryfallDataSet to exclude desired set types, card layouts, and digital only products.
+
+    Cards are consumed in a single pass, so a ScryfallDataStream may be filtered without
+    ever holding the unfiltered card pool in memory.
+    """
     accepted_setcodes = set()
     remapped_setcodes = {}
     for set_ in scryfall_data.sets:
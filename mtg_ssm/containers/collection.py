@@ -1,11 +1,12 @@
 """Container for all data related to a collection."""
 
 from dataclasses import dataclass
+from typing import Mapping
+from uuid import UUID
 
 from typing_extensions import Self
 
-from mtg_ssm.containers import counts
-from mtg_ssm.containers.counts import ScryfallCardCount
+from mtg_ssm.containers.counts import CardCounts, CountType
 from mtg_ssm.containers.indexes import Oracle
 
 
@@ -14,20 +15,28 @@ class MagicCollection:
     """Collection object for tracking magic cards and counts."""
 
     oracle: Oracle
-    counts: ScryfallCardCount
+    counts: Mapping[UUID, Mapping[CountType, int]]
+
+    def __post_init__(self) -> None:
+        self.counts = CardCounts.from_mapping(self.oracle.index, self.counts)
+
+    @property
+    def card_counts(self) -> CardCounts:
+        """Columnar counts for this collection's oracle."""
+        return CardCounts.from_mapping(self.oracle.index, self.counts)
 
     def __add__(self, other: "MagicCollection") -> "MagicCollection":
         if not isinstance(other, MagicCollection):
             return NotImplemented
         return MagicCollection(
             oracle=self.oracle,
-            counts=counts.merge_card_counts(self.counts, other.counts),
+            counts=self.card_counts + other.counts,
         )
 
     def __iadd__(self, other: "MagicCollection") -> Self:
         if not isinstance(other, MagicCollection):
             return NotImplemented
-        self.counts = counts.merge_card_counts(self.counts, other.counts)
+        self.counts = self.card_counts + other.counts
         return self
 
     def __sub__(self, other: "MagicCollection") -> "MagicCollection":
@@ -35,11 +44,11 @@ class MagicCollection:
             return NotImplemented
         return MagicCollection(
             oracle=self.oracle,
-            counts=counts.diff_card_counts(self.counts, other.counts),
+            counts=self.card_counts - other.counts,
         )
 
     def __isub__(self, other: "MagicCollection") -> Self:
         if not isinstance(other, MagicCollection):
             return NotImplemented
-        self.counts = counts.diff_card_counts(self.counts, other.counts)
+        self.counts = self.card_counts - other.counts
         return self
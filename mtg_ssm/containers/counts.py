@@ -1,12 +1,28 @@
 """Helpers for tracking collection counts."""
 
-import collections
 import enum
-from typing import Any, Dict, Iterable, MutableMapping
+import itertools
+import operator
+from array import array
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Mapping,
+    MutableMapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 from uuid import UUID
 
+from typing_extensions import Self
+
+from mtg_ssm import profiling
 from mtg_ssm.containers import legacy
-from mtg_ssm.containers.indexes import Oracle
+from mtg_ssm.containers.indexes import Oracle, ScryfallDataIndex
 
 
 class Error(Exception):
@@ -17,6 +33,10 @@ class CardNotFoundError(Error):
     """Raised when we attempt to add a card to a count but cannot find it in the oracle."""
 
 
+class DeletedCardError(CardNotFoundError):
+    """Raised when we attempt to add counts for a card deleted by a Scryfall migration."""
+
+
 class CountType(str, enum.Enum):
     """Enum for possible card printing types (nonfoil, foil)."""
 
@@ -28,55 +48,229 @@ ScryfallCardCount = Dict[UUID, MutableMapping[CountType, int]]
 """Mapping from scryfall id to card printing type to count."""
 
 
-def aggregate_card_counts(
-    card_rows: Iterable[Dict[str, Any]], oracle: Oracle
-) -> ScryfallCardCount:
-    """Extract card counts from card rows."""
-    card_counts: ScryfallCardCount = {}
+class SparseCounts(NamedTuple):
+    """Compact nonzero card counts by ordinal, for passing counts between processes.
+
+    Ordinals are only meaningful for an index built from the same data.
+    """
+
+    ordinals: "array[int]"
+    columns: Dict[CountType, "array[int]"]
+
+
+class CardCounts(Mapping[UUID, Mapping[CountType, int]]):
+    """Columnar card counts over the card ordinals of an index.
+
+    Counts for each CountType are stored in a dense integer array with one slot per card
+    ordinal, so adding and subtracting counts are elementwise array operations. As a
+    mapping, only cards with a nonzero count are present.
+    """
+
+    def __init__(
+        self, index: ScryfallDataIndex, columns: Optional[Dict[CountType, "array[int]"]] = None
+    ) -> None:
+        self.index = index
+        if columns is None:
+            zeros = array("q", [0]) * len(index.ordinal_to_id)
+            columns = {count_type: array("q", zeros) for count_type in CountType}
+        self.columns = columns
+
+    @classmethod
+    def from_mapping(
+        cls, index: ScryfallDataIndex, card_counts: Mapping[UUID, Mapping[CountType, int]]
+    ) -> "CardCounts":
+        """Get columnar counts for the given index from any card count mapping."""
+        if isinstance(card_counts, CardCounts) and card_counts.index is index:
+            return card_counts
+        columnar_counts = cls(index)
+        for card_id, counts in card_counts.items():
+            for count_type, value in counts.items():
+                columnar_counts.add(card_id, count_type, value)
+        return columnar_counts
+
+    def add(self, card_id: UUID, count_type: CountType, value: int) -> None:
+        """Add to the count of a single card printing type."""
+        try:
+            ordinal = self.index.id_to_ordinal[card_id]
+        except KeyError:
+            msg = f"Found counts for card={card_id} not found scryfall data"
+            raise CardNotFoundError(msg) from None
+        self.columns[count_type][ordinal] += value
+
+    def _nonzero(self) -> Iterator[bool]:
+        return map(any, zip(*self.columns.values()))
+
+    def _combine(
+        self, other: Mapping[UUID, Mapping[CountType, int]], op: Callable[[int, int], int]
+    ) -> "CardCounts":
+        other_counts = CardCounts.from_mapping(self.index, other)
+        return CardCounts(
+            self.index,
+            {
+                count_type: array("q", map(op, column, other_counts.columns[count_type]))
+                for count_type, column in self.columns.items()
+            },
+        )
+
+    def accumulate(self, other: Mapping[UUID, Mapping[CountType, int]], sign: int = 1) -> None:
+        """Add (or, with sign=-1, subtract) other counts into these counts in place.
+
+        For counts over the same index, each column of other is scanned for nonzero
+        entries (by itertools.compress, without per-entry Python work) and only those
+        are added, so no new arrays are allocated.
+        """
+        if not (isinstance(other, CardCounts) and other.index is self.index):
+            for card_id, counts in other.items():
+                for count_type, value in counts.items():
+                    self.add(card_id, count_type, sign * value)
+            return
+        for count_type, other_column in other.columns.items():
+            column = self.columns[count_type]
+            for ordinal in itertools.compress(range(len(other_column)), other_column):
+                column[ordinal] += sign * other_column[ordinal]
+
+    def accumulate_sparse(self, sparse: SparseCounts, sign: int = 1) -> None:
+        """Add (or, with sign=-1, subtract) sparse counts into these counts in place."""
+        for count_type, values in sparse.columns.items():
+            column = self.columns[count_type]
+            for ordinal, value in zip(sparse.ordinals, values):
+                column[ordinal] += sign * value
+
+    def sparse(self) -> SparseCounts:
+        """Get the nonzero counts as compact arrays."""
+        ordinals = array(
+            "l", itertools.compress(range(len(self.index.ordinal_to_id)), self._nonzero())
+        )
+        return SparseCounts(
+            ordinals,
+            {
+                count_type: array("q", map(column.__getitem__, ordinals))
+                for count_type, column in self.columns.items()
+            },
+        )
+
+    def __add__(self, other: Mapping[UUID, Mapping[CountType, int]]) -> "CardCounts":
+        return self._combine(other, operator.add)
+
+    def __sub__(self, other: Mapping[UUID, Mapping[CountType, int]]) -> "CardCounts":
+        return self._combine(other, operator.sub)
+
+    def __iadd__(self, other: Mapping[UUID, Mapping[CountType, int]]) -> Self:
+        self.accumulate(other)
+        return self
+
+    def __isub__(self, other: Mapping[UUID, Mapping[CountType, int]]) -> Self:
+        self.accumulate(other, -1)
+        return self
+
+    def __getitem__(self, card_id: UUID) -> Mapping[CountType, int]:
+        ordinal = self.index.id_to_ordinal[card_id]
+        counts = {
+            count_type: column[ordinal]
+            for count_type, column in self.columns.items()
+            if column[ordinal]
+        }
+        if not counts:
+            raise KeyError(card_id)
+        return counts
+
+    def __iter__(self) -> Iterator[UUID]:
+        return itertools.compress(self.index.ordinal_to_id, self._nonzero())
+
+    def __len__(self) -> int:
+        return sum(self._nonzero())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+def fallback_ordinal(scryfall_id: Any, index: ScryfallDataIndex) -> Tuple[int, bool]:
+    """Get the ordinal for an id missing from the index's fast id lookups.
+
+    Also returns whether the id was migrated.
+    """
+    if isinstance(scryfall_id, str):
+        ordinal = index.migrated_id_str_to_ordinal.get(scryfall_id)
+        if ordinal is not None:
+            return ordinal, True
+    if not isinstance(scryfall_id, UUID):
+        scryfall_id = UUID(scryfall_id)
+    card_id = index.migrated_id(scryfall_id)
+    try:
+        return index.id_to_ordinal[card_id], card_id != scryfall_id
+    except KeyError:
+        pass
+    if card_id in index.deleted_ids:
+        msg = f"Found counts for card={card_id} deleted by a scryfall migration"
+        raise DeletedCardError(msg)
+    if card_id in index.cyclic_migration_ids:
+        msg = f"Found counts for card={card_id} with cyclic scryfall migrations"
+        raise CardNotFoundError(msg)
+    msg = f"Found counts for card={card_id} not found scryfall data"
+    raise CardNotFoundError(msg)
+
+
+def aggregate_card_counts(card_rows: Iterable[Dict[str, Any]], oracle: Oracle) -> CardCounts:
+    """Extract card counts from card rows.
+
+    Canonical id strings (current or migrated) map straight to card ordinals through
+    the index, so UUIDs are only parsed for ids in other forms. The number of rows is
+    recorded for stage throughput, and rows with migrated ids are reported.
+    """
+    index = oracle.index
+    card_counts = CardCounts(index)
+    id_str_to_ordinal = index.id_str_to_ordinal
+    count_keys = [count_type.value for count_type in CountType]
+    columns = [card_counts.columns[count_type] for count_type in CountType]
+    rows = 0
+    migrated_rows = 0
     for card_row_loop in card_rows:
+        rows += 1
         card_row = card_row_loop  # capture loop variable
         if "scryfall_id" not in card_row:
             card_row = legacy.coerce_row(card_row, oracle)
-        if not card_row:
+            if not card_row:
+                continue
+        values = [int(card_row.get(key) or 0) for key in count_keys]
+        if not any(values):
             continue
         scryfall_id = card_row["scryfall_id"]
-        if not isinstance(scryfall_id, UUID):
-            scryfall_id = UUID(scryfall_id)
-        counts = card_counts.get(scryfall_id, {})
-        for count_type in CountType:
-            value = int(card_row.get(count_type.value) or 0)
-            if value:
-                counts[count_type] = value + counts.get(count_type, 0)
-        if counts:
-            while scryfall_id in oracle.index.migrate_old_id_to_new_id:
-                scryfall_id = oracle.index.migrate_old_id_to_new_id[scryfall_id]
-            if scryfall_id not in oracle.index.id_to_card:
-                msg = f"Found counts for card={scryfall_id} not found scryfall data"
-                raise CardNotFoundError(msg)
-            card_counts[scryfall_id] = counts
+        ordinal = id_str_to_ordinal.get(scryfall_id) if isinstance(scryfall_id, str) else None
+        if ordinal is None:
+            ordinal, migrated = fallback_ordinal(scryfall_id, index)
+            migrated_rows += migrated
+        for column, value in zip(columns, values):
+            column[ordinal] += value
+    record_read_rows(rows, migrated_rows)
     return card_counts
 
 
+def record_read_rows(rows: int, migrated_rows: int) -> None:
+    """Record the number of rows read for stage throughput and report migrated rows."""
+    profiling.record_rows(rows)
+    if migrated_rows:
+        print(f"Migrated {migrated_rows} of {rows} rows to current scryfall ids")
+
+
+def _ad_hoc_card_counts(card_counts_args: Iterable[ScryfallCardCount]) -> CardCounts:
+    """Get empty columnar counts over an index of just the cards in the given card counts."""
+    index = ScryfallDataIndex()
+    index.ordinal_to_id = list(dict.fromkeys(itertools.chain.from_iterable(card_counts_args)))
+    index.id_to_ordinal = {card_id: ordinal for ordinal, card_id in enumerate(index.ordinal_to_id)}
+    return CardCounts(index)
+
+
 def merge_card_counts(*card_counts_args: ScryfallCardCount) -> ScryfallCardCount:
-    """Merge two sets of card_counts."""
-    merged_counts: ScryfallCardCount = collections.defaultdict(collections.Counter)
+    """Merge any number of card_counts."""
+    merged_counts = _ad_hoc_card_counts(card_counts_args)
     for card_counts in card_counts_args:
-        for card_id, counts in card_counts.items():
-            merged_counts[card_id].update(counts)
-    return dict(merged_counts)
+        merged_counts.accumulate(card_counts)
+    return {card_id: dict(counts) for card_id, counts in merged_counts.items()}
 
 
 def diff_card_counts(left: ScryfallCardCount, right: ScryfallCardCount) -> ScryfallCardCount:
     """Subtract right print counts from left print counts."""
-    diffed_counts: ScryfallCardCount = collections.defaultdict(dict)
-    for card_id in left.keys() | right.keys():
-        left_counts = left.get(card_id, {})
-        right_counts = right.get(card_id, {})
-        card_counts = {
-            k: left_counts.get(k, 0) - right_counts.get(k, 0)
-            for k in left_counts.keys() | right_counts.keys()
-        }
-        card_counts = {k: v for k, v in card_counts.items() if v}
-        if card_counts:
-            diffed_counts[card_id] = card_counts
-    return diffed_counts
+    diffed_counts = _ad_hoc_card_counts([left, right])
+    diffed_counts.accumulate(left)
+    diffed_counts.accumulate(right, -1)
+    return {card_id: dict(counts) for card_id, counts in diffed_counts.items()}
@@ -1,80 +1,146 @@
 """Card and set index container."""
 
+import bisect
 import collections
+import datetime as dt
 import string
-from typing import Dict, Iterable, List, Optional, Set, Tuple
+from array import array
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple, TypeVar
 from uuid import UUID
 
 from mtg_ssm.containers.bundles import ScryfallDataSet
 from mtg_ssm.mtg import util
-from mtg_ssm.scryfall.models import ScryCard, ScryMigrationStrategy, ScrySet
+from mtg_ssm.scryfall.models import ScryCardCore, ScryMigrationStrategy, ScrySet
 
+_K = TypeVar("_K")
 
-def name_card_sort_key(card: ScryCard) -> Tuple[str, int, str]:
+
+def name_card_sort_key(card: ScryCardCore) -> Tuple[str, int, str]:
     """Key function for sorting cards in a by-name list."""
     card_num, card_var = util.collector_int_var(card)
     return (card.set, card_num or 0, card_var or "")  # TODO: sort by set release date
 
 
-def set_card_sort_key(card: ScryCard) -> Tuple[int, str]:
+def set_card_sort_key(card: ScryCardCore) -> Tuple[int, str]:
     """Key function for sorting cards in a by-set list."""
     card_num, card_var = util.collector_int_var(card)
     return (card_num or 0, card_var or "")
 
 
-def build_snnmas(
-    card: ScryCard,
-) -> Iterable[Tuple[Optional[str], str, Optional[str], Optional[int], Optional[str]]]:
-    """Build set, name, number, multiverse id tuple keys."""
-    names_cnums: Set[Tuple[str, Optional[str]]] = {(card.name, card.collector_number)}
+def release_sort_key(card_set: ScrySet) -> Tuple[dt.date, str]:
+    """Key function for sorting sets by release date."""
+    return (card_set.released_at or dt.date.min, card_set.code)
+
+
+def resolve_chains(merges: Mapping[UUID, UUID]) -> Tuple[Dict[UUID, UUID], Set[UUID]]:
+    """Resolve old -> new id merges through chains to their final ids.
+
+    Returns the resolved merges and the ids whose chains lead into a cycle, which are
+    left unresolved.
+    """
+    resolved: Dict[UUID, UUID] = {}
+    cyclic: Set[UUID] = set()
+    for start in merges:
+        path: List[UUID] = []
+        on_path: Set[UUID] = set()
+        card_id = start
+        while (
+            card_id in merges
+            and card_id not in resolved
+            and card_id not in cyclic
+            and card_id not in on_path
+        ):
+            path.append(card_id)
+            on_path.add(card_id)
+            card_id = merges[card_id]
+        if card_id in on_path or card_id in cyclic:
+            cyclic.update(path)
+            continue
+        final_id = resolved.get(card_id, card_id)
+        resolved.update(dict.fromkeys(path, final_id))
+    return resolved, cyclic
+
+
+def build_names_numbers(card: ScryCardCore) -> Tuple[Set[str], Set[str]]:
+    """Build the names and collector numbers a card can be looked up by."""
+    names = {card.name}
+    numbers = {card.collector_number}
     for i, card_face in enumerate(card.card_faces or ()):
-        names_cnums |= {
-            (card_face.name, card.collector_number),
-            (card_face.name, card.collector_number + string.ascii_lowercase[i]),
-        }
-    names_cnums |= {(n, None) for n, _ in names_cnums}
+        names.add(card_face.name)
+        numbers.add(card.collector_number + string.ascii_lowercase[i])
+    return names, numbers
+
+
+def _post(postings: Dict[_K, List[int]], keys: Iterable[_K], ordinal: int) -> None:
+    for key in keys:
+        postings[key].append(ordinal)
+
+
+def _freeze(postings: Dict[_K, List[int]]) -> Dict[_K, "array[int]"]:
+    return {key: array("l", ordinals) for key, ordinals in postings.items()}
 
-    sets: Set[Optional[str]] = {card.set, None}
 
-    mvids: Set[Optional[int]] = {None} | set(card.multiverse_ids or ())
+def _contains(posting: "array[int]", ordinal: int) -> bool:
+    i = bisect.bisect_left(posting, ordinal)
+    return i < len(posting) and posting[i] == ordinal
 
-    artists: Set[Optional[str]] = {card.artist, None}
 
-    for name, number in names_cnums:
-        for set_ in sets:
-            for mvid in mvids:
-                for artist in artists:
-                    yield (set_, name, number, mvid, artist)
+def _intersect(postings: List["array[int]"]) -> List[int]:
+    """Intersect sorted posting lists by probing the longer lists for the shortest's ordinals."""
+    shortest, *others = sorted(postings, key=len)
+    ordinals = list(shortest)
+    for posting in others:
+        ordinals = [o for o in ordinals if _contains(posting, o)]
+    return ordinals
 
 
 class ScryfallDataIndex:
     """Card and set indexes for scryfall data."""
 
     def __init__(self) -> None:
-        self.id_to_card: Dict[UUID, ScryCard] = {}
-        self.name_to_cards: Dict[str, List[ScryCard]] = {}
-        self.setcode_to_cards: Dict[str, List[ScryCard]] = {}
+        self.id_to_card: Dict[UUID, ScryCardCore] = {}
+        self.id_to_ordinal: Dict[UUID, int] = {}
+        self.ordinal_to_id: List[UUID] = []
+        self.name_to_cards: Dict[str, List[ScryCardCore]] = {}
+        self.setcode_to_cards: Dict[str, List[ScryCardCore]] = {}
         self.id_to_setindex: Dict[UUID, int] = {}
         self.setcode_to_set: Dict[str, ScrySet] = {}
+        # Merge migrations resolved through any chain to their final id
         self.migrate_old_id_to_new_id: Dict[UUID, UUID] = {}
-        # snnma = Set, Name, (Collector) Number, Multiverse ID, Artist
-        # TODO: convert to intersecting bitmap indexes
-        # TODO: do we really need artist?
-        self.snnma_to_id: Dict[
-            Tuple[Optional[str], str, Optional[str], Optional[int], Optional[str]],
-            Set[UUID],
-        ] = {}
+        # Ids removed by delete migrations, directly or at the end of a merge chain
+        self.deleted_ids: Set[UUID] = set()
+        # Ids whose merge migrations lead into a cycle and cannot be resolved
+        self.cyclic_migration_ids: Set[UUID] = set()
+        # Card ordinals by canonical id string, for current and migrated ids
+        self.id_str_to_ordinal: Dict[str, int] = {}
+        self.migrated_id_str_to_ordinal: Dict[str, int] = {}
+        # Card ordinals by 16 byte id, for current ids
+        self.id_bytes_to_ordinal: Dict[bytes, int] = {}
+        # Position of each card ordinal when cards are listed by set release order
+        self.ordinal_to_release_position: array[int] = array("l")
+        # Sorted card ordinal posting lists for legacy lookups of non-digital cards
+        self.setcode_to_ordinals: Dict[str, array[int]] = {}
+        self.name_to_ordinals: Dict[str, array[int]] = {}
+        self.number_to_ordinals: Dict[str, array[int]] = {}
+        self.mvid_to_ordinals: Dict[int, array[int]] = {}
+        self.artist_to_ordinals: Dict[str, array[int]] = {}
 
     def load_data(self, scrydata: ScryfallDataSet) -> None:
         """Load all cards and sets from a Scryfall data set."""
         self.id_to_card = {}
+        self.id_to_ordinal = {}
+        self.ordinal_to_id = []
         self.id_to_setindex = {}
         self.setcode_to_set = {}
 
-        self.snnma_to_id = collections.defaultdict(set)
+        setcode_postings: Dict[str, List[int]] = collections.defaultdict(list)
+        name_postings: Dict[str, List[int]] = collections.defaultdict(list)
+        number_postings: Dict[str, List[int]] = collections.defaultdict(list)
+        mvid_postings: Dict[int, List[int]] = collections.defaultdict(list)
+        artist_postings: Dict[str, List[int]] = collections.defaultdict(list)
 
-        name_to_unsorted_cards: Dict[str, List[ScryCard]] = collections.defaultdict(list)
-        setcode_to_unsorted_cards: Dict[str, List[ScryCard]] = {}
+        name_to_unsorted_cards: Dict[str, List[ScryCardCore]] = collections.defaultdict(list)
+        setcode_to_unsorted_cards: Dict[str, List[ScryCardCore]] = {}
 
         for set_ in scrydata.sets:
             self.setcode_to_set[set_.code] = set_
@@ -82,12 +148,23 @@ class ScryfallDataIndex:
 
         for card in scrydata.cards:
             self.id_to_card[card.id] = card
+            ordinal = len(self.ordinal_to_id)
+            self.id_to_ordinal[card.id] = ordinal
+            self.ordinal_to_id.append(card.id)
             name_to_unsorted_cards[card.name].append(card)
             setcode_to_unsorted_cards[card.set].append(card)
             if not self.setcode_to_set[card.set].digital:
-                for snnma in build_snnmas(card):
-                    self.snnma_to_id[snnma].add(card.id)
-        self.snnma_to_id = dict(self.snnma_to_id)
+                names, numbers = build_names_numbers(card)
+                _post(setcode_postings, [card.set], ordinal)
+                _post(name_postings, names, ordinal)
+                _post(number_postings, numbers, ordinal)
+                _post(mvid_postings, set(card.multiverse_ids or ()), ordinal)
+                _post(artist_postings, [card.artist] if card.artist else [], ordinal)
+        self.setcode_to_ordinals = _freeze(setcode_postings)
+        self.name_to_ordinals = _freeze(name_postings)
+        self.number_to_ordinals = _freeze(number_postings)
+        self.mvid_to_ordinals = _freeze(mvid_postings)
+        self.artist_to_ordinals = _freeze(artist_postings)
 
         for cards_list in name_to_unsorted_cards.values():
             cards_list.sort(key=name_card_sort_key)
@@ -98,22 +175,93 @@ class ScryfallDataIndex:
             self.id_to_setindex.update({c.id: i for i, c in enumerate(cards_list)})
         self.setcode_to_cards = dict(setcode_to_unsorted_cards)
 
-        for migration in scrydata.migrations:
-            if (
-                migration.migration_strategy == ScryMigrationStrategy.MERGE
-                and migration.new_scryfall_id
-            ):
-                self.migrate_old_id_to_new_id[migration.old_scryfall_id] = (
-                    migration.new_scryfall_id
-                )
+        self.ordinal_to_release_position = array("l", [0]) * len(self.ordinal_to_id)
+        position = 0
+        for set_ in sorted(self.setcode_to_set.values(), key=release_sort_key):
+            for card in self.setcode_to_cards[set_.code]:
+                self.ordinal_to_release_position[self.id_to_ordinal[card.id]] = position
+                position += 1
+
+        self._load_migrations(scrydata)
+
+    def _load_migrations(self, scrydata: ScryfallDataSet) -> None:
+        """Resolve migrations once into final ids and build the id string and bytes lookups.
+
+        Later migrations of an id supersede earlier ones.
+        """
+        merges: Dict[UUID, UUID] = {}
+        deletes: Set[UUID] = set()
+        for migration in sorted(scrydata.migrations, key=lambda m: m.performed_at):
+            old_id = migration.old_scryfall_id
+            if migration.migration_strategy == ScryMigrationStrategy.DELETE:
+                deletes.add(old_id)
+                merges.pop(old_id, None)
+            elif migration.new_scryfall_id:
+                merges[old_id] = migration.new_scryfall_id
+                deletes.discard(old_id)
+
+        resolved, self.cyclic_migration_ids = resolve_chains(merges)
+        self.deleted_ids = deletes | {old for old, new in resolved.items() if new in deletes}
+        self.migrate_old_id_to_new_id = {
+            old: new for old, new in resolved.items() if new not in deletes
+        }
+
+        self.id_str_to_ordinal = {
+            str(card_id): ordinal for ordinal, card_id in enumerate(self.ordinal_to_id)
+        }
+        self.id_bytes_to_ordinal = {
+            card_id.bytes: ordinal for ordinal, card_id in enumerate(self.ordinal_to_id)
+        }
+        self.migrated_id_str_to_ordinal = {}
+        for old_id, new_id in self.migrate_old_id_to_new_id.items():
+            ordinal = self.id_to_ordinal.get(new_id)
+            if ordinal is not None and old_id not in self.id_to_ordinal:
+                self.migrated_id_str_to_ordinal[str(old_id)] = ordinal
+
+    def migrated_id(self, card_id: UUID) -> UUID:
+        """Get the current id of a card, following any merge migrations."""
+        if card_id in self.id_to_ordinal:
+            return card_id
+        return self.migrate_old_id_to_new_id.get(card_id, card_id)
+
+    def find_ids(
+        self,
+        name: str,
+        *,
+        setcode: Optional[str] = None,
+        number: Optional[str] = None,
+        mvid: Optional[int] = None,
+        artist: Optional[str] = None,
+    ) -> Set[UUID]:
+        """Find the ids of non-digital cards matching every given attribute."""
+        lookups: List[Tuple[Dict[Any, array[int]], Any]] = [
+            (self.name_to_ordinals, name),
+            (self.setcode_to_ordinals, setcode),
+            (self.number_to_ordinals, number),
+            (self.mvid_to_ordinals, mvid),
+            (self.artist_to_ordinals, artist),
+        ]
+        postings = []
+        for attr_to_ordinals, value in lookups:
+            if value is None:
+                continue
+            posting = attr_to_ordinals.get(value)
+            if posting is None:
+                return set()
+            postings.append(posting)
+        return {self.ordinal_to_id[o] for o in _intersect(postings)}
 
 
 class Oracle:
     """Container for an indexed Scryfall data set."""
 
-    def __init__(self, scrydata: ScryfallDataSet) -> None:
+    def __init__(
+        self, scrydata: ScryfallDataSet, bulk_updated_at: Optional[dt.datetime] = None
+    ) -> None:
         self._scrydata = scrydata
         self.cards = scrydata.cards
         self.sets = scrydata.sets
+        # Update time of the Scryfall bulk data the cards were read from, if known
+        self.bulk_updated_at = bulk_updated_at
         self.index = ScryfallDataIndex()
         self.index.load_data(scrydata)
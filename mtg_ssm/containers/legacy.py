@@ -1,6 +1,6 @@
 """Legacy record lookup capabilities for older file versions."""
 
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, List, Optional, Set
 from uuid import UUID
 
 from mtg_ssm.containers.indexes import Oracle
@@ -113,18 +113,19 @@ def find_scryfall_id(card_row: Dict[str, str], oracle: Oracle) -> UUID:
     artist = card_row.get("artist") or None
     artist = PSUDONYM_TO_ARTIST.get(artist, artist)
     print(f"Searching => Set: {set_code}; Name: {name}; Number: {collector_number}; MVID: {mvid}")
-    snnma_keys: List[Tuple[Optional[str], str, Optional[str], Optional[int], Optional[str]]] = []
+    # Attribute combinations to search; attributes that are None are not constrained
+    lookups: List[Dict[str, Any]] = []
     for set_ in set_codes:
-        snnma_keys += [
-            (set_, name, collector_number, None, None),
-            (set_, name, None, mvid, None),
-            (set_, name, None, None, artist),
-            (set_, name, None, None, None),
-            (None, name, None, None, artist),
+        lookups += [
+            {"setcode": set_, "number": collector_number},
+            {"setcode": set_, "mvid": mvid},
+            {"setcode": set_, "artist": artist},
+            {"setcode": set_},
+            {"artist": artist},
         ]
     seen = False
-    for snnma_key in snnma_keys:
-        found = oracle.index.snnma_to_id.get(snnma_key)
+    for lookup in lookups:
+        found = oracle.index.find_ids(name, **lookup)
         if found:
             seen = True
             scryfall_id = None
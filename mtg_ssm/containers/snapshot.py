@@ -0,0 +1,75 @@
+"""On-disk snapshots of filtered and indexed Scryfall data."""
+
+import datetime as dt
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Optional, Set
+
+import msgspec
+
+import mtg_ssm
+from mtg_ssm.containers.indexes import Oracle
+from mtg_ssm.scryfall.models import ScryCardLayout, ScrySetType
+
+SNAPSHOT_VERSION = 9
+SNAPSHOT_PREFIX = "oracle"
+SNAPSHOT_SUFFIX = ".pickle"
+
+
+def snapshot_path(
+    cache_dir: Path,
+    *,
+    bulk_updated_at: dt.datetime,
+    exclude_set_types: Set[ScrySetType],
+    exclude_card_layouts: Set[ScryCardLayout],
+    exclude_digital: bool,
+    exclude_foreing_only: bool,
+    merge_promos: bool,
+) -> Path:
+    """Get the snapshot path for a bulk data version and set of filter arguments."""
+    key_data = {
+        "snapshot_version": SNAPSHOT_VERSION,
+        "mtg_ssm_version": mtg_ssm.__version__,
+        "exclude_set_types": sorted(exclude_set_types),
+        "exclude_card_layouts": sorted(exclude_card_layouts),
+        "exclude_digital": exclude_digital,
+        "exclude_foreing_only": exclude_foreing_only,
+        "merge_promos": merge_promos,
+    }
+    key = hashlib.sha256(msgspec.json.encode(key_data)).hexdigest()[:16]
+    stamp = f"{bulk_updated_at:%Y%m%d%H%M%S}"
+    return cache_dir / f"{SNAPSHOT_PREFIX}-{stamp}-{key}{SNAPSHOT_SUFFIX}"
+
+
+def load_oracle(path: Path) -> Optional[Oracle]:
+    """Load an Oracle snapshot, returning None if it is missing or unreadable."""
+    try:
+        with path.open("rb") as snapshot_file:
+            oracle = pickle.load(snapshot_file)  # noqa: S301
+    except Exception:  # noqa: BLE001 - e.g. stale class layouts raise TypeError or ValueError
+        return None
+    if not isinstance(oracle, Oracle):
+        return None
+    return oracle
+
+
+def save_oracle(path: Path, oracle: Oracle) -> None:
+    """Save an Oracle snapshot, discarding snapshots of other bulk data versions."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # concurrent saves each write their own temporary file
+    temp_fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f"{path.stem}.", suffix=".tmp")
+    temp_path = Path(temp_name)
+    try:
+        with os.fdopen(temp_fd, "wb") as snapshot_file:
+            pickle.dump(oracle, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+        temp_path.replace(path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+    stamp_prefix = path.name.rsplit("-", 1)[0] + "-"
+    for stale_path in path.parent.glob(f"{SNAPSHOT_PREFIX}-*{SNAPSHOT_SUFFIX}"):
+        if not stale_path.name.startswith(stamp_prefix):
+            stale_path.unlink(missing_ok=True)
@@ -4,7 +4,7 @@ import functools
 import string
 from typing import Optional, Tuple
 
-from mtg_ssm.scryfall.models import ScryCard
+from mtg_ssm.scryfall.models import ScryCardCore
 
 STRICT_BASICS = frozenset({"Plains", "Island", "Swamp", "Mountain", "Forest"})
 
@@ -24,7 +24,7 @@ def dig_str(collector_number: str) -> Tuple[Optional[int], Optional[str]]:
     return (int("".join(digpart)), "".join(strpart) or None)
 
 
-def collector_int_var(card: ScryCard) -> Tuple[Optional[int], Optional[str]]:
+def collector_int_var(card: ScryCardCore) -> Tuple[Optional[int], Optional[str]]:
     """Get the integer and variant portions of a card's collector number."""
     return dig_str(card.collector_number)
 
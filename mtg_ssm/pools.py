@@ -0,0 +1,27 @@
+"""Worker process pools for spreading work across CPUs."""
+
+import concurrent.futures
+import multiprocessing
+import multiprocessing.context
+import threading
+from typing import Any, Callable, Optional, Tuple
+
+
+def process_pool(
+    workers: int, initializer: Callable[..., None], initargs: Tuple[Any, ...]
+) -> concurrent.futures.ProcessPoolExecutor:
+    """Start a process pool whose workers are each set up once by an initializer.
+
+    Where available, workers are forked so they inherit initargs from this process
+    without them being pickled; otherwise they are pickled once per worker, not per task.
+    Processes running other threads (e.g. serve) are never forked, since a forked child
+    may inherit locks held by those threads; their workers are spawned instead.
+    """
+    mp_context: Optional[multiprocessing.context.BaseContext] = None
+    if "fork" in multiprocessing.get_all_start_methods() and threading.active_count() == 1:
+        mp_context = multiprocessing.get_context("fork")
+    elif "spawn" in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context("spawn")
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, mp_context=mp_context, initializer=initializer, initargs=initargs
+    )
@@ -0,0 +1,157 @@
+"""Pipeline stage timings and profiling for CLI runs."""
+
+import contextlib
+import cProfile
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import msgspec
+
+try:
+    import resource
+except ImportError:  # not available on windows
+    resource = None  # type: ignore[assignment]
+
+
+class StageTiming(msgspec.Struct):
+    """Resource usage of a single pipeline stage.
+
+    max_rss_bytes is the process peak resident memory as of the end of the stage, so
+    the stage that first reaches the overall peak is the one that caused it. rows is
+    the number of input rows ingested during the stage, for throughput.
+    """
+
+    stage: str
+    wall_seconds: float
+    cpu_seconds: float
+    max_rss_bytes: Optional[int]
+    rows: int = 0
+
+
+class TimingsReport(msgspec.Struct):
+    """Structured report of all recorded stages in a run."""
+
+    command: str
+    wall_seconds: float
+    cpu_seconds: float
+    max_rss_bytes: Optional[int]
+    stages: List[StageTiming]
+
+
+def max_rss_bytes() -> Optional[int]:
+    """Get the peak resident memory of this process, if the platform reports it."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes, except on macOS where it is in bytes
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class StageTimer:
+    """Recorder of wall time, cpu time and peak memory for pipeline stages."""
+
+    def __init__(self) -> None:
+        self.stages: List[StageTiming] = []
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._stage_rows: List[int] = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Record the resource usage of the enclosed stage."""
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        self._stage_rows.append(0)
+        try:
+            yield
+        finally:
+            self.stages.append(
+                StageTiming(
+                    stage=name,
+                    wall_seconds=time.perf_counter() - wall_start,
+                    cpu_seconds=time.process_time() - cpu_start,
+                    max_rss_bytes=max_rss_bytes(),
+                    rows=self._stage_rows.pop(),
+                )
+            )
+
+    def add_rows(self, rows: int) -> None:
+        """Count ingested rows towards the innermost running stage."""
+        if self._stage_rows:
+            self._stage_rows[-1] += rows
+
+    def report(self, command: str) -> TimingsReport:
+        """Build a report of all stages recorded so far."""
+        return TimingsReport(
+            command=command,
+            wall_seconds=time.perf_counter() - self._wall_start,
+            cpu_seconds=time.process_time() - self._cpu_start,
+            max_rss_bytes=max_rss_bytes(),
+            stages=list(self.stages),
+        )
+
+
+_timer: Optional[StageTimer] = None
+
+
+@contextlib.contextmanager
+def recording(timer: Optional[StageTimer]) -> Iterator[None]:
+    """Record pipeline stages to a timer within the enclosed block."""
+    global _timer  # noqa: PLW0603
+    previous, _timer = _timer, timer
+    try:
+        yield
+    finally:
+        _timer = previous
+
+
+@contextlib.contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Mark a pipeline stage, timing it if stages are being recorded."""
+    timer = _timer
+    if timer is None:
+        yield
+    else:
+        with timer.stage(name):
+            yield
+
+
+def record_rows(rows: int) -> None:
+    """Count ingested rows towards the current stage, if stages are being recorded."""
+    if _timer is not None:
+        _timer.add_rows(rows)
+
+
+@contextlib.contextmanager
+def profiling(path: Optional[Path]) -> Iterator[None]:
+    """Run the enclosed block under cProfile, dumping pstats to path if given."""
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+def format_report(report: TimingsReport) -> str:
+    """Format a timings report as a human readable table."""
+    total = StageTiming("total", report.wall_seconds, report.cpu_seconds, report.max_rss_bytes)
+    lines = [
+        f"{'stage':<16} {'wall (s)':>10} {'cpu (s)':>10} {'max rss (MiB)':>14} {'rows/s':>12}"
+    ]
+    for timing in [*report.stages, total]:
+        rss = "" if timing.max_rss_bytes is None else f"{timing.max_rss_bytes / 2**20:.1f}"
+        throughput = ""
+        if timing.rows and timing.wall_seconds:
+            throughput = f"{timing.rows / timing.wall_seconds:,.0f}"
+        lines.append(
+            f"{timing.stage:<16} {timing.wall_seconds:>10.3f} {timing.cpu_seconds:>10.3f}"
+            f" {rss:>14} {throughput:>12}"
+        )
+    return "\n".join(lines)
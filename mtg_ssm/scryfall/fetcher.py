@@ -1,39 +1,35 @@
 """Scryfall data fetcher."""
 
-import gzip
+import mmap
 import os
-from typing import List
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple, Type, TypeVar
 
 import appdirs
 import msgspec
-from requests_cache import CachedSession, SerializerPipeline, Stage, pickle_serializer
 
-from mtg_ssm.containers.bundles import ScryfallDataSet
+from mtg_ssm.containers.bundles import ScryfallDataSet, ScryfallDataStream
 from mtg_ssm.scryfall.models import (
     ScryBulkData,
     ScryCard,
+    ScryCardCore,
     ScryList,
     ScryMigration,
     ScrySet,
 )
 
+if TYPE_CHECKING:
+    from requests_cache import CachedSession
+
 APP_AUTHOR = "gwax"
 APP_NAME = "mtg_ssm"
 CACHE_DIR = appdirs.user_cache_dir(APP_NAME, APP_AUTHOR)
-CACHE_SERIALIZER = SerializerPipeline(
-    [
-        pickle_serializer,
-        Stage(dumps=gzip.compress, loads=gzip.decompress),
-    ],
-    is_binary=True,
-)
-SESSION = CachedSession(
-    os.path.join(CACHE_DIR, "requests_cache.sqlite"),  # noqa: PTH118
-    backend="sqlite",
-    serializer=CACHE_SERIALIZER,
-    cache_control=True,
-    expire_after=86400,
-)
+LEGACY_CACHE_FILES = ["requests_cache.sqlite"]
 
 BULK_DATA_ENDPOINT = "https://api.scryfall.com/bulk-data"
 SETS_ENDPOINT = "https://api.scryfall.com/sets"
@@ -41,40 +37,256 @@ MIGRATIONS_ENDPOINT = "https://api.scryfall.com/migrations"
 BULK_TYPE = "default_cards"
 
 REQUESTS_TIMEOUT_SECONDS = 30
+STREAM_CHUNK_SIZE = 1024 * 1024
+# Scryfall asks for 50-100 milliseconds between requests
+REQUESTS_INTERVAL_SECONDS = 0.1
+FETCH_WORKERS = 3
+
+_T = TypeVar("_T")
+
+# JSON strings cannot contain raw newlines, so string literals never span lines
+_JSON_STRING_REGEX = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+
+_THROTTLE_LOCK = threading.Lock()
+_next_request_time = 0.0
+
+_SESSION_LOCK = threading.Lock()
+_session: Optional["CachedSession"] = None
+
+
+def get_session() -> "CachedSession":
+    """Get the shared cached requests session, creating it on first use.
+
+    requests and requests_cache are imported here so that commands which never
+    fetch do not pay for importing them.
+    """
+    global _session  # noqa: PLW0603
+    with _SESSION_LOCK:
+        if _session is None:
+            from requests_cache import CachedSession, pickle_serializer  # noqa: PLC0415
+
+            # Only small metadata endpoints are stored in the requests cache; bulk data
+            # files are stored as plain files beside it (see fetch_bulk_file), so
+            # compression is not worthwhile.
+            _session = CachedSession(
+                os.path.join(CACHE_DIR, "scryfall_cache.sqlite"),  # noqa: PTH118
+                backend="sqlite",
+                serializer=pickle_serializer,
+                cache_control=True,
+                expire_after=86400,
+            )
+        return _session
+
 
+def _throttle() -> None:
+    """Block until the next request may be sent, spacing requests across all threads."""
+    global _next_request_time  # noqa: PLW0603
+    with _THROTTLE_LOCK:
+        now = time.monotonic()
+        if _next_request_time > now:
+            time.sleep(_next_request_time - now)
+            now = _next_request_time
+        _next_request_time = now + REQUESTS_INTERVAL_SECONDS
 
-def _fetch_endpoint(endpoint: str) -> bytes:
-    response = SESSION.get(endpoint)
+
+def _fetch_endpoint(endpoint: str, *, refresh: bool = False) -> bytes:
+    _throttle()
+    headers = {"Cache-Control": "no-cache"} if refresh else None
+    response = get_session().get(endpoint, headers=headers)
     response.raise_for_status()
     cached_response = getattr(response, "from_cache", False)
     print(f'Fetched {endpoint}{" [CACHED]" if cached_response else ""}')
     return response.content
 
 
-def scryfetch() -> ScryfallDataSet:
-    """Retrieve and deserialize Scryfall object data."""
-    print("Reading data from scryfall")
+def _bulk_paths(bulk_data: ScryBulkData) -> Tuple[Path, Path]:
+    """Get the local paths for a bulk data file and the record it was downloaded for."""
+    cache_dir = Path(CACHE_DIR)
+    return (cache_dir / f"{bulk_data.type}.json", cache_dir / f"{bulk_data.type}.record.json")
+
+
+def _same_bulk_data(left: ScryBulkData, right: ScryBulkData) -> bool:
+    return (left.download_uri, left.updated_at, left.compressed_size) == (
+        right.download_uri,
+        right.updated_at,
+        right.compressed_size,
+    )
+
+
+def fetch_bulk_file(bulk_data: ScryBulkData) -> Path:
+    """Get a local copy of a bulk data file, downloading it only if it has changed.
+
+    Bulk files are stored outside of the requests cache, alongside the bulk data record
+    that they were downloaded for. If the current record matches the stored record, the
+    local file is reused without contacting the download URI.
+    """
+    data_path, record_path = _bulk_paths(bulk_data)
+    try:
+        stored_bulk_data = msgspec.json.decode(record_path.read_bytes(), type=ScryBulkData)
+    except (OSError, msgspec.DecodeError):
+        stored_bulk_data = None
+    if (
+        stored_bulk_data is not None
+        and _same_bulk_data(stored_bulk_data, bulk_data)
+        and data_path.exists()
+    ):
+        print(f"Reusing {data_path} [UNCHANGED since {bulk_data.updated_at:%Y-%m-%d %H:%M:%S}]")
+        return data_path
+
+    print(f"Downloading {bulk_data.download_uri}")
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+    for legacy_cache_file in LEGACY_CACHE_FILES:
+        # Older versions kept gzipped bulk data in the requests cache
+        (data_path.parent / legacy_cache_file).unlink(missing_ok=True)
+    record_path.unlink(missing_ok=True)
+    import requests  # noqa: PLC0415
+
+    _throttle()
+    # concurrent downloads each write their own temporary file
+    temp_fd, temp_name = tempfile.mkstemp(
+        dir=data_path.parent, prefix=f"{data_path.stem}.", suffix=".tmp"
+    )
+    temp_path = Path(temp_name)
+    try:
+        with os.fdopen(temp_fd, "wb") as bulk_file, requests.get(
+            bulk_data.download_uri, stream=True, timeout=REQUESTS_TIMEOUT_SECONDS
+        ) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                bulk_file.write(chunk)
+        temp_path.replace(data_path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+    record_path.write_bytes(msgspec.json.encode(bulk_data))
+    return data_path
+
+
+def _iter_file_lines(path: Path) -> Iterator[bytes]:
+    """Yield the lines of a file from a read-only memory map of its contents."""
+    with path.open("rb") as lines_file:
+        if not os.fstat(lines_file.fileno()).st_size:
+            return
+        with mmap.mmap(lines_file.fileno(), 0, access=mmap.ACCESS_READ) as lines_map:
+            yield from iter(lines_map.readline, b"")
+
+
+def _depth_change(line: bytes) -> int:
+    """Get the net change in JSON nesting depth across a line."""
+    bare = _JSON_STRING_REGEX.sub(b"", line)
+    return bare.count(b"[") + bare.count(b"{") - bare.count(b"]") - bare.count(b"}")
+
+
+def iter_json_array(lines: Iterable[bytes], item_type: Type[_T]) -> Iterator[_T]:  # noqa: C901
+    """Incrementally decode the items of a top level JSON array from its lines.
+
+    Scryfall bulk files place one item per line, each of which is decoded as soon as it
+    is read. Items that span multiple lines are accumulated until their closing line.
+    """
+    item_decoder = msgspec.json.Decoder(item_type)
+    decoder = msgspec.json.Decoder(List[item_type])  # type: ignore[valid-type]
+    pending: List[bytes] = []
+    depth = 0
+    started = False
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not started:
+            if not line:
+                continue
+            if not line.startswith(b"["):
+                msg = "Expected a JSON array"
+                raise msgspec.DecodeError(msg)
+            line = line[1:]
+            started = True
+        if not pending and line.startswith(b"{") and line.rstrip(b",").endswith(b"}"):
+            try:
+                item = item_decoder.decode(memoryview(line)[: len(line.rstrip(b","))])
+            except msgspec.ValidationError:
+                raise
+            except msgspec.DecodeError:
+                pass  # not a single complete item, fall back to tracking depth
+            else:
+                yield item
+                continue
+        depth += _depth_change(line)
+        if depth < 0:  # closing bracket of the top level array
+            line = line[: line.rindex(b"]")]
+            depth = 0
+        pending.append(line)
+        if depth == 0:
+            body = b"\n".join(pending).strip(b", \t\r\n")
+            pending = []
+            if body:
+                yield from decoder.decode(b"[" + body + b"]")
+    if pending:
+        # Let msgspec report the truncated item
+        decoder.decode(b"[" + b"\n".join(pending))
+
+
+def fetch_bulk_data(*, refresh: bool = False) -> ScryBulkData:
+    """Retrieve the Scryfall bulk data record for the card bulk file.
+
+    If refresh, the record is requested from Scryfall even if a cached copy is fresh.
+    """
     bulk_data = msgspec.json.decode(
-        _fetch_endpoint(BULK_DATA_ENDPOINT), type=ScryList[ScryBulkData]
+        _fetch_endpoint(BULK_DATA_ENDPOINT, refresh=refresh), type=ScryList[ScryBulkData]
     ).data
+    [cards_bulk_data] = [bd for bd in bulk_data if bd.type == BULK_TYPE]
+    return cards_bulk_data
+
+
+def _fetch_list(endpoint: str, item_type: Type[_T]) -> List[_T]:
+    """Retrieve all pages of a Scryfall list endpoint."""
+    decoder = msgspec.json.Decoder(ScryList[item_type])  # type: ignore[valid-type]
+    scrylist = decoder.decode(_fetch_endpoint(endpoint))
+    data = scrylist.data
+    while scrylist.has_more and scrylist.next_page is not None:
+        scrylist = decoder.decode(_fetch_endpoint(scrylist.next_page))
+        data += scrylist.data
+    return data
+
 
-    scrylistset_decoder = msgspec.json.Decoder(ScryList[ScrySet])
-    sets_list = scrylistset_decoder.decode(_fetch_endpoint(SETS_ENDPOINT))
-    sets_data = sets_list.data
-    while sets_list.has_more and sets_list.next_page is not None:
-        sets_list = scrylistset_decoder.decode(_fetch_endpoint(sets_list.next_page))
-        sets_data += sets_list.data
-
-    scrylistmigration_decoder = msgspec.json.Decoder(ScryList[ScryMigration])
-    migrations_list = scrylistmigration_decoder.decode(_fetch_endpoint(MIGRATIONS_ENDPOINT))
-    migrations_data = migrations_list.data
-    while migrations_list.has_more and migrations_list.next_page is not None:
-        migrations_list = scrylistmigration_decoder.decode(
-            _fetch_endpoint(migrations_list.next_page)
-        )
-        migrations_data += migrations_list.data
-
-    [cards_endpoint] = [bd.download_uri for bd in bulk_data if bd.type == BULK_TYPE]
-    cards_data = msgspec.json.decode(_fetch_endpoint(cards_endpoint), type=List[ScryCard])
-
-    return ScryfallDataSet(sets=sets_data, cards=cards_data, migrations=migrations_data)
+def _fetch_bulk_file(bulk_data: Optional[ScryBulkData]) -> Path:
+    if bulk_data is None:
+        bulk_data = fetch_bulk_data()
+    return fetch_bulk_file(bulk_data)
+
+
+def scryfetch_stream(
+    bulk_data: Optional[ScryBulkData] = None,
+    *,
+    card_type: Type[ScryCardCore] = ScryCard,
+    max_workers: int = FETCH_WORKERS,
+) -> ScryfallDataStream:
+    """Retrieve Scryfall set and migration data with a lazily decoded stream of cards.
+
+    Cards are decoded incrementally from the local copy of the bulk data file, so
+    consumers can discard unwanted cards before the full card pool is ever held in memory.
+    Passing card_type=ScryCardCore skips decoding fields that are not needed to build
+    and serialize collections.
+
+    The bulk file download and the paginated sets and migrations listings are fetched
+    concurrently by up to max_workers threads, with request starts spaced out by
+    REQUESTS_INTERVAL_SECONDS.
+    """
+    print("Reading data from scryfall")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        bulk_path_future = executor.submit(_fetch_bulk_file, bulk_data)
+        sets_future = executor.submit(_fetch_list, SETS_ENDPOINT, ScrySet)
+        migrations_future = executor.submit(_fetch_list, MIGRATIONS_ENDPOINT, ScryMigration)
+        bulk_path = bulk_path_future.result()
+        sets_data = sets_future.result()
+        migrations_data = migrations_future.result()
+
+    cards_stream = iter_json_array(_iter_file_lines(bulk_path), card_type)
+
+    return ScryfallDataStream(sets=sets_data, cards=cards_stream, migrations=migrations_data)
+
+
+def scryfetch() -> ScryfallDataSet:
+    """Retrieve and deserialize Scryfall object data."""
+    scrystream = scryfetch_stream()
+    return ScryfallDataSet(
+        sets=scrystream.sets,
+        cards=list(scrystream.cards),
+        migrations=scrystream.migrations,
+    )
@@ -324,22 +324,47 @@ class CardPreviewBlock(Struct):
     previewed_at: dt.date
 
 
-class ScryCard(
+class ScryCardCore(
     Struct,
     tag_field="object",
     tag="card",
     kw_only=True,
     omit_defaults=True,
 ):
-    """Model for https://scryfall.com/docs/api/cards."""
+    """Slim model for https://scryfall.com/docs/api/cards.
+
+    Only includes the fields needed to filter, index, and serialize collections; all
+    other fields are skipped when decoding.
+    """
 
     # Core Card Fields
-    arena_id: Optional[int] = None
     id: UUID
     lang: str
+    multiverse_ids: Optional[List[int]] = None
+    # Gameplay Fields
+    card_faces: Optional[List[ScryCardFace]] = None
+    layout: ScryCardLayout
+    name: str
+    # Print Fields
+    artist: Optional[str] = None
+    collector_number: str
+    digital: bool
+    prices: Optional[Dict[str, Optional[Decimal]]]  # TODO: enum keys=None
+    released_at: dt.date
+    set: str
+
+
+class ScryCard(
+    ScryCardCore,
+    kw_only=True,
+    omit_defaults=True,
+):
+    """Model for https://scryfall.com/docs/api/cards."""
+
+    # Core Card Fields
+    arena_id: Optional[int] = None
     mtgo_id: Optional[int] = None
     mtgo_foil_id: Optional[int] = None
-    multiverse_ids: Optional[List[int]] = None
     tcgplayer_id: Optional[int] = None
     tcgplayer_etched_id: Optional[int] = None
     cardmarket_id: Optional[int] = None
@@ -350,7 +375,6 @@ class ScryCard(
     uri: str
     # Gameplay Fields
     all_parts: Optional[List[ScryRelatedCard]] = None
-    card_faces: Optional[List[ScryCardFace]] = None
     cmc: Optional[float] = None
     colors: Optional[List[ScryColor]] = None
     color_identity: List[ScryColor]
@@ -359,12 +383,10 @@ class ScryCard(
     foil: bool
     hand_modifier: Optional[str] = None
     keywords: List[str]
-    layout: ScryCardLayout
     legalities: Dict[ScryFormat, ScryLegality]
     life_modifier: Optional[str] = None
     loyalty: Optional[str] = None
     mana_cost: Optional[str] = None
-    name: str
     nonfoil: bool
     oracle_text: Optional[str] = None
     oversized: bool
@@ -375,14 +397,11 @@ class ScryCard(
     toughness: Optional[str] = None
     type_line: Optional[str] = None
     # Print Fields
-    artist: Optional[str] = None
     artist_ids: Optional[List[UUID]] = None
     booster: bool
     border_color: ScryBorderColor
     card_back_id: Optional[UUID] = None
-    collector_number: str
     content_warning: Optional[bool] = None
-    digital: bool
     finishes: List[ScryFinish]
     flavor_name: Optional[str] = None
     flavor_text: Optional[str] = None
@@ -395,7 +414,6 @@ class ScryCard(
     illustration_id: Optional[UUID] = None
     image_status: ScryImageStatus
     image_uris: Optional[Dict[str, str]] = None
-    prices: Optional[Dict[str, Optional[Decimal]]]  # TODO: enum keys=None
     printed_name: Optional[str] = None
     printed_text: Optional[str] = None
     printed_type_line: Optional[str] = None
@@ -404,14 +422,12 @@ class ScryCard(
     purchase_uris: Optional[Dict[str, str]] = None
     rarity: ScryRarity
     related_uris: Optional[Dict[str, str]] = None
-    released_at: dt.date
     reprint: bool
     scryfall_set_uri: str
     set_name: str
     set_search_uri: str
     set_type: str
     set_uri: str
-    set: str
     set_id: UUID
     story_spotlight: bool
     textless: bool
@@ -1,5 +1,25 @@
-"""Ensure that all serializers are imported to properly set up interface."""
+"""Register serialization dialects, deferring implementation imports until selected."""
 
-from . import csv, interface, xlsx
+from . import interface
 
-__all__ = ["csv", "interface", "xlsx"]
+_LAZY_DIALECTS = [
+    ("csv", "csv", "csv", "csv collection writing a row for every printing."),
+    ("csv", "terse", "csv", "csv collection writing only rows that have counts."),
+    ("msgpack", "msgpack", "msgpack", "msgpack binary collection for fast machine exchange."),
+    ("sqlite", "sqlite", "sqlite", "sqlite database with counts and card/set metadata tables."),
+    ("sqlite", "terse", "sqlite", "sqlite database with only a counts table."),
+    (
+        "xlsx",
+        "sparse",
+        "xlsx",
+        "excel xlsx collection with sheets only for sets that have cards in the collection.",
+    ),
+    ("xlsx", "xlsx", "xlsx", "excel xlsx collection."),
+]
+
+for _extension, _dialect, _module, _description in _LAZY_DIALECTS:
+    interface.SerializationDialect.register_lazy(
+        _extension, _dialect, f"{__name__}.{_module}", _description
+    )
+
+__all__ = ["interface"]
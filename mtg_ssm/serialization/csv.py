@@ -1,41 +1,61 @@
 """CSV serializer."""
 
 import csv
-import datetime as dt
+import itertools
+from array import array
 from pathlib import Path
-from typing import Any, ClassVar, Dict, Iterable, Mapping
+from typing import ClassVar, Iterable, Iterator, List, Sequence, Tuple
 
 from mtg_ssm.containers import counts
 from mtg_ssm.containers.collection import MagicCollection
 from mtg_ssm.containers.counts import CountType
-from mtg_ssm.containers.indexes import Oracle
-from mtg_ssm.scryfall.models import ScryCard
+from mtg_ssm.containers.indexes import Oracle, ScryfallDataIndex
 from mtg_ssm.serialization import interface
 
 CSV_HEADER = ["set", "name", "collector_number", "scryfall_id"] + [ct.value for ct in CountType]
 
 
-def row_for_card(card: ScryCard, card_count: Mapping[CountType, int]) -> Dict[str, Any]:
-    """Given a CardPrinting and counts, return a csv row."""
-    return {
-        "set": card.set.upper(),
-        "name": card.name,
-        "collector_number": card.collector_number,
-        "scryfall_id": card.id,
-        **{ct.value: cnt for ct, cnt in card_count.items() if cnt},
-    }
+def _count_field(count: int) -> str:
+    return str(count) if count else ""
 
 
-def rows_for_cards(collection: MagicCollection, verbose: bool) -> Iterable[Dict[str, Any]]:
-    """Yield csv rows from a collection."""
-    for card_set in sorted(
-        collection.oracle.index.setcode_to_set.values(),
-        key=lambda cset: (cset.released_at or dt.date.min, cset.code),
-    ):
-        for card in collection.oracle.index.setcode_to_cards[card_set.code]:
-            card_count = collection.counts.get(card.id, {})
-            if verbose or any(card_count.values()):
-                yield row_for_card(card, card_count)
+def release_ordered(index: ScryfallDataIndex, ordinals: Iterable[int]) -> List[int]:
+    """Sort card ordinals by set release order."""
+    return sorted(ordinals, key=index.ordinal_to_release_position.__getitem__)
+
+
+def _all_release_ordered(index: ScryfallDataIndex) -> Iterator[int]:
+    """Yield every card ordinal in set release order."""
+    order = array("l", [0]) * len(index.ordinal_to_release_position)
+    for ordinal, position in enumerate(index.ordinal_to_release_position):
+        order[position] = ordinal
+    return iter(order)
+
+
+def rows_for_cards(collection: MagicCollection, verbose: bool) -> Iterator[Tuple[str, ...]]:
+    """Yield csv rows from a collection, in set release order.
+
+    Terse rows are only built for owned cards, so their cost depends on the size of the
+    collection's counts rather than of the card pool.
+    """
+    index = collection.oracle.index
+    columns: Sequence[Sequence[int]] = [
+        collection.card_counts.columns[count_type] for count_type in CountType
+    ]
+    if verbose:
+        ordinals: Iterable[int] = _all_release_ordered(index)
+    else:
+        owned = itertools.compress(range(len(index.ordinal_to_id)), map(any, zip(*columns)))
+        ordinals = release_ordered(index, owned)
+    for ordinal in ordinals:
+        card = index.id_to_card[index.ordinal_to_id[ordinal]]
+        yield (
+            card.set.upper(),
+            card.name,
+            card.collector_number,
+            str(card.id),
+            *(_count_field(column[ordinal]) for column in columns),
+        )
 
 
 class CsvFullDialect(interface.SerializationDialect):
@@ -43,20 +63,20 @@ class CsvFullDialect(interface.SerializationDialect):
 
     extension: ClassVar[str] = "csv"
     dialect: ClassVar[str] = "csv"
+    streaming: ClassVar[bool] = True
 
     verbose: ClassVar[bool] = True
 
     def write(self, path: Path, collection: MagicCollection) -> None:
         """Write collection to a file."""
-        with path.open("wt", encoding="utf-8") as csv_file:
-            writer = csv.DictWriter(csv_file, CSV_HEADER)
-            writer.writeheader()
-            for row in rows_for_cards(collection, self.verbose):
-                writer.writerow(row)
+        with interface.open_text(path, "w") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(CSV_HEADER)
+            writer.writerows(rows_for_cards(collection, self.verbose))
 
     def read(self, path: Path, oracle: Oracle) -> MagicCollection:
         """Read collection from file."""
-        with path.open("rt", encoding="utf-8") as csv_file:
+        with interface.open_text(path, "r") as csv_file:
             reader = csv.DictReader(csv_file)
             card_counts = counts.aggregate_card_counts(reader, oracle)
         return MagicCollection(oracle=oracle, counts=card_counts)
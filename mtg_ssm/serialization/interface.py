@@ -1,8 +1,24 @@
 """Interface definition for serializers."""
 
 import abc
+import contextlib
+import gzip
+import importlib
+import io
+import sys
 from pathlib import Path
-from typing import ClassVar, Dict, List, Optional, Set, Tuple, Type
+from typing import (
+    ClassVar,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TextIO,
+    Tuple,
+    Type,
+    cast,
+)
 
 from mtg_ssm.containers.collection import MagicCollection
 from mtg_ssm.containers.indexes import Oracle
@@ -20,14 +36,66 @@ class DeserializationError(Error):
     """Raised when there is an error reading counts from a file."""
 
 
+class MissingDependencyError(Error):
+    """Raised when a file requires an optional dependency that is not installed."""
+
+
+STDIO_PATH = Path("-")
+"""Path standing for standard input when reading, or standard output when writing."""
+
+COMPRESSION_SUFFIXES = (".gz", ".zst")
+
+
+def strip_compression(path: Path) -> Path:
+    """Get a path without any compression suffix."""
+    return path.with_suffix("") if path.suffix in COMPRESSION_SUFFIXES else path
+
+
+@contextlib.contextmanager
+def open_text(path: Path, mode: str) -> Iterator[TextIO]:
+    """Open a text stream for reading ("r") or writing ("w") a file.
+
+    Files are transparently (de)compressed based on a .gz or .zst suffix and STDIO_PATH
+    opens standard input or output, so streaming dialects can work with pipes and
+    compressed files without holding whole files in memory.
+    """
+    if path == STDIO_PATH:
+        stdio = sys.stdin if mode == "r" else sys.stdout
+        stream = io.TextIOWrapper(stdio.buffer, encoding="utf-8", newline="")
+        try:
+            yield stream
+        finally:
+            stream.flush()
+            stream.detach()  # leave the standard stream open
+        return
+    if path.suffix == ".gz":
+        with gzip.open(path, mode + "t", encoding="utf-8", newline="") as gz_file:
+            yield cast(TextIO, gz_file)
+        return
+    if path.suffix == ".zst":
+        try:
+            import zstandard  # type: ignore[import-not-found]  # noqa: PLC0415
+        except ImportError as err:
+            msg = f"Install zstandard (mtg-ssm[zstd]) to use zstd compressed file: {path}"
+            raise MissingDependencyError(msg) from err
+        with zstandard.open(path, mode + "t", encoding="utf-8", newline="") as zst_file:
+            yield cast(TextIO, zst_file)
+        return
+    with path.open(mode + "t", encoding="utf-8", newline="") as text_file:
+        yield cast(TextIO, text_file)
+
+
 class SerializationDialect(metaclass=abc.ABCMeta):
     """Abstract interface for mtg ssm serialization dialect."""
 
     _EXT_DIALECT_DOC: ClassVar[Set[Tuple[str, str, str]]] = set()
     _EXT_DIALECT_TO_IMPL: ClassVar[Dict[Tuple[str, str], Type["SerializationDialect"]]] = {}
+    _EXT_DIALECT_TO_MODULE: ClassVar[Dict[Tuple[str, str], str]] = {}
 
     extension: ClassVar[Optional[str]] = None
     dialect: ClassVar[Optional[str]] = None
+    # Whether the dialect can read and write standard streams and compressed files
+    streaming: ClassVar[bool] = False
 
     def __init_subclass__(cls: Type["SerializationDialect"]) -> None:
         super().__init_subclass__()
@@ -35,6 +103,10 @@ class SerializationDialect(metaclass=abc.ABCMeta):
             cls._EXT_DIALECT_DOC.add((cls.extension, cls.dialect, cls.__doc__ or cls.__name__))
             cls._EXT_DIALECT_TO_IMPL[(cls.extension, cls.dialect)] = cls
 
+    def __init__(self, *, jobs: int = 1) -> None:
+        # Number of worker processes a dialect may use for writing
+        self.jobs = jobs
+
     @abc.abstractmethod
     def write(self, path: Path, collection: MagicCollection) -> None:
         """Write print counts to a file."""
@@ -43,6 +115,26 @@ class SerializationDialect(metaclass=abc.ABCMeta):
     def read(self, path: Path, oracle: Oracle) -> MagicCollection:
         """Read print counts from file."""
 
+    def update(self, path: Path, collection: MagicCollection, previous_path: Path) -> None:
+        """Write print counts to a file, reusing unchanged content from a previous file."""
+        del previous_path  # unused by dialects without incremental updates
+        self.write(path, collection)
+
+    @classmethod
+    def register_lazy(
+        cls: Type["SerializationDialect"],
+        extension: str,
+        dialect: str,
+        module: str,
+        description: str,
+    ) -> None:
+        """Register a dialect whose implementing module is imported only when selected.
+
+        The description must match the implementing class docstring.
+        """
+        cls._EXT_DIALECT_DOC.add((extension, dialect, description))
+        cls._EXT_DIALECT_TO_MODULE[(extension, dialect)] = module
+
     @classmethod
     def dialects(
         cls: Type["SerializationDialect"],
@@ -58,6 +150,9 @@ class SerializationDialect(metaclass=abc.ABCMeta):
     ) -> Type["SerializationDialect"]:
         """Get a serializer class for a given extension and dialect mapping."""
         dialect = dialect_mappings.get(extension, extension)
+        module = cls._EXT_DIALECT_TO_MODULE.get((extension, dialect))
+        if module is not None and (extension, dialect) not in cls._EXT_DIALECT_TO_IMPL:
+            importlib.import_module(module)
         try:
             return cls._EXT_DIALECT_TO_IMPL[(extension, dialect)]
         except KeyError as err:
@@ -0,0 +1,103 @@
+"""MessagePack serializer."""
+
+from pathlib import Path
+from typing import ClassVar, List
+from uuid import UUID
+
+import msgspec
+
+from mtg_ssm.containers import counts
+from mtg_ssm.containers.collection import MagicCollection
+from mtg_ssm.containers.counts import CountType
+from mtg_ssm.containers.indexes import Oracle
+from mtg_ssm.serialization import interface
+
+SCHEMA_VERSION = 1
+
+
+class CountRecord(msgspec.Struct, array_like=True):
+    """Counts for a single printing, keyed by the 16 byte scryfall id."""
+
+    scryfall_id: bytes
+    nonfoil: int = 0
+    foil: int = 0
+
+
+# Counts are stored positionally, so the fields must list every CountType in order
+if CountRecord.__struct_fields__[1:] != tuple(count_type.value for count_type in CountType):
+    msg = "CountRecord count fields do not match CountType"
+    raise TypeError(msg)
+
+
+class CollectionRecord(msgspec.Struct, array_like=True):
+    """Versioned collection file contents."""
+
+    version: int
+    counts: List[CountRecord]
+
+
+def collection_record(collection: MagicCollection) -> CollectionRecord:
+    """Build a file record from cards with counts in a collection."""
+    return CollectionRecord(
+        version=SCHEMA_VERSION,
+        counts=[
+            CountRecord(
+                scryfall_id=card_id.bytes,
+                nonfoil=card_counts.get(CountType.NONFOIL, 0),
+                foil=card_counts.get(CountType.FOIL, 0),
+            )
+            for card_id, card_counts in collection.counts.items()
+            if any(card_counts.values())
+        ],
+    )
+
+
+def card_counts_from_record(record: CollectionRecord, oracle: Oracle) -> counts.CardCounts:
+    """Build card counts from a file record.
+
+    Ids map straight to card ordinals through the index, so UUIDs are only built for
+    ids that are not current, e.g. to follow migrations.
+    """
+    index = oracle.index
+    card_counts = counts.CardCounts(index)
+    id_bytes_to_ordinal = index.id_bytes_to_ordinal
+    nonfoil = card_counts.columns[CountType.NONFOIL]
+    foil = card_counts.columns[CountType.FOIL]
+    migrated_rows = 0
+    for count in record.counts:
+        ordinal = id_bytes_to_ordinal.get(count.scryfall_id)
+        if ordinal is None:
+            ordinal, migrated = counts.fallback_ordinal(UUID(bytes=count.scryfall_id), index)
+            migrated_rows += migrated
+        nonfoil[ordinal] += count.nonfoil
+        foil[ordinal] += count.foil
+    counts.record_read_rows(len(record.counts), migrated_rows)
+    return card_counts
+
+
+class MsgpackDialect(interface.SerializationDialect):
+    """msgpack binary collection for fast machine exchange."""
+
+    extension: ClassVar[str] = "msgpack"
+    dialect: ClassVar[str] = "msgpack"
+
+    def write(self, path: Path, collection: MagicCollection) -> None:
+        """Write collection to a file."""
+        path.write_bytes(msgspec.msgpack.encode(collection_record(collection)))
+
+    def read(self, path: Path, oracle: Oracle) -> MagicCollection:
+        """Read collection from file."""
+        try:
+            contents = path.read_bytes()
+            # other versions may lay out the rest of the file differently, so check it first
+            version_field, *_ = msgspec.msgpack.decode(contents, type=List[msgspec.Raw])
+            version = msgspec.msgpack.decode(version_field, type=int)
+            if version != SCHEMA_VERSION:
+                msg = f"Unsupported collection file version: {version}"
+                raise interface.DeserializationError(msg)
+            record = msgspec.msgpack.decode(contents, type=CollectionRecord)
+            card_counts = card_counts_from_record(record, oracle)
+        except (OSError, msgspec.DecodeError, ValueError) as err:
+            msg = f"Could not read collection file: {path}"
+            raise interface.DeserializationError(msg) from err
+        return MagicCollection(oracle=oracle, counts=card_counts)
@@ -0,0 +1,128 @@
+"""SQLite serializer."""
+
+import contextlib
+import sqlite3
+from pathlib import Path
+from typing import Any, ClassVar, Dict, Iterable, Iterator, Tuple
+
+from mtg_ssm.containers import counts
+from mtg_ssm.containers.collection import MagicCollection
+from mtg_ssm.containers.counts import CountType
+from mtg_ssm.containers.indexes import Oracle
+from mtg_ssm.serialization import interface
+
+SCHEMA_VERSION = 1
+COUNT_COLUMNS = [ct.value for ct in CountType]
+
+COUNTS_SCHEMA = f"""
+CREATE TABLE counts (
+    scryfall_id TEXT PRIMARY KEY NOT NULL,
+    {", ".join(f"{col} INTEGER NOT NULL DEFAULT 0" for col in COUNT_COLUMNS)}
+) WITHOUT ROWID;
+"""
+
+METADATA_SCHEMA = """
+CREATE TABLE sets (
+    code TEXT PRIMARY KEY NOT NULL,
+    name TEXT NOT NULL,
+    released_at TEXT,
+    block TEXT,
+    set_type TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE cards (
+    scryfall_id TEXT PRIMARY KEY NOT NULL,
+    "set" TEXT NOT NULL REFERENCES sets (code),
+    name TEXT NOT NULL,
+    collector_number TEXT NOT NULL,
+    artist TEXT
+) WITHOUT ROWID;
+CREATE INDEX cards_set ON cards ("set");
+CREATE INDEX cards_name ON cards (name);
+"""
+
+
+def count_rows(collection: MagicCollection) -> Iterator[Tuple[Any, ...]]:
+    """Yield counts table rows for cards with counts in a collection."""
+    for card_id, card_counts in collection.counts.items():
+        if any(card_counts.values()):
+            yield (str(card_id), *(card_counts.get(ct, 0) for ct in CountType))
+
+
+def rows_from_connection(connection: sqlite3.Connection) -> Iterable[Dict[str, Any]]:
+    """Read counts table rows from a collection database as dicts."""
+    columns = ["scryfall_id", *COUNT_COLUMNS]
+    cursor = connection.execute(f"SELECT {', '.join(columns)} FROM counts")  # noqa: S608
+    for row in cursor:
+        yield dict(zip(columns, row))
+
+
+class SqliteDialect(interface.SerializationDialect):
+    """sqlite database with counts and card/set metadata tables."""
+
+    extension: ClassVar[str] = "sqlite"
+    dialect: ClassVar[str] = "sqlite"
+
+    metadata: ClassVar[bool] = True
+
+    def write(self, path: Path, collection: MagicCollection) -> None:
+        """Write collection to a sqlite database."""
+        path.unlink(missing_ok=True)
+        with contextlib.closing(sqlite3.connect(path)) as connection, connection:
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            connection.executescript(COUNTS_SCHEMA)
+            placeholders = ", ".join("?" * (1 + len(COUNT_COLUMNS)))
+            connection.executemany(
+                f"INSERT INTO counts VALUES ({placeholders})",  # noqa: S608
+                count_rows(collection),
+            )
+            if not self.metadata:
+                return
+            connection.executescript(METADATA_SCHEMA)
+            index = collection.oracle.index
+            connection.executemany(
+                "INSERT INTO sets VALUES (?, ?, ?, ?, ?)",
+                (
+                    (
+                        s.code,
+                        s.name,
+                        s.released_at and s.released_at.isoformat(),
+                        s.block,
+                        s.set_type.value,
+                    )
+                    for s in index.setcode_to_set.values()
+                ),
+            )
+            connection.executemany(
+                "INSERT INTO cards VALUES (?, ?, ?, ?, ?)",
+                (
+                    (str(c.id), c.set, c.name, c.collector_number, c.artist)
+                    for c in index.id_to_card.values()
+                ),
+            )
+
+    def read(self, path: Path, oracle: Oracle) -> MagicCollection:
+        """Read collection from a sqlite database."""
+        if not path.exists():
+            msg = f"Database does not exist: {path}"
+            raise interface.DeserializationError(msg)
+        with contextlib.closing(sqlite3.connect(path)) as connection:
+            try:
+                [(version,)] = connection.execute("PRAGMA user_version")
+                if version != SCHEMA_VERSION:
+                    msg = f"Unsupported collection database version: {version}"
+                    raise interface.DeserializationError(msg)
+                card_counts = counts.aggregate_card_counts(
+                    rows_from_connection(connection), oracle
+                )
+            except sqlite3.DatabaseError as err:
+                msg = f"Could not read collection database: {path}"
+                raise interface.DeserializationError(msg) from err
+        return MagicCollection(oracle=oracle, counts=card_counts)
+
+
+class SqliteTerseDialect(SqliteDialect):
+    """sqlite database with only a counts table."""
+
+    dialect: ClassVar[str] = "terse"
+
+    metadata: ClassVar[bool] = False
@@ -1,23 +1,49 @@
 """XLSX serializer."""
 
 import collections
+import contextlib
+import copy
 import datetime as dt
+import hashlib
 import importlib.util
+import io
 import itertools
 import string
+import struct
+import tempfile
+import zipfile
 from pathlib import Path
-from typing import Any, ClassVar, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from typing import (
+    IO,
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+from xml.etree.ElementTree import ParseError
 
+import msgspec
 import openpyxl
+from openpyxl.packaging.custom import StringProperty  # type: ignore[import-not-found]
 from openpyxl.styles.numbers import FORMAT_CURRENCY_USD_SIMPLE
 from openpyxl.workbook.workbook import Workbook
 from openpyxl.worksheet.worksheet import Worksheet
+from openpyxl.xml.functions import iterparse  # type: ignore[import-not-found]
 
+import mtg_ssm
+from mtg_ssm import pools
 from mtg_ssm.containers import counts
 from mtg_ssm.containers.collection import MagicCollection
 from mtg_ssm.containers.indexes import Oracle, ScryfallDataIndex
 from mtg_ssm.mtg import util
-from mtg_ssm.scryfall.models import ScryCard, ScrySet
+from mtg_ssm.scryfall.models import ScryCardCore, ScrySet
 from mtg_ssm.serialization import interface
 
 HAS_LXML = importlib.util.find_spec("lxml") is not None
@@ -50,12 +76,16 @@ def _card_set_sort_key(cset: ScrySet) -> Tuple[dt.date, str, int, str]:
     )
 
 
-def create_all_sets(sheet: Worksheet, index: ScryfallDataIndex) -> None:
-    """Create all sets sheet from card_db."""
+def create_all_sets(
+    sheet: Worksheet, index: ScryfallDataIndex, setcodes: Optional[Set[str]] = None
+) -> None:
+    """Create all sets sheet from card_db, optionally limited to the given sets."""
     sheet.title = "All Sets"
     sheet.append(ALL_SETS_SHEET_HEADER)
     sheet.append(ALL_SETS_SHEET_TOTALS)
     for card_set in sorted(index.setcode_to_set.values(), key=_card_set_sort_key):
+        if setcodes is not None and card_set.code not in setcodes:
+            continue
         setcode = card_set.code.upper()
         row = [
             setcode,
@@ -95,7 +125,7 @@ def style_all_sets(sheet: Worksheet) -> None:
             cdim.number_format = number_format
 
 
-def create_haverefs(index: ScryfallDataIndex, setcode: str, cards: Sequence[ScryCard]) -> str:
+def create_haverefs(index: ScryfallDataIndex, setcode: str, cards: Sequence[ScryCardCore]) -> str:
     """Create a reference to or sum of the have cell(s) for printings in a single set."""
     setcode = setcode.upper()
     rownums = sorted(index.id_to_setindex[card.id] + ROW_OFFSET for card in cards)
@@ -113,34 +143,29 @@ def create_haverefs(index: ScryfallDataIndex, setcode: str, cards: Sequence[Scry
     return f"SUM({','.join(haverefs)})"
 
 
-def get_references(
-    index: ScryfallDataIndex, card_name: str, exclude_sets: Optional[Set[str]] = None
-) -> Optional[str]:
-    """Get an equation for the references to a card."""
+def _reference_parts(
+    index: ScryfallDataIndex, card_name: str, setcodes: Optional[Set[str]] = None
+) -> List[Tuple[str, str]]:
+    """Get the setcode and reference formula for each set with printings of a card."""
     if util.is_strict_basic(card_name):
-        return None  # Basics are so prolific that they overwhelm Excel
-
-    if exclude_sets is None:
-        exclude_sets = set()
+        return []  # Basics are so prolific that they overwhelm Excel
 
-    set_to_cards: Dict[str, List[ScryCard]] = collections.defaultdict(list)
+    set_to_cards: Dict[str, List[ScryCardCore]] = collections.defaultdict(list)
     for other_card in index.name_to_cards[card_name]:
-        if other_card.set not in exclude_sets:
+        if setcodes is None or other_card.set in setcodes:
             set_to_cards[other_card.set].append(other_card)
 
-    set_to_haveref = {k: create_haverefs(index, k, v) for k, v in set_to_cards.items()}
-    if not set_to_haveref:
-        return None
-
-    references = []
-    for card_set in sorted(
-        set_to_haveref,
-        key=lambda setcode: _card_set_sort_key(index.setcode_to_set[setcode]),
+    parts = []
+    for setcode in sorted(
+        set_to_cards, key=lambda setcode: _card_set_sort_key(index.setcode_to_set[setcode])
     ):
-        reference = (
-            f'IF({set_to_haveref[card_set]}>0,"{card_set.upper()}:"&{set_to_haveref[card_set]},"")'
-        )
-        references.append(reference)
+        haveref = create_haverefs(index, setcode, set_to_cards[setcode])
+        parts.append((setcode, f'IF({haveref}>0,"{setcode.upper()}:"&{haveref},"")'))
+    return parts
+
+
+def _join_references(parts: List[Tuple[str, str]], exclude_sets: Set[str]) -> Optional[str]:
+    references = [reference for setcode, reference in parts if setcode not in exclude_sets]
     if not references:
         return None
     if len(references) == 1:
@@ -148,15 +173,54 @@ def get_references(
     return f'=_xlfn.TEXTJOIN(", ",1,{",".join(references)})'
 
 
+def get_references(
+    index: ScryfallDataIndex, card_name: str, exclude_sets: Optional[Set[str]] = None
+) -> Optional[str]:
+    """Get an equation for the references to a card."""
+    return _join_references(_reference_parts(index, card_name), exclude_sets or set())
+
+
+class References:
+    """Per-name card references, computed at most once per name for a workbook.
+
+    If setcodes is given, only printings in those sets (i.e. sheets) are referenced.
+    """
+
+    def __init__(self, index: ScryfallDataIndex, setcodes: Optional[Set[str]] = None) -> None:
+        self.index = index
+        self.setcodes = setcodes
+        self._name_to_parts: Dict[str, List[Tuple[str, str]]] = {}
+
+    def get(self, card_name: str, exclude_sets: Optional[Set[str]] = None) -> Optional[str]:
+        """Get an equation for the references to a card."""
+        parts = self._name_to_parts.get(card_name)
+        if parts is None:
+            parts = _reference_parts(self.index, card_name, self.setcodes)
+            self._name_to_parts[card_name] = parts
+        return _join_references(parts, exclude_sets or set())
+
+
 ALL_CARDS_SHEET_HEADER = ["name", "have"]  # TODO: add list of sets
 
 
-def create_all_cards(sheet: Worksheet, index: ScryfallDataIndex) -> None:
-    """Create all cards sheet from card_db."""
+def create_all_cards(
+    sheet: Worksheet, index: ScryfallDataIndex, references: Optional[References] = None
+) -> None:
+    """Create all cards sheet from card_db, limited to the sets of the references."""
+    if references is None:
+        references = References(index)
     sheet.title = "All Cards"
     sheet.append(ALL_CARDS_SHEET_HEADER)
-    for name in sorted(index.name_to_cards):
-        row = [name, get_references(index, name)]
+    if references.setcodes is None:
+        names: Iterable[str] = index.name_to_cards
+    else:
+        names = {
+            card.name
+            for setcode in references.setcodes
+            for card in index.setcode_to_cards[setcode]
+        }
+    for name in sorted(names):
+        row = [name, references.get(name)]
         sheet.append(row)
 
 
@@ -220,13 +284,12 @@ VALUE_TMPL = (
 ROW_OFFSET = 2
 
 
-def create_set_sheet(sheet: Worksheet, collection: MagicCollection, setcode: str) -> None:
-    """Populate sheet with card information from a given set."""
+def set_sheet_rows(
+    collection: MagicCollection, setcode: str, references: References
+) -> List[List[Optional[Any]]]:
+    """Build the card rows of a set sheet."""
     index = collection.oracle.index
-
-    sheet.append(SET_SHEET_HEADER)
-    sheet.title = setcode.upper()
-
+    rows = []
     for card in index.setcode_to_cards[setcode]:
         rownum = ROW_OFFSET + index.id_to_setindex[card.id]
         row: List[Optional[Any]] = [
@@ -242,7 +305,27 @@ def create_set_sheet(sheet: Worksheet, collection: MagicCollection, setcode: str
         card_counts = collection.counts.get(card.id, {})
         for count_type in counts.CountType:
             row.append(card_counts.get(count_type))
-        row.append(get_references(index, card.name, exclude_sets={setcode}))
+        row.append(references.get(card.name, exclude_sets={setcode}))
+        rows.append(row)
+    return rows
+
+
+def create_set_sheet(
+    sheet: Worksheet,
+    collection: MagicCollection,
+    setcode: str,
+    references: Optional[References] = None,
+    rows: Optional[List[List[Optional[Any]]]] = None,
+) -> None:
+    """Populate sheet with card information from a given set."""
+    if rows is None:
+        if references is None:
+            references = References(collection.oracle.index)
+        rows = set_sheet_rows(collection, setcode, references)
+
+    sheet.append(SET_SHEET_HEADER)
+    sheet.title = setcode.upper()
+    for row in rows:
         sheet.append(row)
 
 
@@ -292,36 +375,434 @@ def rows_for_workbook(
         yield from rows_from_sheet(sheet)
 
 
+SHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+ID_COUNT_COLUMNS = {"scryfall_id"} | {ct.value for ct in counts.CountType}
+
+
+def _column_index(cell_ref: str) -> int:
+    """Get the zero based column index for a cell reference (e.g. "C7" -> 2)."""
+    index = 0
+    for char in cell_ref:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - ord("A") + 1
+    return index - 1
+
+
+def _shared_string_text(string_item: Any) -> str:
+    text = string_item.find(SHEET_NS + "t")
+    if text is not None:
+        return text.text or ""
+    # Rich text is split into runs; phonetic (rPh) runs are not part of the value
+    return "".join(t.text or "" for t in string_item.iterfind(f"{SHEET_NS}r/{SHEET_NS}t"))
+
+
+class SharedStrings:
+    """Shared strings table of an xlsx file, parsed only as far as strings are requested."""
+
+    def __init__(self, xlsx_zip: zipfile.ZipFile) -> None:
+        self._strings: List[str] = []
+        self._parser: Optional[Iterator[Tuple[str, Any]]] = None
+        if "xl/sharedStrings.xml" in xlsx_zip.namelist():
+            self._parser = iterparse(xlsx_zip.open("xl/sharedStrings.xml"))
+
+    def __getitem__(self, index: int) -> str:
+        while self._parser is not None and index >= len(self._strings):
+            for _, elem in self._parser:
+                if elem.tag == SHEET_NS + "si":
+                    self._strings.append(_shared_string_text(elem))
+                    elem.clear()
+                    break
+            else:
+                self._parser = None
+        return self._strings[index]
+
+
+def _cell_value(cell: Any, shared_strings: SharedStrings) -> Optional[Any]:
+    """Get the value of a worksheet cell element."""
+    cell_type = cell.get("t", "n")
+    if cell_type == "inlineStr":
+        return "".join(t.text or "" for t in cell.iter(SHEET_NS + "t"))
+    formula = cell.findtext(SHEET_NS + "f")
+    if formula is not None:
+        return "=" + formula  # like openpyxl, prefer formulas to their cached values
+    value = cell.findtext(SHEET_NS + "v")
+    if value is None:
+        return None
+    if cell_type == "s":
+        return shared_strings[int(value)]
+    if cell_type == "b":
+        return value == "1"
+    if cell_type == "n":
+        try:
+            return int(value)
+        except ValueError:
+            return float(value)
+    return value
+
+
+def sheet_parts(xlsx_zip: zipfile.ZipFile) -> List[Tuple[str, str]]:
+    """Get the (title, zip path) of each worksheet in workbook order."""
+    rid_to_target = {}
+    for _, rel in iterparse(xlsx_zip.open("xl/_rels/workbook.xml.rels")):
+        if rel.tag == PKG_REL_NS + "Relationship":
+            target = rel.get("Target")
+            rid_to_target[rel.get("Id")] = (
+                target.lstrip("/") if target.startswith("/") else "xl/" + target
+            )
+    return [
+        (sheet.get("name"), rid_to_target[sheet.get(REL_NS + "id")])
+        for _, sheet in iterparse(xlsx_zip.open("xl/workbook.xml"))
+        if sheet.tag == SHEET_NS + "sheet"
+    ]
+
+
+def rows_from_sheet_xml(
+    sheet_file: IO[bytes], title: str, shared_strings: SharedStrings
+) -> Iterator[Dict[str, Any]]:
+    """Stream rows from worksheet xml as dicts.
+
+    For sheets with a scryfall_id column, only id and count columns are extracted and
+    rows without counts are skipped; other sheets yield every column.
+    """
+    header: Optional[Dict[int, str]] = None
+    count_columns: Set[str] = set()
+    for _, elem in iterparse(sheet_file):
+        if elem.tag != SHEET_NS + "row":
+            continue
+        values: Dict[int, Any] = {}
+        for position, cell in enumerate(elem.iterfind(SHEET_NS + "c")):
+            column = _column_index(cell.get("r", "")) if cell.get("r") else position
+            if header is None or column in header:
+                values[column] = _cell_value(cell, shared_strings)
+        elem.clear()
+        if header is None:
+            header = {column: str(value) for column, value in values.items() if value is not None}
+            if "scryfall_id" in header.values():
+                header = {c: v for c, v in header.items() if v in ID_COUNT_COLUMNS}
+                count_columns = set(header.values()) - {"scryfall_id"}
+            continue
+        row = {name: values.get(column) for column, name in header.items()}
+        if count_columns and not any(row[c] for c in count_columns):
+            continue
+        if any(v is not None for v in row.values()):
+            yield dict(row, set=title)
+
+
+def rows_for_xlsx_file(path: Path, *, skip_sheets: Optional[Set[str]]) -> Iterable[Dict[str, Any]]:
+    """Stream rows from an xlsx file as dicts, reading the worksheet xml directly."""
+    if skip_sheets is None:
+        skip_sheets = set()
+    with zipfile.ZipFile(path) as xlsx_zip:
+        shared_strings = SharedStrings(xlsx_zip)
+        for title, part in sheet_parts(xlsx_zip):
+            if title in skip_sheets:
+                continue
+            with xlsx_zip.open(part) as sheet_file:
+                yield from rows_from_sheet_xml(sheet_file, title, shared_strings)
+
+
+CUSTOM_PROPS_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/custom-properties}"
+SHEET_HASH_PROPERTY_PREFIX = "mtg_ssm_sheet_hash_"
+STYLES_PART = "xl/styles.xml"
+
+
+def set_sheet_hash(rows: List[List[Optional[Any]]]) -> str:
+    """Get a digest of the content of a set sheet, used to detect unchanged sheets."""
+    content = msgspec.json.encode([mtg_ssm.__version__, SET_SHEET_HEADER, rows])
+    return hashlib.sha256(content).hexdigest()[:16]
+
+
+def _sheet_hashes(xlsx_zip: zipfile.ZipFile) -> Dict[str, str]:
+    """Get the set sheet hashes stored in the custom properties of an xlsx file."""
+    if "docProps/custom.xml" not in xlsx_zip.namelist():
+        return {}
+    sheet_hashes = {}
+    for _, prop in iterparse(xlsx_zip.open("docProps/custom.xml")):
+        name = prop.get("name", "")
+        if prop.tag == CUSTOM_PROPS_NS + "property" and name.startswith(
+            SHEET_HASH_PROPERTY_PREFIX
+        ):
+            sheet_hashes[name[len(SHEET_HASH_PROPERTY_PREFIX) :]] = "".join(prop.itertext())
+    return sheet_hashes
+
+
+def reusable_sheet_parts(previous_path: Path) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Get the sheet hashes and sheet part names of a previously written xlsx file.
+
+    Only parts that do not depend on the previous file's shared strings table can be reused.
+    """
+    try:
+        with zipfile.ZipFile(previous_path) as previous_zip:
+            sheet_hashes = _sheet_hashes(previous_zip)
+            previous_zip.getinfo(STYLES_PART)  # compared against the new file's when reusing
+            title_to_part = {}
+            for title, part in sheet_parts(previous_zip):
+                if title in sheet_hashes and b't="s"' not in previous_zip.read(part):
+                    title_to_part[title] = part
+    except (OSError, KeyError, ParseError, zipfile.BadZipFile):
+        return {}, {}
+    return sheet_hashes, title_to_part
+
+
+_LOCAL_FILE_HEADER = struct.Struct("<4s2B4HL2L2H")
+_DATA_DESCRIPTOR_FLAG = 0x08
+
+
+def _copy_raw_entry(
+    source_zip: zipfile.ZipFile, info: zipfile.ZipInfo, out_zip: zipfile.ZipFile, filename: str
+) -> None:
+    """Copy a zip entry's compressed data as is, rather than decompressing and recompressing."""
+    source_fp, out_fp = source_zip.fp, out_zip.fp
+    if source_fp is None or out_fp is None:
+        msg = "Attempt to copy between closed zip files"
+        raise ValueError(msg)
+    source_fp.seek(info.header_offset)
+    header = _LOCAL_FILE_HEADER.unpack(source_fp.read(_LOCAL_FILE_HEADER.size))
+    source_fp.seek(header[-2] + header[-1], io.SEEK_CUR)  # skip file name and extra field
+    data = source_fp.read(info.compress_size)
+
+    out_info = copy.copy(info)
+    out_info.filename = filename
+    # Sizes and CRC are known up front, so they go in the local header
+    out_info.flag_bits &= ~_DATA_DESCRIPTOR_FLAG
+    out_info.header_offset = out_fp.tell()
+    out_fp.write(out_info.FileHeader())
+    out_fp.write(data)
+    out_zip.filelist.append(out_info)
+    out_zip.NameToInfo[filename] = out_info
+    out_zip.start_dir = out_fp.tell()
+
+
+PartSource = Tuple[Path, str]
+"""An xlsx file and the name of a worksheet part in it."""
+
+HashedParts = Dict[str, Tuple[str, PartSource]]
+"""The content hash and part of set sheets, by title."""
+
+
+def _replace_sheet_parts(path: Path, title_to_source: Dict[str, PartSource]) -> bool:
+    """Replace worksheet parts of an xlsx file with other files' parts, if their styles match.
+
+    All entries are copied still compressed, so only the zip headers are rewritten.
+    """
+    temp_path = path.with_suffix(".parts" + path.suffix)
+    with contextlib.ExitStack() as stack:
+        xlsx_zip = stack.enter_context(zipfile.ZipFile(path))
+        styles = xlsx_zip.read(STYLES_PART)
+        source_zips = {}
+        for source_path in dict.fromkeys(source for source, _ in title_to_source.values()):
+            source_zip = stack.enter_context(zipfile.ZipFile(source_path))
+            if source_zip.read(STYLES_PART) != styles:
+                return False
+            source_zips[source_path] = source_zip
+        part_to_title = {part: title for title, part in sheet_parts(xlsx_zip)}
+        with zipfile.ZipFile(temp_path, "w") as out_zip:
+            for info in xlsx_zip.infolist():
+                title = part_to_title.get(info.filename)
+                if title in title_to_source:
+                    source_path, part = title_to_source[title]
+                    source_zip = source_zips[source_path]
+                    _copy_raw_entry(source_zip, source_zip.getinfo(part), out_zip, info.filename)
+                else:
+                    _copy_raw_entry(xlsx_zip, info, out_zip, info.filename)
+    temp_path.replace(path)
+    return True
+
+
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_set_sheet_worker(collection: MagicCollection, included_sets: Optional[Set[str]]) -> None:
+    """Initialize a worker process for rendering set sheets."""
+    _worker_state["collection"] = collection
+    _worker_state["included_sets"] = included_sets
+    _worker_state["references"] = References(collection.oracle.index, included_sets)
+
+
+def _worker_render_set_sheets(
+    path: Path, setcodes: Sequence[str], skip_hashes: Dict[str, str]
+) -> Dict[str, str]:
+    """Render set sheets into a standalone xlsx file in a worker process, returning their hashes.
+
+    The summary sheets come first, as in the full workbook, so that the file's styles match
+    it. Only the all sets sheet is filled in, since its release dates add a number format.
+    Sheets whose hash is in skip_hashes are left empty.
+    """
+    collection = _worker_state["collection"]
+    references = _worker_state["references"]
+    workbook = openpyxl.Workbook(write_only=HAS_LXML)
+    all_sets_sheet = workbook.create_sheet()
+    style_all_sets(all_sets_sheet)
+    create_all_sets(all_sets_sheet, collection.oracle.index, _worker_state["included_sets"])
+    style_all_cards(workbook.create_sheet("All Cards"))
+    sheet_hashes = {}
+    for setcode in setcodes:
+        rows = set_sheet_rows(collection, setcode, references)
+        sheet_hash = set_sheet_hash(rows)
+        sheet_hashes[setcode.upper()] = sheet_hash
+        if skip_hashes.get(setcode.upper()) == sheet_hash:
+            rows = []
+        set_sheet = workbook.create_sheet()
+        style_set_sheet(set_sheet)
+        create_set_sheet(set_sheet, collection, setcode, rows=rows)
+    if not HAS_LXML:
+        del workbook["Sheet"]
+    workbook.save(str(path))
+    return sheet_hashes
+
+
+@contextlib.contextmanager
+def rendering_set_sheets(
+    collection: MagicCollection,
+    included_sets: Optional[Set[str]],
+    setcodes: Sequence[str],
+    skip_hashes: Dict[str, str],
+    jobs: int,
+) -> Iterator[Callable[[], HashedParts]]:
+    """Start rendering set sheets in worker processes, yielding a function that waits for them.
+
+    Sheets are dealt round-robin into one standalone xlsx file per worker, so the cost of
+    saving a workbook is paid once per worker rather than once per sheet, and the caller
+    can write the summary sheets in the meantime. The files are removed on exit. With a
+    single job nothing is rendered.
+    """
+    if jobs <= 1:
+        yield dict
+        return
+    with tempfile.TemporaryDirectory(prefix="mtg_ssm_sheets") as temp_dir, pools.process_pool(
+        jobs, _init_set_sheet_worker, (collection, included_sets)
+    ) as executor:
+        chunk_paths = [Path(temp_dir) / f"sheets{i}.xlsx" for i in range(jobs)]
+        chunks = [setcodes[i::jobs] for i in range(jobs)]
+        chunk_hashes = executor.map(
+            _worker_render_set_sheets, chunk_paths, chunks, itertools.repeat(skip_hashes)
+        )
+
+        def rendered() -> HashedParts:
+            title_to_rendered = {}
+            for chunk_path, sheet_hashes in zip(chunk_paths, chunk_hashes):
+                with zipfile.ZipFile(chunk_path) as chunk_zip:
+                    title_to_part = dict(sheet_parts(chunk_zip))
+                for title, sheet_hash in sheet_hashes.items():
+                    title_to_rendered[title] = (sheet_hash, (chunk_path, title_to_part[title]))
+            return title_to_rendered
+
+        yield rendered
+
+
 class XlsxDialect(interface.SerializationDialect):
     """excel xlsx collection."""
 
     extension: ClassVar[str] = "xlsx"
     dialect: ClassVar[str] = "xlsx"
 
+    sparse: ClassVar[bool] = False
+
     def write(self, path: Path, collection: MagicCollection) -> None:
-        """Write collection to an xlsx file."""
+        """Write collection to an xlsx file.
+
+        With more than one job, set sheets are rendered in worker processes and their parts
+        copied into the workbook, giving the same sheets as a serial write.
+        """
+        self._write(path, collection, {})
+
+    def update(self, path: Path, collection: MagicCollection, previous_path: Path) -> None:
+        """Write collection to an xlsx file, copying unchanged set sheets from a previous file.
+
+        Set sheet content hashes are stored in the workbook's custom properties. Sheets whose
+        content is unchanged are written as placeholders and then replaced with the previous
+        file's sheet parts byte-for-byte. Anything that would make the previous parts
+        inconsistent with the new file (e.g. the file was re-saved by Excel, changing its
+        styles or shared strings) results in a full write instead.
+        """
+        previous_hashes, previous_parts = reusable_sheet_parts(previous_path)
+        reusable = {
+            title: (previous_hashes[title], (previous_path, part))
+            for title, part in previous_parts.items()
+        }
+        reused = self._write(path, collection, reusable)
+        if reused:
+            print(f"Reusing {len(reused)} unchanged set sheets from {previous_path}")
+
+    def _write(self, path: Path, collection: MagicCollection, reusable: HashedParts) -> Set[str]:
+        """Write collection to an xlsx file, copying in reusable set sheets whose hash matches.
+
+        Returns the titles of the reused sheets.
+        """
+        index = collection.oracle.index
+        included_sets = None
+        if self.sparse:
+            included_sets = {index.id_to_card[card_id].set for card_id in collection.counts}
+        setcodes = [
+            s.code
+            for s in sorted(index.setcode_to_set.values(), key=_card_set_sort_key)
+            if included_sets is None or s.code in included_sets
+        ]
+        reusable_hashes = {title: sheet_hash for title, (sheet_hash, _) in reusable.items()}
+        jobs = min(self.jobs, len(setcodes))
+        with rendering_set_sheets(
+            collection, included_sets, setcodes, reusable_hashes, jobs
+        ) as rendered:
+            sheet_sources = self._write_workbook(
+                path, collection, included_sets, setcodes, reusable, rendered
+            )
+            if sheet_sources and not _replace_sheet_parts(path, sheet_sources):
+                print("Styles of copied set sheets do not match, rewriting all sheets")
+                self._write_workbook(path, collection, included_sets, setcodes, {}, dict)
+                return set()
+        return {
+            title for title, (_, source) in reusable.items() if sheet_sources.get(title) == source
+        }
+
+    def _write_workbook(
+        self,
+        path: Path,
+        collection: MagicCollection,
+        included_sets: Optional[Set[str]],
+        setcodes: Sequence[str],
+        reusable: HashedParts,
+        rendered: Callable[[], HashedParts],
+    ) -> Dict[str, PartSource]:
+        """Write an xlsx file, with placeholders for set sheets that are rendered elsewhere.
+
+        Set sheets are only waited for once the summary sheets are written. Returns where
+        to copy each placeholder sheet's part from.
+        """
         workbook = openpyxl.Workbook(write_only=HAS_LXML)
+        index = collection.oracle.index
+        references = References(index, included_sets)
 
         all_sets_sheet = workbook.create_sheet()
         style_all_sets(all_sets_sheet)
-        create_all_sets(all_sets_sheet, collection.oracle.index)
+        create_all_sets(all_sets_sheet, index, included_sets)
 
         all_cards_sheet = workbook.create_sheet()
         style_all_cards(all_cards_sheet)
-        create_all_cards(all_cards_sheet, collection.oracle.index)
-
-        setcodes = [
-            s.code
-            for s in sorted(
-                collection.oracle.index.setcode_to_set.values(),
-                key=_card_set_sort_key,
-            )
-        ]
+        create_all_cards(all_cards_sheet, index, references)
 
+        title_to_rendered = rendered()
+        sheet_sources = {}
         for setcode in setcodes:
+            title = setcode.upper()
+            rows: List[List[Optional[Any]]] = []
+            if title in title_to_rendered:
+                sheet_hash, sheet_sources[title] = title_to_rendered[title]
+            else:
+                rows = set_sheet_rows(collection, setcode, references)
+                sheet_hash = set_sheet_hash(rows)
+            workbook.custom_doc_props.append(  # type: ignore[attr-defined]
+                StringProperty(name=SHEET_HASH_PROPERTY_PREFIX + title, value=sheet_hash)
+            )
+            if title in reusable and reusable[title][0] == sheet_hash:
+                sheet_sources[title] = reusable[title][1]
             set_sheet = workbook.create_sheet()
             style_set_sheet(set_sheet)
-            create_set_sheet(set_sheet, collection, setcode)
+            create_set_sheet(
+                set_sheet, collection, setcode, rows=[] if title in sheet_sources else rows
+            )
 
         if not HAS_LXML:
             # write_only mode does no create a default sheet but read/write mode does
@@ -329,10 +810,27 @@ class XlsxDialect(interface.SerializationDialect):
             # default sheet
             del workbook["Sheet"]
         workbook.save(str(path))
+        return sheet_sources
 
     def read(self, path: Path, oracle: Oracle) -> MagicCollection:
         """Read collection from an xlsx file."""
-        workbook = openpyxl.load_workbook(filename=str(path), read_only=True)
-        reader = rows_for_workbook(workbook, skip_sheets={"All Sets", "All Cards"})
-        card_counts = counts.aggregate_card_counts(reader, oracle)
+        skip_sheets = {"All Sets", "All Cards"}
+        try:
+            card_counts = counts.aggregate_card_counts(
+                rows_for_xlsx_file(path, skip_sheets=skip_sheets), oracle
+            )
+        except (KeyError, IndexError, ValueError, ParseError):
+            # Workbook layout not understood by the direct reader (e.g. strict OOXML,
+            # dangling shared string references or markup rejected by defusedxml)
+            workbook = openpyxl.load_workbook(filename=str(path), read_only=True)
+            reader = rows_for_workbook(workbook, skip_sheets=skip_sheets)
+            card_counts = counts.aggregate_card_counts(reader, oracle)
         return MagicCollection(oracle=oracle, counts=card_counts)
+
+
+class XlsxSparseDialect(XlsxDialect):
+    """excel xlsx collection with sheets only for sets that have cards in the collection."""
+
+    dialect: ClassVar[str] = "sparse"
+
+    sparse: ClassVar[bool] = True
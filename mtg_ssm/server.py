@@ -0,0 +1,246 @@
+"""Local server running collection operations against warm card data."""
+
+import datetime as dt
+import hmac
+import http
+import http.server
+import shlex
+import socketserver
+import threading
+import urllib.parse
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Protocol, Tuple, Union
+
+import msgspec
+
+from mtg_ssm.containers.indexes import Oracle
+from mtg_ssm.scryfall import fetcher
+from mtg_ssm.scryfall.models import ScryBulkData
+
+# Host header names accepted by TCP servers, rejecting DNS rebinding to other names
+LOCAL_HOSTNAMES = frozenset({"localhost", "127.0.0.1", "::1"})
+
+
+class OperationResult(Protocol):
+    """Result of running an operation."""
+
+    @property
+    def error(self) -> Optional[str]:
+        """Error message if the operation failed."""
+
+    def _asdict(self) -> Dict[str, Any]: ...
+
+
+# Run an operation command line with a dialect mapping against an oracle
+OperationRunner = Callable[[List[str], Dict[str, str], Oracle], OperationResult]
+
+
+class WarmOracle(NamedTuple):
+    """An oracle and the bulk data update time it was built from."""
+
+    oracle: Oracle
+    bulk_updated_at: Optional[dt.datetime]
+
+
+class OracleHolder:
+    """Holder for the current oracle, swapped atomically when card data is refreshed.
+
+    Operations should read `current` once and use that oracle throughout, so that a
+    concurrent refresh never mixes card data between versions.
+    """
+
+    def __init__(self, current: WarmOracle) -> None:
+        self.current = current
+
+    def refresh(self, load: Callable[[ScryBulkData], Oracle]) -> bool:
+        """Rebuild and swap in the oracle if Scryfall bulk data has been updated."""
+        bulk_data = fetcher.fetch_bulk_data(refresh=True)
+        if bulk_data.updated_at == self.current.bulk_updated_at:
+            return False
+        self.current = WarmOracle(load(bulk_data), bulk_data.updated_at)
+        return True
+
+
+def refresh_loop(
+    holder: OracleHolder,
+    load: Callable[[ScryBulkData], Oracle],
+    interval: float,
+    stop: threading.Event,
+) -> None:
+    """Periodically refresh the held oracle until stopped."""
+    while not stop.wait(interval):
+        try:
+            if holder.refresh(load):
+                print(f"Refreshed card data: {holder.current.bulk_updated_at}")
+        except Exception as err:  # noqa: BLE001
+            print(f"Card data refresh failed: {err}")
+
+
+class RunRequest(msgspec.Struct):
+    """Request body for running an operation."""
+
+    command: Union[str, List[str]]
+    dialect: Dict[str, str] = {}
+
+
+class OperationRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Handle status and operation requests.
+
+    GET /status reports the loaded card data. POST /run runs an operation from a JSON
+    body of {"command": ..., "dialect": {...}} and returns its result.
+
+    TCP servers only accept requests addressed to a local host name. Servers with a
+    token require it as an "Authorization: Bearer <token>" header.
+    """
+
+    server: "OperationServerMixin"
+
+    def address_string(self) -> str:
+        """Client address for logging; unix socket clients have none."""
+        if isinstance(self.client_address, tuple):
+            return str(self.client_address[0])
+        return "local"
+
+    def _send_json(self, status: http.HTTPStatus, body: Any) -> None:
+        content = msgspec.json.encode(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _check_access(self) -> bool:
+        """Check the request's host and token, sending an error response if denied."""
+        if self.server.check_host:
+            host = self.headers.get("Host") or ""
+            if urllib.parse.urlsplit(f"//{host}").hostname not in LOCAL_HOSTNAMES:
+                self._send_json(http.HTTPStatus.FORBIDDEN, {"error": f"Invalid host: {host}"})
+                return False
+        if self.server.token is not None:
+            authorization = self.headers.get("Authorization") or ""
+            if not hmac.compare_digest(authorization, f"Bearer {self.server.token}"):
+                self._send_json(http.HTTPStatus.UNAUTHORIZED, {"error": "Invalid token"})
+                return False
+        return True
+
+    def do_GET(self) -> None:
+        """Report the status of the loaded card data."""
+        if not self._check_access():
+            return
+        if self.path != "/status":
+            self._send_json(http.HTTPStatus.NOT_FOUND, {"error": f"Not found: {self.path}"})
+            return
+        current = self.server.holder.current
+        self._send_json(
+            http.HTTPStatus.OK,
+            {
+                "bulk_updated_at": current.bulk_updated_at,
+                "cards": len(current.oracle.index.id_to_card),
+            },
+        )
+
+    def do_POST(self) -> None:
+        """Run an operation against the current oracle."""
+        if not self._check_access():
+            return
+        if self.path != "/run":
+            self._send_json(http.HTTPStatus.NOT_FOUND, {"error": f"Not found: {self.path}"})
+            return
+        if self.headers.get_content_type() != "application/json":
+            self._send_json(
+                http.HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+                {"error": "Content-Type must be application/json"},
+            )
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = msgspec.json.decode(self.rfile.read(length), type=RunRequest)
+            command = request.command
+            if isinstance(command, str):
+                command = shlex.split(command)
+        except (ValueError, msgspec.DecodeError) as err:
+            self._send_json(http.HTTPStatus.BAD_REQUEST, {"error": str(err)})
+            return
+        dialect = {**self.server.dialect, **request.dialect}
+        result = self.server.run(command, dialect, self.server.holder.current.oracle)
+        status = (
+            http.HTTPStatus.OK if result.error is None else http.HTTPStatus.UNPROCESSABLE_ENTITY
+        )
+        self._send_json(status, result._asdict())
+
+
+class OperationServerMixin(socketserver.BaseServer):
+    """Shared state for operation servers."""
+
+    holder: OracleHolder
+    run: OperationRunner
+    dialect: Dict[str, str]
+    token: Optional[str]
+    # Whether to reject requests whose Host header is not a local host name
+    check_host: bool = False
+
+    def setup_operations(
+        self,
+        holder: OracleHolder,
+        run: OperationRunner,
+        dialect: Dict[str, str],
+        token: Optional[str],
+    ) -> None:
+        """Attach the oracle holder, operation runner, default dialect mapping and token."""
+        self.holder = holder
+        self.run = run
+        self.dialect = dialect
+        self.token = token
+
+
+class OperationHTTPServer(OperationServerMixin, http.server.ThreadingHTTPServer):
+    """Threaded HTTP operation server on a TCP address."""
+
+    check_host = True
+
+
+class OperationUnixServer(
+    OperationServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+):
+    """Threaded HTTP operation server on a unix socket, removed when the server closes."""
+
+    daemon_threads = True
+
+    def __init__(
+        self, path: Path, handler_class: Callable[..., socketserver.BaseRequestHandler]
+    ) -> None:
+        self.path = path
+        super().__init__(str(path), handler_class)
+
+    def server_close(self) -> None:
+        """Close the server and remove its socket file."""
+        super().server_close()
+        self.path.unlink(missing_ok=True)
+
+
+def make_server(
+    address: Union[Path, Tuple[str, int]],
+    holder: OracleHolder,
+    run: OperationRunner,
+    dialect: Dict[str, str],
+    token: Optional[str] = None,
+) -> socketserver.BaseServer:
+    """Create an operation server on a unix socket path or a (host, port) address.
+
+    Unix sockets are only accessible to the current user; a stale socket left at the
+    path is replaced, but any other existing file is an error. If token is given,
+    requests must present it.
+    """
+    server: Union[OperationHTTPServer, OperationUnixServer]
+    if isinstance(address, Path):
+        if address.is_socket():
+            address.unlink()
+        elif address.exists():
+            msg = f"Not replacing existing file with a unix socket: {address}"
+            raise FileExistsError(msg)
+        server = OperationUnixServer(address, OperationRequestHandler)
+        address.chmod(0o600)
+    else:
+        server = OperationHTTPServer(address, OperationRequestHandler)
+    server.setup_operations(holder, run, dialect, token)
+    return server
@@ -2,17 +2,56 @@
 """Script for managing magic card spreadsheets."""
 
 import argparse
+import concurrent.futures
+import contextlib
 import datetime as dt
+import itertools
+import secrets
+import shlex
+import threading
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    List,
+    NamedTuple,
+    NoReturn,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+)
+
+import msgspec
 
 import mtg_ssm
 import mtg_ssm.serialization.interface as ser_interface
-from mtg_ssm.containers import bundles
+from mtg_ssm import pools, profiling
+from mtg_ssm.containers import bundles, snapshot
 from mtg_ssm.containers.collection import MagicCollection
+from mtg_ssm.containers.counts import CardCounts, SparseCounts
 from mtg_ssm.containers.indexes import Oracle
 from mtg_ssm.scryfall import fetcher
-from mtg_ssm.scryfall.models import ScryCardLayout, ScrySetType
+from mtg_ssm.scryfall.models import ScryBulkData, ScryCardCore, ScryCardLayout, ScrySetType
+
+
+class Error(Exception):
+    """Base error for ssm commands."""
+
+
+class OperationError(Error):
+    """Raised when a batch operation command line cannot be parsed."""
+
+
+class BatchResult(NamedTuple):
+    """Outcome of a single batch operation."""
+
+    command: str
+    seconds: float
+    error: Optional[str]
 
 
 def epilog() -> str:
@@ -54,6 +93,126 @@ def card_layout_list(value: str) -> Set[ScryCardLayout]:
     return card_layouts
 
 
+def output_path(value: str) -> Path:
+    """Argparse type to convert a string to a path that a collection can be written to."""
+    path = Path(value)
+    if path == ser_interface.STDIO_PATH:
+        msg = f'collections cannot be written to standard output ("{value}")'
+        raise argparse.ArgumentTypeError(msg)
+    return path
+
+
+def add_commands(parser: argparse.ArgumentParser) -> Any:
+    """Add collection command subparsers to a parser, returning the subparsers action."""
+    subparsers = parser.add_subparsers(dest="action", title="actions")
+    subparsers.required = True
+    # command parsers only offer -h/--help when the parent parser does
+    add_help = parser.add_help
+
+    create = subparsers.add_parser(
+        "create",
+        aliases=["c"],
+        add_help=add_help,
+        help="Create a new, empty collection spreadsheet",
+    )
+    create.set_defaults(func=create_cmd)
+    create.add_argument("collection", type=output_path, help="Filename for the new collection")
+    create.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes for writing xlsx set sheets in parallel",
+    )
+
+    update = subparsers.add_parser(
+        "update",
+        aliases=["u"],
+        add_help=add_help,
+        help="Update cards in a collection spreadsheet, preserving counts",
+    )
+    update.set_defaults(func=update_cmd)
+    update.add_argument(
+        "collection", type=output_path, help="Filename for the collection to update"
+    )
+    update.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes for writing xlsx set sheets in parallel",
+    )
+
+    merge = subparsers.add_parser(
+        "merge",
+        aliases=["m"],
+        add_help=add_help,
+        help="Merge one or more collection spreadsheets into another. May also be used for format conversions.",
+    )
+    merge.set_defaults(func=merge_cmd)
+    merge.add_argument("collection", type=output_path, help="Filename for the target collection")
+    merge.add_argument(
+        "imports",
+        nargs="+",
+        type=Path,
+        help='Filename(s) for collection(s) to import/merge counts from ("-" reads csv from stdin)',
+    )
+    merge.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes for reading imports and writing xlsx set sheets",
+    )
+
+    diff = subparsers.add_parser(
+        "diff",
+        aliases=["d"],
+        add_help=add_help,
+        help="Create a collection from the differences between two other collections",
+    )
+    diff.set_defaults(func=diff_cmd)
+    diff.add_argument(
+        "left",
+        type=Path,
+        help="Filename for first collection to diff (positive counts)",
+    )
+    diff.add_argument(
+        "right",
+        type=Path,
+        help="Filename for second collection to diff (negative counts)",
+    )
+    diff.add_argument("output", type=output_path, help="Filename for result collection of diff")
+    diff.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes for reading both collections and writing xlsx set sheets",
+    )
+
+    return subparsers
+
+
+class OperationParser(argparse.ArgumentParser):
+    """Argument parser for batch operations that raises instead of exiting on errors."""
+
+    def error(self, message: str) -> NoReturn:
+        """Raise an error for an invalid operation command line."""
+        raise OperationError(message)
+
+    def exit(self, status: int = 0, message: Optional[str] = None) -> NoReturn:
+        """Raise an error instead of exiting the batch or server process."""
+        raise OperationError(message or f"Operation parser exited with status {status}")
+
+
+def get_operation_parser() -> argparse.ArgumentParser:
+    """Get a parser for the command line of a single batch operation."""
+    parser = OperationParser(prog="mtg-ssm batch", add_help=False)
+    add_commands(parser)
+    return parser
+
+
 def get_args(args: Optional[List[str]] = None) -> argparse.Namespace:
     """Parse and return application arguments."""
     parser = argparse.ArgumentParser(
@@ -111,6 +270,13 @@ def get_args(args: Optional[List[str]] = None) -> argparse.Namespace:
         + ", ".join(ScryCardLayout),
     )
 
+    parser.add_argument(
+        "--fetch-workers",
+        type=int,
+        default=fetcher.FETCH_WORKERS,
+        help="Number of concurrent Scryfall requests when downloading card data",
+    )
+
     parser.add_argument(
         "-d",
         "--dialect",
@@ -122,55 +288,60 @@ def get_args(args: Optional[List[str]] = None) -> argparse.Namespace:
         "May be repeated for multiple different extensions.",
     )
 
-    # Commands
-    subparsers = parser.add_subparsers(dest="action", title="actions")
-    subparsers.required = True
+    subparsers = add_commands(parser)
 
-    create = subparsers.add_parser(
-        "create", aliases=["c"], help="Create a new, empty collection spreadsheet"
+    batch = subparsers.add_parser(
+        "batch",
+        aliases=["b"],
+        help="Run create/update/merge/diff operations from a manifest, loading card data once",
     )
-    create.set_defaults(func=create_cmd)
-    create.add_argument("collection", type=Path, help="Filename for the new collection")
-
-    update = subparsers.add_parser(
-        "update",
-        aliases=["u"],
-        help="Update cards in a collection spreadsheet, preserving counts",
+    batch.set_defaults(func=batch_cmd)
+    batch.add_argument(
+        "manifest",
+        type=Path,
+        help="JSON list of operations or file with one operation command line per line",
+    )
+    batch.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes for running operations in parallel",
     )
-    update.set_defaults(func=update_cmd)
-    update.add_argument("collection", type=Path, help="Filename for the collection to update")
 
-    merge = subparsers.add_parser(
-        "merge",
-        aliases=["m"],
-        help="Merge one or more collection spreadsheets into another. May also be used for format conversions.",
+    serve = subparsers.add_parser(
+        "serve",
+        help="Run a local server for create/update/merge/diff operations on warm card data",
     )
-    merge.set_defaults(func=merge_cmd)
-    merge.add_argument("collection", type=Path, help="Filename for the target collection")
-    merge.add_argument(
-        "imports",
-        nargs="+",
-        type=Path,
-        help="Filename(s) for collection(s) to import/merge counts from",
+    serve.set_defaults(func=serve_cmd)
+    listen = serve.add_mutually_exclusive_group()
+    listen.add_argument(
+        "--port", type=int, default=8080, help="Port to listen on for HTTP on localhost"
+    )
+    listen.add_argument("--socket", type=Path, help="Unix socket path to listen on instead")
+    serve.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=3600.0,
+        help="Seconds between checks for updated Scryfall card data",
     )
 
-    diff = subparsers.add_parser(
-        "diff",
-        aliases=["d"],
-        help="Create a collection from the differences between two other collections",
+    parser.add_argument(
+        "--timings",
+        default=False,
+        action="store_true",
+        help="Print wall time, cpu time and peak memory for each pipeline stage",
     )
-    diff.set_defaults(func=diff_cmd)
-    diff.add_argument(
-        "left",
+    parser.add_argument(
+        "--timings-json",
         type=Path,
-        help="Filename for first collection to diff (positive counts)",
+        help="Write a JSON report of pipeline stage timings to a file",
     )
-    diff.add_argument(
-        "right",
+    parser.add_argument(
+        "--profile",
         type=Path,
-        help="Filename for second collection to diff (negative counts)",
+        help="Profile the run with cProfile, writing pstats data to a file",
     )
-    diff.add_argument("output", type=Path, help="Filename for result collection of diff")
 
     parsed_args = parser.parse_args(args=args)
     parsed_args.dialect = dict(parsed_args.dialect)
@@ -184,29 +355,76 @@ def get_oracle(
     include_digital: bool,
     include_foreign_only: bool,
     separate_promos: bool,
+    fetch_workers: int = fetcher.FETCH_WORKERS,
+    bulk_data: Optional[ScryBulkData] = None,
 ) -> Oracle:
-    """Get a card_db with current mtgjson data."""
-    scrydata = fetcher.scryfetch()
-    scrydata = bundles.filter_cards_and_sets(
-        scrydata,
+    """Get a card_db with current mtgjson data.
+
+    Filtered and indexed data is snapshotted to the cache directory and reused for as
+    long as the Scryfall bulk data has not been updated.
+    """
+    if bulk_data is None:
+        with profiling.stage("fetch"):
+            bulk_data = fetcher.fetch_bulk_data()
+    oracle_path = snapshot.snapshot_path(
+        Path(fetcher.CACHE_DIR),
+        bulk_updated_at=bulk_data.updated_at,
         exclude_set_types=exclude_set_types,
         exclude_card_layouts=exclude_card_layouts,
         exclude_digital=not include_digital,
         exclude_foreing_only=not include_foreign_only,
         merge_promos=not separate_promos,
     )
-    return Oracle(scrydata)
+    with profiling.stage("snapshot_load"):
+        oracle = snapshot.load_oracle(oracle_path)
+    if oracle is not None:
+        print(f"Loaded card data snapshot: {oracle_path}")
+        return oracle
+
+    with profiling.stage("fetch"):
+        scrystream = fetcher.scryfetch_stream(
+            bulk_data, card_type=ScryCardCore, max_workers=fetch_workers
+        )
+    # cards are decoded lazily as they are filtered
+    with profiling.stage("decode_filter"):
+        scrydata = bundles.filter_cards_and_sets(
+            scrystream,
+            exclude_set_types=exclude_set_types,
+            exclude_card_layouts=exclude_card_layouts,
+            exclude_digital=not include_digital,
+            exclude_foreing_only=not include_foreign_only,
+            merge_promos=not separate_promos,
+        )
+    with profiling.stage("index"):
+        oracle = Oracle(scrydata, bulk_data.updated_at)
+    print(f"Saving card data snapshot: {oracle_path}")
+    with profiling.stage("snapshot_save"):
+        snapshot.save_oracle(oracle_path, oracle)
+    return oracle
 
 
 def get_serializer(
-    dialect_mapping: Dict[str, str], path: Path
+    dialect_mapping: Dict[str, str], path: Path, *, jobs: int = 1
 ) -> ser_interface.SerializationDialect:
-    """Retrieve a serializer compatible with a given filename."""
-    extension = path.suffix.lstrip(".")
+    """Retrieve a serializer compatible with a given filename.
+
+    Standard input ("-") is read as csv. jobs is the number of worker processes the
+    serializer may use for writing.
+    """
+    streamed = (
+        path == ser_interface.STDIO_PATH or path.suffix in ser_interface.COMPRESSION_SUFFIXES
+    )
+    if path == ser_interface.STDIO_PATH:
+        extension = "csv"
+    else:
+        extension = ser_interface.strip_compression(path).suffix.lstrip(".")
     serialization_class = ser_interface.SerializationDialect.by_extension(
         extension, dialect_mapping
     )
-    return serialization_class()
+    if streamed and not serialization_class.streaming:
+        msg = f'Dialect for "{extension}" cannot use standard streams or compressed files'
+        raise ser_interface.UnknownDialectError(msg)
+    return serialization_class(jobs=jobs)
 
 
 def get_backup_path(path: Path) -> Path:
@@ -224,71 +442,270 @@ def write_file(
     serializer: ser_interface.SerializationDialect,
     collection: MagicCollection,
     path: Path,
+    *,
+    incremental: bool = False,
 ) -> None:
-    """Write print counts to a file, backing up existing target files."""
+    """Write print counts to a file, backing up existing target files.
+
+    If incremental, unchanged content may be reused from the existing target file.
+    """
     temp_path = get_temp_path(path)
     print(f"Writing to temporary file: {temp_path}")
-    serializer.write(temp_path, collection)
-    if path.exists():
-        backup_path = get_backup_path(path)
-        print(f"Backing up existing file to: {backup_path}")
-        path.replace(backup_path)
-    print(f"Writing collection: {path}")
-    temp_path.replace(path)
+    with profiling.stage("write"):
+        if incremental and path.exists():
+            serializer.update(temp_path, collection, path)
+        else:
+            serializer.write(temp_path, collection)
+    with profiling.stage("rename"):
+        if path.exists():
+            backup_path = get_backup_path(path)
+            print(f"Backing up existing file to: {backup_path}")
+            path.replace(backup_path)
+        print(f"Writing collection: {path}")
+        temp_path.replace(path)
 
 
 def create_cmd(args: argparse.Namespace, oracle: Oracle) -> None:
     """Create a new, empty collection."""
     collection = MagicCollection(oracle=oracle, counts={})
-    serializer = get_serializer(args.dialect, args.collection)
+    serializer = get_serializer(args.dialect, args.collection, jobs=args.jobs)
     write_file(serializer, collection, args.collection)
 
 
 def update_cmd(args: argparse.Namespace, oracle: Oracle) -> None:
     """Update an existing collection, preserving counts."""
-    serializer = get_serializer(args.dialect, args.collection)
+    serializer = get_serializer(args.dialect, args.collection, jobs=args.jobs)
     print(f"Reading counts from {args.collection}")
-    collection = serializer.read(args.collection, oracle)
-    write_file(serializer, collection, args.collection)
+    with profiling.stage("read"):
+        collection = serializer.read(args.collection, oracle)
+    write_file(serializer, collection, args.collection, incremental=True)
 
 
 def merge_cmd(args: argparse.Namespace, oracle: Oracle) -> None:
     """Merge counts from one or more inputs into a new/existing collection."""
-    coll_serializer = get_serializer(args.dialect, args.collection)
-    collection = MagicCollection(oracle=oracle, counts={})
+    coll_serializer = get_serializer(args.dialect, args.collection, jobs=args.jobs)
+    # every input is folded into a single accumulator in place
+    merged_counts = CardCounts(oracle.index)
     if args.collection.exists():
         print(f"Reading counts from {args.collection}")
-        collection = coll_serializer.read(args.collection, oracle)
-    for import_path in args.imports:
-        input_serializer = get_serializer(args.dialect, import_path)
-        print(f"Merging counts from {import_path}")
-        collection += input_serializer.read(import_path, oracle)
+        with profiling.stage("read"):
+            merged_counts = coll_serializer.read(args.collection, oracle).card_counts
+    # closing shuts down any reader processes before the (possibly long) write
+    with contextlib.closing(
+        read_counts(args.imports, args.dialect, oracle, args.jobs)
+    ) as import_counts:
+        for import_path in args.imports:
+            print(f"Merging counts from {import_path}")
+            with profiling.stage("read"):
+                sparse_counts = next(import_counts)
+            with profiling.stage("merge"):
+                merged_counts.accumulate_sparse(sparse_counts)
+    collection = MagicCollection(oracle=oracle, counts=merged_counts)
     write_file(coll_serializer, collection, args.collection)
 
 
 def diff_cmd(args: argparse.Namespace, oracle: Oracle) -> None:
     """Diff two collections, putting the output in a third."""
-    left_serializer = get_serializer(args.dialect, args.left)
-    right_serializer = get_serializer(args.dialect, args.right)
-    output_serializer = get_serializer(args.dialect, args.output)
+    output_serializer = get_serializer(args.dialect, args.output, jobs=args.jobs)
     print(f"Diffing counts between {args.left} and {args.right}")
-    diff_collection = left_serializer.read(args.left, oracle) - right_serializer.read(
-        args.right, oracle
-    )
+    with profiling.stage("read"):
+        left_counts, right_counts = read_counts(
+            [args.left, args.right], args.dialect, oracle, args.jobs
+        )
+    with profiling.stage("diff"):
+        diff_counts = CardCounts(oracle.index)
+        diff_counts.accumulate_sparse(left_counts)
+        diff_counts.accumulate_sparse(right_counts, -1)
+        diff_collection = MagicCollection(oracle=oracle, counts=diff_counts)
     write_file(output_serializer, diff_collection, args.output)
 
 
+def read_manifest(path: Path) -> List[List[str]]:
+    """Read operation command lines from a batch manifest.
+
+    JSON manifests (.json) contain a list of operations, each either a command line
+    string or a list of arguments. Other manifests have one command line per line,
+    with blank lines and # comments ignored.
+    """
+    if path.suffix == ".json":
+        operations = msgspec.json.decode(path.read_bytes(), type=List[Union[str, List[str]]])
+        return [shlex.split(op) if isinstance(op, str) else op for op in operations]
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return [command for command in (shlex.split(line, comments=True) for line in lines) if command]
+
+
+def run_operation(command: List[str], dialect: Dict[str, str], oracle: Oracle) -> BatchResult:
+    """Parse and run a single batch operation, capturing its timing and any failure."""
+    start = time.perf_counter()
+    error = None
+    try:
+        args = get_operation_parser().parse_args(command)
+        args.dialect = dialect
+        args.func(args, oracle)
+    except (Exception, SystemExit) as err:  # noqa: BLE001 - reported per operation
+        error = f"{type(err).__name__}: {err}"
+    return BatchResult(shlex.join(command), time.perf_counter() - start, error)
+
+
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_oracle_worker(oracle: Oracle) -> None:
+    """Initialize a worker process with the shared oracle."""
+    _worker_state["oracle"] = oracle
+
+
+def oracle_executor(oracle: Oracle, workers: int) -> concurrent.futures.ProcessPoolExecutor:
+    """Start a process pool whose workers share an oracle."""
+    return pools.process_pool(workers, _init_oracle_worker, (oracle,))
+
+
+def _read_sparse_counts(path: Path, dialect: Dict[str, str], oracle: Oracle) -> SparseCounts:
+    serializer = get_serializer(dialect, path)
+    return serializer.read(path, oracle).card_counts.sparse()
+
+
+def _worker_read_counts(path: Path, dialect: Dict[str, str]) -> SparseCounts:
+    """Read counts from a file in a worker process."""
+    return _read_sparse_counts(path, dialect, _worker_state["oracle"])
+
+
+def read_counts(
+    paths: Sequence[Path], dialect: Dict[str, str], oracle: Oracle, jobs: int
+) -> Generator[SparseCounts, None, None]:
+    """Read counts from each file, yielding them in order as they are needed.
+
+    With more than one job, files are read in a process pool that returns compact
+    counts rather than whole collections. Standard input is always read in this process.
+    The pool is shut down once the generator is exhausted or closed.
+    """
+    files = [path for path in paths if path != ser_interface.STDIO_PATH]
+    if jobs <= 1 or len(files) <= 1:
+        for path in paths:
+            yield _read_sparse_counts(path, dialect, oracle)
+        return
+    with oracle_executor(oracle, min(jobs, len(files))) as executor:
+        file_counts = executor.map(_worker_read_counts, files, itertools.repeat(dialect))
+        for path in paths:
+            if path == ser_interface.STDIO_PATH:
+                yield _read_sparse_counts(path, dialect, oracle)
+            else:
+                yield next(file_counts)
+
+
+def _worker_run_operation(command: List[str], dialect: Dict[str, str]) -> BatchResult:
+    """Run a batch operation in a worker process."""
+    return run_operation(command, dialect, _worker_state["oracle"])
+
+
+def batch_cmd(args: argparse.Namespace, oracle: Oracle) -> None:
+    """Run all operations from a manifest against a single oracle."""
+    commands = read_manifest(args.manifest)
+    start = time.perf_counter()
+    if args.workers > 1:
+        with oracle_executor(oracle, args.workers) as executor:
+            results = list(
+                executor.map(_worker_run_operation, commands, itertools.repeat(args.dialect))
+            )
+    else:
+        results = [run_operation(command, args.dialect, oracle) for command in commands]
+    total_seconds = time.perf_counter() - start
+
+    print("Batch results:")
+    for result in results:
+        status = "ok" if result.error is None else "FAILED"
+        print(f"  {status:<6} {result.seconds:8.2f}s  {result.command}")
+        if result.error is not None:
+            print(f"         {result.error}")
+    failures = sum(result.error is not None for result in results)
+    print(
+        f"Ran {len(results)} operations in {total_seconds:.2f}s: "
+        f"{len(results) - failures} ok, {failures} failed"
+    )
+    if failures:
+        msg = f"{failures} of {len(results)} batch operations failed"
+        raise SystemExit(msg)
+
+
+def serve_cmd(args: argparse.Namespace, oracle: Oracle) -> None:
+    """Serve operations against a warm oracle, refreshing it when card data changes."""
+    from mtg_ssm import server  # noqa: PLC0415
+
+    # the oracle's own bulk data version, so data updated since loading it is refreshed
+    holder = server.OracleHolder(server.WarmOracle(oracle, oracle.bulk_updated_at))
+    stop = threading.Event()
+    refresher = threading.Thread(
+        target=server.refresh_loop,
+        args=(
+            holder,
+            oracle_loader(args),
+            args.refresh_interval,
+            stop,
+        ),
+        daemon=True,
+    )
+    address = args.socket or ("127.0.0.1", args.port)
+    # other local users can reach a TCP port, so it requires a token; sockets are private
+    token = None if args.socket else secrets.token_urlsafe(32)
+    with server.make_server(address, holder, run_operation, args.dialect, token) as httpd:
+        refresher.start()
+        print(f"Serving operations on {address}")
+        if token is not None:
+            print(f"Authorization token: {token}")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("Shutting down")
+        finally:
+            stop.set()
+
+
+def write_timings(
+    report: profiling.TimingsReport, *, print_report: bool, path: Optional[Path]
+) -> None:
+    """Print a stage timings report and/or write it as JSON."""
+    if print_report:
+        print(profiling.format_report(report))
+    if path is not None:
+        print(f"Writing timings report: {path}")
+        path.write_bytes(msgspec.json.encode(report))
+
+
+def oracle_args(args: argparse.Namespace) -> Dict[str, Any]:
+    """Get the oracle filtering and fetching keyword arguments from parsed arguments."""
+    return {
+        "exclude_set_types": args.exclude_set_types,
+        "exclude_card_layouts": args.exclude_card_layouts,
+        "include_digital": args.include_digital,
+        "include_foreign_only": args.include_foreign_only,
+        "separate_promos": args.separate_promos,
+        "fetch_workers": args.fetch_workers,
+    }
+
+
+def oracle_loader(args: argparse.Namespace) -> Callable[[ScryBulkData], Oracle]:
+    """Get a function loading the oracle for parsed arguments from given bulk data."""
+    kwargs = oracle_args(args)
+
+    def load(bulk_data: ScryBulkData) -> Oracle:
+        return get_oracle(bulk_data=bulk_data, **kwargs)
+
+    return load
+
+
 def main() -> None:
     """Get args and run the appropriate command."""
     args = get_args()
-    oracle = get_oracle(
-        exclude_set_types=args.exclude_set_types,
-        exclude_card_layouts=args.exclude_card_layouts,
-        include_digital=args.include_digital,
-        include_foreign_only=args.include_foreign_only,
-        separate_promos=args.separate_promos,
-    )
-    args.func(args, oracle)
+    timer = profiling.StageTimer() if args.timings or args.timings_json else None
+    try:
+        with profiling.recording(timer), profiling.profiling(args.profile):
+            oracle = get_oracle(**oracle_args(args))
+            args.func(args, oracle)
+    finally:
+        if timer is not None:
+            write_timings(
+                timer.report(args.action), print_report=args.timings, path=args.timings_json
+            )
 
 
 if __name__ == "__main__":
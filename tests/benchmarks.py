@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Benchmark the collection pipeline on synthetic data and compare against baselines.
+
+Run with `python -m tests.benchmarks`. Times are normalized by a fixed calibration
+workload before comparison, so baselines stored from one machine remain meaningful on
+another; a benchmark regresses when its normalized time exceeds the baseline by more
+than the tolerance. Every time is the median of several runs, and calibration is
+measured both before and after the benchmarks, to damp noise from background load.
+"""
+
+import argparse
+import functools
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import msgspec
+
+from mtg_ssm.containers import bundles, counts
+from mtg_ssm.containers.collection import MagicCollection
+from mtg_ssm.containers.counts import CountType
+from mtg_ssm.containers.indexes import Oracle, ScryfallDataIndex
+from mtg_ssm.scryfall.models import ScryCardLayout, ScrySetType
+from mtg_ssm.serialization import interface
+from tests import synthetic_data
+
+BASELINE_FILE = Path(__file__).parent / "data" / "benchmarks.json"
+DEFAULT_SCALE = 0.25
+DEFAULT_TOLERANCE = 2.0
+DEFAULT_REPEAT = 5
+CALIBRATION_REPEAT = 9
+COLLECTION_FRACTION = 0.2
+
+# Same exclusions as the CLI defaults
+EXCLUDE_SET_TYPES = {ScrySetType.MEMORABILIA, ScrySetType.TOKEN, ScrySetType.MINIGAME}
+EXCLUDE_CARD_LAYOUTS = {
+    ScryCardLayout.ART_SERIES,
+    ScryCardLayout.DOUBLE_FACED_TOKEN,
+    ScryCardLayout.EMBLEM,
+    ScryCardLayout.TOKEN,
+}
+
+Benchmark = Callable[[], object]
+
+
+class Baseline(msgspec.Struct):
+    """Stored benchmark results."""
+
+    scale: float
+    calibration_seconds: float
+    seconds: Dict[str, float]
+
+
+def calibrate() -> float:
+    """Time a fixed pure python workload used to normalize benchmark times."""
+    rng = random.Random(0)  # noqa: S311 - deterministic data, not cryptography
+    values = [(rng.random(), str(i)) for i in range(200_000)]
+    return time_benchmark(
+        lambda: sorted({value: key for key, value in values}.items()), CALIBRATION_REPEAT
+    )
+
+
+def time_benchmark(benchmark: Benchmark, repeat: int = DEFAULT_REPEAT) -> float:
+    """Get the median wall time of several runs of a benchmark."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        benchmark()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def random_collection(oracle: Oracle, seed: int) -> MagicCollection:
+    """Build a collection with counts for a random fraction of cards."""
+    rng = random.Random(seed)  # noqa: S311 - deterministic data, not cryptography
+    card_ids = rng.sample(
+        list(oracle.index.id_to_card), round(len(oracle.index.id_to_card) * COLLECTION_FRACTION)
+    )
+    card_counts = {
+        card_id: {CountType.NONFOIL: rng.randint(1, 4), CountType.FOIL: rng.randint(0, 1)}
+        for card_id in card_ids
+    }
+    return MagicCollection(oracle=oracle, counts=card_counts)
+
+
+def benchmarks(scale: float, work_dir: Path) -> Iterator[Tuple[str, Benchmark]]:
+    """Yield named benchmarks over synthetic data of the given scale."""
+    scryfall_data = synthetic_data.generate(scale)
+
+    def filter_data() -> bundles.ScryfallDataSet:
+        return bundles.filter_cards_and_sets(
+            scryfall_data,
+            exclude_set_types=EXCLUDE_SET_TYPES,
+            exclude_card_layouts=EXCLUDE_CARD_LAYOUTS,
+            exclude_digital=True,
+            exclude_foreing_only=True,
+            merge_promos=True,
+        )
+
+    yield "filter_cards_and_sets", filter_data
+    filtered_data = filter_data()
+    yield "index_load_data", lambda: ScryfallDataIndex().load_data(filtered_data)
+
+    oracle = Oracle(filtered_data)
+    collection = random_collection(oracle, 1)
+    other = random_collection(oracle, 2)
+    rows = [
+        {"scryfall_id": str(card_id), **{ct.value: str(cnt) for ct, cnt in card_counts.items()}}
+        for card_id, card_counts in collection.counts.items()
+    ]
+    yield "aggregate_card_counts", lambda: counts.aggregate_card_counts(rows, oracle)
+    yield "merge", lambda: collection + other
+    yield "diff", lambda: collection - other
+
+    for extension, dialect, _ in interface.SerializationDialect.dialects():
+        serializer = interface.SerializationDialect.by_extension(
+            extension, {extension: dialect or extension}
+        )()
+        name = f"{extension}:{dialect}"
+        path = work_dir / f"{dialect}.{extension}"
+        yield f"write[{name}]", functools.partial(serializer.write, path, collection)
+        serializer.write(path, collection)
+        yield f"read[{name}]", functools.partial(serializer.read, path, oracle)
+
+
+def run(scale: float, only: Optional[str], repeat: int) -> Dict[str, float]:
+    """Run benchmarks, returning the median time in seconds for each."""
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, benchmark in benchmarks(scale, Path(work_dir)):
+            if only is not None and only not in name:
+                continue
+            results[name] = time_benchmark(benchmark, repeat)
+            print(f"{name:<32} {results[name]:>10.4f}s")
+    return results
+
+
+def regressions(
+    baseline: Baseline, calibration_seconds: float, seconds: Dict[str, float], tolerance: float
+) -> List[str]:
+    """List descriptions of benchmarks slower than their baseline beyond the tolerance."""
+    slow = []
+    for name, value in seconds.items():
+        if name not in baseline.seconds:
+            continue
+        ratio = (value / calibration_seconds) / (
+            baseline.seconds[name] / baseline.calibration_seconds
+        )
+        if ratio > tolerance:
+            slow.append(f"{name}: {ratio:.2f}x baseline")
+    return slow
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the benchmark suite, then save or compare against baselines."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=float, default=DEFAULT_SCALE)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--only", help="Only run benchmarks with names containing this")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save", action="store_true", help="Save results as the new baseline")
+    args = parser.parse_args(argv)
+
+    calibration_before = calibrate()
+    seconds = run(args.scale, args.only, args.repeat)
+    calibration_seconds = statistics.mean([calibration_before, calibrate()])
+    print(f"{'calibration':<32} {calibration_seconds:>10.4f}s")
+
+    if args.save:
+        if args.only is not None and args.baseline.exists():
+            # keep stored results for benchmarks that were not run
+            previous = msgspec.json.decode(args.baseline.read_bytes(), type=Baseline)
+            seconds = {**previous.seconds, **seconds}
+        baseline = Baseline(
+            args.scale,
+            round(calibration_seconds, 6),
+            {name: round(value, 6) for name, value in seconds.items()},
+        )
+        args.baseline.write_bytes(msgspec.json.format(msgspec.json.encode(baseline)) + b"\n")
+        print(f"Saved baseline: {args.baseline}")
+        return
+    baseline = msgspec.json.decode(args.baseline.read_bytes(), type=Baseline)
+    if baseline.scale != args.scale:
+        sys.exit(f"Baseline was recorded at scale {baseline.scale}, not {args.scale}")
+    slow = regressions(baseline, calibration_seconds, seconds, args.tolerance)
+    if slow:
+        sys.exit("Regressions:\n" + "\n".join(slow))
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -32,9 +32,13 @@ def _set_timezone(monkeypatch: pytest.MonkeyPatch) -> Generator[None, None, None
 
 
 @pytest.fixture(autouse=True)
-def _fetcher_disable_cache() -> Generator[None, None, None]:
+def _fetcher_disable_cache(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> Generator[None, None, None]:
     """Patch fetcher cache dirs for testing."""
-    with fetcher.SESSION.cache_disabled():
+    monkeypatch.setattr(fetcher, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(fetcher, "REQUESTS_INTERVAL_SECONDS", 0.0)
+    with fetcher.get_session().cache_disabled():
         yield
 
 
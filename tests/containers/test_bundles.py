@@ -84,3 +84,18 @@ def test_merge_promos(scryfall_data: bundles.ScryfallDataSet) -> None:
     assert (UUID("bd26b7b1-992d-4b8c-bc33-51aab5abdf98"), "rna") in card_ids_and_sets2
     # Separate promo set Plains that should not be interleaved
     assert (UUID("8004052e-cb88-4ca6-a563-5396f13f7c6d"), "prw2") in card_ids_and_sets2
+
+
+def test_filter_stream(scryfall_data: bundles.ScryfallDataSet) -> None:
+    scrystream = bundles.ScryfallDataStream(
+        sets=scryfall_data.sets,
+        cards=iter(scryfall_data.cards),
+        migrations=scryfall_data.migrations,
+    )
+    filtered_stream = bundles.filter_cards_and_sets(
+        scrystream, exclude_digital=True, exclude_foreing_only=True, merge_promos=True
+    )
+    filtered_data = bundles.filter_cards_and_sets(
+        scryfall_data, exclude_digital=True, exclude_foreing_only=True, merge_promos=True
+    )
+    assert filtered_stream == filtered_data
@@ -1,5 +1,6 @@
 """Tests for mtg_ssm.mtg.counts."""
 
+import datetime as dt
 from typing import Any, Dict, List
 from uuid import UUID
 
@@ -10,6 +11,7 @@ from mtg_ssm.containers.bundles import ScryfallDataSet
 from mtg_ssm.containers.counts import CardNotFoundError, CountType, ScryfallCardCount
 from mtg_ssm.containers.indexes import Oracle
 from mtg_ssm.containers.legacy import NoMatchError
+from mtg_ssm.scryfall.models import ScryMigration, ScryMigrationStrategy
 
 
 @pytest.fixture(scope="session")
@@ -190,9 +192,141 @@ def test_diff_card_counts(
             },
             id="migration",
         ),
+        pytest.param(
+            [{"scryfall_id": "585fa2cc-4f77-47ab-8d2c-c68258ced283", "nonfoil": "2"}],
+            {UUID("9052f5c7-ee3b-457d-97ca-ac6b4518997c"): {counts.CountType.NONFOIL: 2}},
+            id="migration text",
+        ),
+        pytest.param(
+            [{"scryfall_id": "9D26F171-5BB6-463C-8473-53B6CC27ED66", "foil": "1"}],
+            {UUID("9d26f171-5bb6-463c-8473-53b6cc27ed66"): {counts.CountType.FOIL: 1}},
+            id="uppercase text",
+        ),
     ],
 )
 def test_aggregate_card_counts(
     oracle: Oracle, card_rows: List[Dict[str, Any]], output: counts.ScryfallCardCount
 ) -> None:
     assert counts.aggregate_card_counts(card_rows, oracle) == output
+
+
+def test_card_counts_mapping(oracle: Oracle) -> None:
+    card_id = UUID("9d26f171-5bb6-463c-8473-53b6cc27ed66")
+    card_counts = counts.CardCounts(oracle.index)
+    assert card_counts == {}
+    assert len(card_counts) == 0
+    assert card_counts.get(card_id) is None
+
+    card_counts.add(card_id, CountType.FOIL, 2)
+    assert card_counts == {card_id: {CountType.FOIL: 2}}
+    assert list(card_counts) == [card_id]
+    assert len(card_counts) == 1
+    assert card_counts[card_id] == {CountType.FOIL: 2}
+
+
+def test_card_counts_unknown_card(oracle: Oracle) -> None:
+    card_counts = counts.CardCounts(oracle.index)
+    with pytest.raises(CardNotFoundError):
+        card_counts.add(UUID(int=1), CountType.FOIL, 1)
+    with pytest.raises(CardNotFoundError):
+        counts.CardCounts.from_mapping(oracle.index, {UUID(int=1): {CountType.FOIL: 1}})
+
+
+def test_card_counts_arithmetic(oracle: Oracle) -> None:
+    card_id1 = UUID("9d26f171-5bb6-463c-8473-53b6cc27ed66")
+    card_id2 = UUID("0180d9a8-992c-4d55-8ac4-33a587786993")
+    left = counts.CardCounts.from_mapping(
+        oracle.index, {card_id1: {CountType.FOIL: 1, CountType.NONFOIL: 2}}
+    )
+    right = counts.CardCounts.from_mapping(
+        oracle.index, {card_id1: {CountType.FOIL: 1}, card_id2: {CountType.NONFOIL: 3}}
+    )
+    assert left + right == {
+        card_id1: {CountType.FOIL: 2, CountType.NONFOIL: 2},
+        card_id2: {CountType.NONFOIL: 3},
+    }
+    assert left - right == {
+        card_id1: {CountType.NONFOIL: 2},
+        card_id2: {CountType.NONFOIL: -3},
+    }
+    assert left + {card_id2: {CountType.FOIL: 1}} == {
+        card_id1: {CountType.FOIL: 1, CountType.NONFOIL: 2},
+        card_id2: {CountType.FOIL: 1},
+    }
+    assert counts.CardCounts.from_mapping(oracle.index, left) is left
+
+
+def test_card_counts_accumulate(oracle: Oracle) -> None:
+    card_id1 = UUID("9d26f171-5bb6-463c-8473-53b6cc27ed66")
+    card_id2 = UUID("0180d9a8-992c-4d55-8ac4-33a587786993")
+    accumulator = counts.CardCounts(oracle.index)
+    columns = accumulator.columns
+    other = counts.CardCounts.from_mapping(
+        oracle.index, {card_id1: {CountType.FOIL: 1}, card_id2: {CountType.NONFOIL: 3}}
+    )
+    accumulator += other
+    accumulator += other
+    accumulator += {card_id1: {CountType.NONFOIL: 1}}
+    accumulator -= {card_id2: {CountType.NONFOIL: 6}}
+    assert accumulator.columns is columns
+    assert accumulator == {card_id1: {CountType.FOIL: 2, CountType.NONFOIL: 1}}
+    assert other == {card_id1: {CountType.FOIL: 1}, card_id2: {CountType.NONFOIL: 3}}
+
+
+def test_card_counts_sparse(oracle: Oracle) -> None:
+    card_id1 = UUID("9d26f171-5bb6-463c-8473-53b6cc27ed66")
+    card_id2 = UUID("0180d9a8-992c-4d55-8ac4-33a587786993")
+    card_counts = counts.CardCounts.from_mapping(
+        oracle.index, {card_id1: {CountType.FOIL: 1}, card_id2: {CountType.NONFOIL: 3}}
+    )
+    sparse = card_counts.sparse()
+    assert sorted(sparse.ordinals) == sorted(
+        oracle.index.id_to_ordinal[card_id] for card_id in (card_id1, card_id2)
+    )
+    accumulator = counts.CardCounts(oracle.index)
+    accumulator.accumulate_sparse(sparse)
+    accumulator.accumulate_sparse(sparse)
+    accumulator.accumulate_sparse(sparse, -1)
+    assert accumulator == card_counts
+
+
+@pytest.fixture(scope="module")
+def migrations_oracle(scryfall_data: ScryfallDataSet) -> Oracle:
+    """Oracle fixture with merge chain and delete migrations."""
+    card_id = UUID("9d26f171-5bb6-463c-8473-53b6cc27ed66")
+    migrations = [
+        ScryMigration(
+            id=UUID(int=day),
+            uri=f"https://api.scryfall.com/migrations/{day}",
+            performed_at=dt.date(2020, 1, day),
+            migration_strategy=strategy,
+            old_scryfall_id=old_id,
+            new_scryfall_id=new_id,
+        )
+        for day, strategy, old_id, new_id in [
+            (1, ScryMigrationStrategy.MERGE, UUID(int=1), UUID(int=2)),
+            (2, ScryMigrationStrategy.MERGE, UUID(int=2), card_id),
+            (3, ScryMigrationStrategy.DELETE, UUID(int=3), None),
+        ]
+    ]
+    return Oracle(scryfall_data._replace(migrations=migrations))
+
+
+def test_aggregate_card_counts_migrated(
+    migrations_oracle: Oracle, capsys: pytest.CaptureFixture[str]
+) -> None:
+    card_rows: List[Dict[str, Any]] = [
+        {"scryfall_id": "00000000-0000-0000-0000-000000000001", "foil": "1"},
+        {"scryfall_id": UUID(int=2), "foil": "2"},
+        {"scryfall_id": "9d26f171-5bb6-463c-8473-53b6cc27ed66", "nonfoil": "1"},
+    ]
+    assert counts.aggregate_card_counts(card_rows, migrations_oracle) == {
+        UUID("9d26f171-5bb6-463c-8473-53b6cc27ed66"): {CountType.FOIL: 3, CountType.NONFOIL: 1}
+    }
+    assert capsys.readouterr().out == "Migrated 2 of 3 rows to current scryfall ids\n"
+
+
+@pytest.mark.xfail(raises=counts.DeletedCardError, strict=True)
+def test_aggregate_card_counts_deleted(migrations_oracle: Oracle) -> None:
+    card_rows = [{"scryfall_id": "00000000-0000-0000-0000-000000000003", "foil": "1"}]
+    counts.aggregate_card_counts(card_rows, migrations_oracle)
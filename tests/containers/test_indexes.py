@@ -1,9 +1,14 @@
 """Tests for mtg_ssm.containers.indexes."""
 
+import datetime as dt
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set
 from uuid import UUID
 
+import pytest
+
 from mtg_ssm.containers.bundles import ScryfallDataSet
-from mtg_ssm.containers.indexes import ScryfallDataIndex
+from mtg_ssm.containers.indexes import ScryfallDataIndex, resolve_chains
+from mtg_ssm.scryfall.models import ScryMigration, ScryMigrationStrategy
 
 
 def test_load_data(scryfall_data: ScryfallDataSet) -> None:
@@ -88,161 +93,138 @@ def test_setcode_to_set(scryfall_data: ScryfallDataSet) -> None:
     assert index.setcode_to_set["isd"].name == "Innistrad"
 
 
-def test_snnma_to_id(scryfall_data: ScryfallDataSet) -> None:
+def test_find_ids(scryfall_data: ScryfallDataSet) -> None:
     index = ScryfallDataIndex()
     index.load_data(scryfall_data)
 
-    assert {
-        k
-        for k, v in index.snnma_to_id.items()
-        if v == {UUID("59cf0906-04fa-4b30-a7a6-3d117931154f")}
-    } == {
-        ("isd", "Abattoir Ghoul", "85", 222911, None),
-        ("isd", "Abattoir Ghoul", "85", None, None),
-        ("isd", "Abattoir Ghoul", None, 222911, None),
-        ("isd", "Abattoir Ghoul", None, None, None),
-        ("isd", "Abattoir Ghoul", "85", 222911, "Volkan Baǵa"),
-        ("isd", "Abattoir Ghoul", "85", None, "Volkan Baǵa"),
-        ("isd", "Abattoir Ghoul", None, 222911, "Volkan Baǵa"),
-        ("isd", "Abattoir Ghoul", None, None, "Volkan Baǵa"),
-        (None, "Abattoir Ghoul", "85", 222911, None),
-        (None, "Abattoir Ghoul", "85", None, None),
-        (None, "Abattoir Ghoul", None, 222911, None),
-        (None, "Abattoir Ghoul", None, None, None),
-        (None, "Abattoir Ghoul", "85", 222911, "Volkan Baǵa"),
-        (None, "Abattoir Ghoul", "85", None, "Volkan Baǵa"),
-        (None, "Abattoir Ghoul", None, 222911, "Volkan Baǵa"),
-        (None, "Abattoir Ghoul", None, None, "Volkan Baǵa"),
-    }
-
-    assert {
-        k
-        for k, v in index.snnma_to_id.items()
-        if v == {UUID("11bf83bb-c95b-4b4f-9a56-ce7a1816307a")}
-    } == {
-        ("isd", "Delver of Secrets // Insectile Aberration", "51", 226749, None),
-        ("isd", "Delver of Secrets // Insectile Aberration", "51", 226755, None),
-        ("isd", "Delver of Secrets // Insectile Aberration", "51", None, None),
-        ("isd", "Delver of Secrets // Insectile Aberration", None, 226749, None),
-        ("isd", "Delver of Secrets // Insectile Aberration", None, 226755, None),
-        ("isd", "Delver of Secrets // Insectile Aberration", None, None, None),
-        ("isd", "Delver of Secrets", "51", 226749, None),
-        ("isd", "Delver of Secrets", "51", 226755, None),
-        ("isd", "Delver of Secrets", "51", None, None),
-        ("isd", "Delver of Secrets", "51a", 226749, None),
-        ("isd", "Delver of Secrets", "51a", 226755, None),
-        ("isd", "Delver of Secrets", "51a", None, None),
-        ("isd", "Delver of Secrets", None, 226749, None),
-        ("isd", "Delver of Secrets", None, 226755, None),
-        ("isd", "Delver of Secrets", None, None, None),
-        ("isd", "Insectile Aberration", "51", 226749, None),
-        ("isd", "Insectile Aberration", "51", 226755, None),
-        ("isd", "Insectile Aberration", "51", None, None),
-        ("isd", "Insectile Aberration", "51b", 226749, None),
-        ("isd", "Insectile Aberration", "51b", 226755, None),
-        ("isd", "Insectile Aberration", "51b", None, None),
-        ("isd", "Insectile Aberration", None, 226749, None),
-        ("isd", "Insectile Aberration", None, 226755, None),
-        ("isd", "Insectile Aberration", None, None, None),
-        ("isd", "Delver of Secrets // Insectile Aberration", "51", 226749, "Nils Hamm"),
-        ("isd", "Delver of Secrets // Insectile Aberration", "51", 226755, "Nils Hamm"),
-        ("isd", "Delver of Secrets // Insectile Aberration", "51", None, "Nils Hamm"),
-        ("isd", "Delver of Secrets // Insectile Aberration", None, 226749, "Nils Hamm"),
-        ("isd", "Delver of Secrets // Insectile Aberration", None, 226755, "Nils Hamm"),
-        ("isd", "Delver of Secrets // Insectile Aberration", None, None, "Nils Hamm"),
-        ("isd", "Delver of Secrets", "51", 226749, "Nils Hamm"),
-        ("isd", "Delver of Secrets", "51", 226755, "Nils Hamm"),
-        ("isd", "Delver of Secrets", "51", None, "Nils Hamm"),
-        ("isd", "Delver of Secrets", "51a", 226749, "Nils Hamm"),
-        ("isd", "Delver of Secrets", "51a", 226755, "Nils Hamm"),
-        ("isd", "Delver of Secrets", "51a", None, "Nils Hamm"),
-        ("isd", "Delver of Secrets", None, 226749, "Nils Hamm"),
-        ("isd", "Delver of Secrets", None, 226755, "Nils Hamm"),
-        ("isd", "Delver of Secrets", None, None, "Nils Hamm"),
-        ("isd", "Insectile Aberration", "51", 226749, "Nils Hamm"),
-        ("isd", "Insectile Aberration", "51", 226755, "Nils Hamm"),
-        ("isd", "Insectile Aberration", "51", None, "Nils Hamm"),
-        ("isd", "Insectile Aberration", "51b", 226749, "Nils Hamm"),
-        ("isd", "Insectile Aberration", "51b", 226755, "Nils Hamm"),
-        ("isd", "Insectile Aberration", "51b", None, "Nils Hamm"),
-        ("isd", "Insectile Aberration", None, 226749, "Nils Hamm"),
-        ("isd", "Insectile Aberration", None, 226755, "Nils Hamm"),
-        ("isd", "Insectile Aberration", None, None, "Nils Hamm"),
-        (None, "Delver of Secrets // Insectile Aberration", "51", 226749, None),
-        (None, "Delver of Secrets // Insectile Aberration", "51", 226755, None),
-        (None, "Delver of Secrets // Insectile Aberration", "51", None, None),
-        (None, "Delver of Secrets // Insectile Aberration", None, 226749, None),
-        (None, "Delver of Secrets // Insectile Aberration", None, 226755, None),
-        (None, "Delver of Secrets // Insectile Aberration", None, None, None),
-        (None, "Delver of Secrets", "51", 226749, None),
-        (None, "Delver of Secrets", "51", 226755, None),
-        (None, "Delver of Secrets", "51", None, None),
-        (None, "Delver of Secrets", "51a", 226749, None),
-        (None, "Delver of Secrets", "51a", 226755, None),
-        (None, "Delver of Secrets", "51a", None, None),
-        (None, "Delver of Secrets", None, 226749, None),
-        (None, "Delver of Secrets", None, 226755, None),
-        (None, "Delver of Secrets", None, None, None),
-        (None, "Insectile Aberration", "51", 226749, None),
-        (None, "Insectile Aberration", "51", 226755, None),
-        (None, "Insectile Aberration", "51", None, None),
-        (None, "Insectile Aberration", "51b", 226749, None),
-        (None, "Insectile Aberration", "51b", 226755, None),
-        (None, "Insectile Aberration", "51b", None, None),
-        (None, "Insectile Aberration", None, 226749, None),
-        (None, "Insectile Aberration", None, 226755, None),
-        (None, "Insectile Aberration", None, None, None),
-        (None, "Delver of Secrets // Insectile Aberration", "51", 226749, "Nils Hamm"),
-        (None, "Delver of Secrets // Insectile Aberration", "51", 226755, "Nils Hamm"),
-        (None, "Delver of Secrets // Insectile Aberration", "51", None, "Nils Hamm"),
-        (None, "Delver of Secrets // Insectile Aberration", None, 226749, "Nils Hamm"),
-        (None, "Delver of Secrets // Insectile Aberration", None, 226755, "Nils Hamm"),
-        (None, "Delver of Secrets // Insectile Aberration", None, None, "Nils Hamm"),
-        (None, "Delver of Secrets", "51", 226749, "Nils Hamm"),
-        (None, "Delver of Secrets", "51", 226755, "Nils Hamm"),
-        (None, "Delver of Secrets", "51", None, "Nils Hamm"),
-        (None, "Delver of Secrets", "51a", 226749, "Nils Hamm"),
-        (None, "Delver of Secrets", "51a", 226755, "Nils Hamm"),
-        (None, "Delver of Secrets", "51a", None, "Nils Hamm"),
-        (None, "Delver of Secrets", None, 226749, "Nils Hamm"),
-        (None, "Delver of Secrets", None, 226755, "Nils Hamm"),
-        (None, "Delver of Secrets", None, None, "Nils Hamm"),
-        (None, "Insectile Aberration", "51", 226749, "Nils Hamm"),
-        (None, "Insectile Aberration", "51", 226755, "Nils Hamm"),
-        (None, "Insectile Aberration", "51", None, "Nils Hamm"),
-        (None, "Insectile Aberration", "51b", 226749, "Nils Hamm"),
-        (None, "Insectile Aberration", "51b", 226755, "Nils Hamm"),
-        (None, "Insectile Aberration", "51b", None, "Nils Hamm"),
-        (None, "Insectile Aberration", None, 226749, "Nils Hamm"),
-        (None, "Insectile Aberration", None, 226755, "Nils Hamm"),
-        (None, "Insectile Aberration", None, None, "Nils Hamm"),
-    }
-
-    assert {
-        k
-        for k, v in index.snnma_to_id.items()
-        if UUID("4caaf31b-86a9-485b-8da7-d5b526ed1233") in v
-    } == {
-        ("fem", "Thallid", "74a", 1924, None),
-        ("fem", "Thallid", "74a", None, None),
-        ("fem", "Thallid", None, 1924, None),
-        ("fem", "Thallid", None, None, None),
-        ("fem", "Thallid", "74a", 1924, "Edward P. Beard, Jr."),
-        ("fem", "Thallid", "74a", None, "Edward P. Beard, Jr."),
-        ("fem", "Thallid", None, 1924, "Edward P. Beard, Jr."),
-        ("fem", "Thallid", None, None, "Edward P. Beard, Jr."),
-        (None, "Thallid", "74a", 1924, None),
-        (None, "Thallid", "74a", None, None),
-        (None, "Thallid", None, 1924, None),
-        (None, "Thallid", None, None, None),
-        (None, "Thallid", "74a", 1924, "Edward P. Beard, Jr."),
-        (None, "Thallid", "74a", None, "Edward P. Beard, Jr."),
-        (None, "Thallid", None, 1924, "Edward P. Beard, Jr."),
-        (None, "Thallid", None, None, "Edward P. Beard, Jr."),
+    abattoir_ghoul = {UUID("59cf0906-04fa-4b30-a7a6-3d117931154f")}
+    assert index.find_ids("Abattoir Ghoul") == abattoir_ghoul
+    assert (
+        index.find_ids(
+            "Abattoir Ghoul", setcode="isd", number="85", mvid=222911, artist="Volkan Baǵa"
+        )
+        == abattoir_ghoul
+    )
+    assert index.find_ids("Abattoir Ghoul", setcode="lea") == set()
+    assert index.find_ids("Abattoir Ghoul", number="86") == set()
+    assert index.find_ids("Abattoir Ghoul", mvid=1) == set()
+    assert index.find_ids("Abattoir Ghoul", artist="Nils Hamm") == set()
+
+    delver = {UUID("11bf83bb-c95b-4b4f-9a56-ce7a1816307a")}
+    for name in [
+        "Delver of Secrets // Insectile Aberration",
+        "Delver of Secrets",
+        "Insectile Aberration",
+    ]:
+        assert index.find_ids(name, setcode="isd", artist="Nils Hamm") == delver
+        for mvid in [226749, 226755]:
+            assert index.find_ids(name, mvid=mvid) == delver
+    assert index.find_ids("Delver of Secrets", number="51a") == delver
+    assert index.find_ids("Insectile Aberration", number="51b") == delver
+
+    assert index.find_ids("Thallid", setcode="fem", number="74a") == {
+        UUID("4caaf31b-86a9-485b-8da7-d5b526ed1233"),
     }
-    assert index.snnma_to_id[("fem", "Thallid", None, None, None)] == {
+    assert index.find_ids("Thallid", setcode="fem") == {
         UUID("4caaf31b-86a9-485b-8da7-d5b526ed1233"),
         UUID("80f8f778-ae31-45cd-b27f-f93a07853ede"),
         UUID("2cf2f3da-9101-439d-8caa-910ff40bfbb3"),
         UUID("01827286-b104-41c5-bac9-7c38414bc40e"),
     }
+
+
+def test_postings_sorted(scryfall_data: ScryfallDataSet) -> None:
+    index = ScryfallDataIndex()
+    index.load_data(scryfall_data)
+    postings_list: List[Mapping[Any, Sequence[int]]] = [
+        index.setcode_to_ordinals,
+        index.name_to_ordinals,
+        index.number_to_ordinals,
+        index.mvid_to_ordinals,
+        index.artist_to_ordinals,
+    ]
+    for postings in postings_list:
+        for ordinals in postings.values():
+            assert list(ordinals) == sorted(set(ordinals))
+
+
+def test_ordinals(scryfall_data: ScryfallDataSet) -> None:
+    index = ScryfallDataIndex()
+    index.load_data(scryfall_data)
+    assert index.ordinal_to_id == [c.id for c in scryfall_data.cards]
+    assert all(index.ordinal_to_id[o] == i for i, o in index.id_to_ordinal.items())
+
+
+def test_id_str_to_ordinal(scryfall_data: ScryfallDataSet) -> None:
+    index = ScryfallDataIndex()
+    index.load_data(scryfall_data)
+    for card_id, ordinal in index.id_to_ordinal.items():
+        assert index.id_str_to_ordinal[str(card_id)] == ordinal
+        assert index.id_bytes_to_ordinal[card_id.bytes] == ordinal
+    old_id = UUID("585fa2cc-4f77-47ab-8d2c-c68258ced283")
+    new_id = UUID("9052f5c7-ee3b-457d-97ca-ac6b4518997c")
+    assert index.migrated_id(old_id) == new_id
+    assert str(old_id) not in index.id_str_to_ordinal
+    assert index.migrated_id_str_to_ordinal[str(old_id)] == index.id_to_ordinal[new_id]
+    assert old_id.bytes not in index.id_bytes_to_ordinal
+
+
+@pytest.mark.parametrize(
+    ("merges", "resolved", "cyclic"),
+    [
+        pytest.param({}, {}, set(), id="empty"),
+        pytest.param({1: 2}, {1: 2}, set(), id="direct"),
+        pytest.param({1: 2, 2: 3, 3: 4}, {1: 4, 2: 4, 3: 4}, set(), id="chain"),
+        pytest.param({3: 4, 2: 3, 1: 2, 5: 2}, {1: 4, 2: 4, 3: 4, 5: 4}, set(), id="tree"),
+        pytest.param({1: 1}, {}, {1}, id="self cycle"),
+        pytest.param({1: 2, 2: 3, 3: 2, 4: 5}, {4: 5}, {1, 2, 3}, id="into cycle"),
+        pytest.param({2: 3, 3: 2, 1: 2}, {}, {1, 2, 3}, id="after cycle"),
+    ],
+)
+def test_resolve_chains(
+    merges: Dict[int, int], resolved: Dict[int, int], cyclic: Set[int]
+) -> None:
+    uuid_merges = {UUID(int=old): UUID(int=new) for old, new in merges.items()}
+    assert resolve_chains(uuid_merges) == (
+        {UUID(int=old): UUID(int=new) for old, new in resolved.items()},
+        {UUID(int=card_id) for card_id in cyclic},
+    )
+
+
+def _migration(old: UUID, new: Optional[UUID], day: int) -> ScryMigration:
+    return ScryMigration(
+        id=UUID(int=day),
+        uri=f"https://api.scryfall.com/migrations/{day}",
+        performed_at=dt.date(2020, 1, day),
+        migration_strategy=(
+            ScryMigrationStrategy.DELETE if new is None else ScryMigrationStrategy.MERGE
+        ),
+        old_scryfall_id=old,
+        new_scryfall_id=new,
+    )
+
+
+def test_load_migrations(scryfall_data: ScryfallDataSet) -> None:
+    card_id = scryfall_data.cards[0].id
+    migrations = [
+        _migration(UUID(int=1), UUID(int=2), 1),
+        _migration(UUID(int=2), card_id, 2),
+        _migration(UUID(int=3), UUID(int=4), 3),
+        _migration(UUID(int=4), None, 4),
+        _migration(UUID(int=5), UUID(int=6), 5),
+        _migration(UUID(int=6), UUID(int=5), 6),
+        _migration(UUID(int=7), None, 7),
+        _migration(UUID(int=7), card_id, 8),
+    ]
+    index = ScryfallDataIndex()
+    index.load_data(scryfall_data._replace(migrations=migrations))
+    assert index.migrate_old_id_to_new_id == {
+        UUID(int=1): card_id,
+        UUID(int=2): card_id,
+        UUID(int=7): card_id,
+    }
+    assert index.deleted_ids == {UUID(int=3), UUID(int=4)}
+    assert index.cyclic_migration_ids == {UUID(int=5), UUID(int=6)}
+    assert index.migrated_id(UUID(int=1)) == card_id
+    assert index.migrated_id(card_id) == card_id
+    assert index.migrated_id(UUID(int=5)) == UUID(int=5)
@@ -0,0 +1,131 @@
+"""Tests for mtg_ssm.containers.snapshot."""
+
+import datetime as dt
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import pytest
+
+from mtg_ssm.containers import snapshot
+from mtg_ssm.containers.bundles import ScryfallDataSet
+from mtg_ssm.containers.indexes import Oracle
+from mtg_ssm.scryfall.models import ScryCardLayout, ScrySetType
+
+UPDATED_AT = dt.datetime(2024, 2, 21, 10, 4, 28, tzinfo=dt.timezone.utc)
+
+FILTER_ARGS: Dict[str, Any] = {
+    "exclude_set_types": {ScrySetType.TOKEN, ScrySetType.MEMORABILIA},
+    "exclude_card_layouts": {ScryCardLayout.TOKEN},
+    "exclude_digital": True,
+    "exclude_foreing_only": True,
+    "merge_promos": True,
+}
+
+
+@pytest.fixture(scope="session")
+def oracle(scryfall_data: ScryfallDataSet) -> Oracle:
+    """Oracle fixture."""
+    return Oracle(scryfall_data)
+
+
+def test_snapshot_path_stable(tmp_path: Path) -> None:
+    path1 = snapshot.snapshot_path(tmp_path, bulk_updated_at=UPDATED_AT, **FILTER_ARGS)
+    path2 = snapshot.snapshot_path(
+        tmp_path,
+        bulk_updated_at=UPDATED_AT,
+        **{
+            **FILTER_ARGS,
+            "exclude_set_types": {ScrySetType.MEMORABILIA, ScrySetType.TOKEN},
+        },
+    )
+    assert path1 == path2
+    assert path1.parent == tmp_path
+    assert path1.name.startswith("oracle-20240221100428-")
+
+
+@pytest.mark.parametrize(
+    ("updated_at", "filter_args"),
+    [
+        pytest.param(UPDATED_AT + dt.timedelta(days=1), FILTER_ARGS, id="updated_at"),
+        pytest.param(UPDATED_AT, {**FILTER_ARGS, "exclude_set_types": set()}, id="set types"),
+        pytest.param(UPDATED_AT, {**FILTER_ARGS, "exclude_card_layouts": set()}, id="layouts"),
+        pytest.param(UPDATED_AT, {**FILTER_ARGS, "exclude_digital": False}, id="digital"),
+        pytest.param(UPDATED_AT, {**FILTER_ARGS, "exclude_foreing_only": False}, id="foreign"),
+        pytest.param(UPDATED_AT, {**FILTER_ARGS, "merge_promos": False}, id="promos"),
+    ],
+)
+def test_snapshot_path_differs(
+    tmp_path: Path, updated_at: dt.datetime, filter_args: Dict[str, Any]
+) -> None:
+    path1 = snapshot.snapshot_path(tmp_path, bulk_updated_at=UPDATED_AT, **FILTER_ARGS)
+    path2 = snapshot.snapshot_path(tmp_path, bulk_updated_at=updated_at, **filter_args)
+    assert path1 != path2
+
+
+def test_save_load_oracle(tmp_path: Path, oracle: Oracle) -> None:
+    path = snapshot.snapshot_path(tmp_path, bulk_updated_at=UPDATED_AT, **FILTER_ARGS)
+    assert snapshot.load_oracle(path) is None
+    snapshot.save_oracle(path, oracle)
+    loaded = snapshot.load_oracle(path)
+    assert loaded is not None
+    assert loaded.cards == oracle.cards
+    assert loaded.sets == oracle.sets
+    assert loaded.index.id_to_card == oracle.index.id_to_card
+    assert loaded.index.setcode_to_cards == oracle.index.setcode_to_cards
+    assert loaded.index.migrate_old_id_to_new_id == oracle.index.migrate_old_id_to_new_id
+
+
+class _StaleObject:
+    """Pickles as a call that fails on load, like an object whose class layout changed."""
+
+    def __init__(self, *args: Any) -> None:
+        self.args = args
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (int, self.args)
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        pytest.param(b"not a pickle", id="corrupt"),
+        pytest.param(pickle.dumps(FILTER_ARGS)[:-10], id="truncated"),
+        pytest.param(pickle.dumps(_StaleObject("stale")), id="value_error"),
+        pytest.param(pickle.dumps(_StaleObject(None)), id="type_error"),
+        pytest.param(pickle.dumps(FILTER_ARGS), id="not_oracle"),
+    ],
+)
+def test_load_corrupt_oracle(tmp_path: Path, content: bytes) -> None:
+    path = snapshot.snapshot_path(tmp_path, bulk_updated_at=UPDATED_AT, **FILTER_ARGS)
+    path.write_bytes(content)
+    assert snapshot.load_oracle(path) is None
+
+
+def test_save_prunes_stale(tmp_path: Path, oracle: Oracle) -> None:
+    old_path = snapshot.snapshot_path(
+        tmp_path, bulk_updated_at=UPDATED_AT - dt.timedelta(days=1), **FILTER_ARGS
+    )
+    other_filter_path = snapshot.snapshot_path(
+        tmp_path, bulk_updated_at=UPDATED_AT, **{**FILTER_ARGS, "merge_promos": False}
+    )
+    unrelated_path = tmp_path / "requests_cache.sqlite"
+    for path in (old_path, other_filter_path, unrelated_path):
+        path.write_bytes(b"")
+
+    new_path = snapshot.snapshot_path(tmp_path, bulk_updated_at=UPDATED_AT, **FILTER_ARGS)
+    snapshot.save_oracle(new_path, oracle)
+    assert set(tmp_path.iterdir()) == {new_path, other_filter_path, unrelated_path}
+
+
+def test_save_oracle_failed(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, oracle: Oracle
+) -> None:
+    def fail_dump(*_args: Any, **_kwargs: Any) -> None:
+        raise pickle.PicklingError
+
+    monkeypatch.setattr(pickle, "dump", fail_dump)
+    path = snapshot.snapshot_path(tmp_path, bulk_updated_at=UPDATED_AT, **FILTER_ARGS)
+    with pytest.raises(pickle.PicklingError):
+        snapshot.save_oracle(path, oracle)
+    assert list(tmp_path.iterdir()) == []
@@ -1,15 +1,26 @@
 """Tests for mtg_ssm.scryfall.fetcher."""
 
+import datetime as dt
 import re
+import time
 from pathlib import Path
 from typing import Dict, List, Pattern, Union
 
+import msgspec
 import pytest
+import requests
 from responses import RequestsMock
 
 from mtg_ssm.containers.bundles import ScryfallDataSet
 from mtg_ssm.scryfall import fetcher
-from mtg_ssm.scryfall.models import ScryCard, ScryMigration, ScrySet
+from mtg_ssm.scryfall.models import (
+    ScryBulkData,
+    ScryCard,
+    ScryCardCore,
+    ScryList,
+    ScryMigration,
+    ScrySet,
+)
 from tests import gen_testdata
 
 BULK_CARDS_REGEX = r"https://data\.scryfall\.io/default-cards/default-cards-\d{14}\.json"
@@ -61,3 +72,174 @@ def test_data_fixtures(
     assert scrydata.sets == sets_data
     assert scrydata.cards == cards_data
     assert scrydata.migrations == migrations_data
+
+
+class Item(msgspec.Struct):
+    name: str
+
+
+@pytest.mark.parametrize(
+    ("lines", "expected"),
+    [
+        pytest.param([b"[]"], [], id="empty"),
+        pytest.param([b"[", b"]"], [], id="empty lines"),
+        pytest.param(
+            [b"[", b'{"name": "a"},', b'{"name": "b"}', b"]"],
+            ["a", "b"],
+            id="line per item",
+        ),
+        pytest.param(
+            [b'[{"name": "a"},{"name": "b"}]'],
+            ["a", "b"],
+            id="single line",
+        ),
+        pytest.param(
+            [
+                b"[",
+                b"  {",
+                b'    "name": "a"',
+                b"  },",
+                b"  {",
+                b'    "name": "}{]["',
+                b"  }",
+                b"]",
+            ],
+            ["a", "}{]["],
+            id="pretty printed",
+        ),
+        pytest.param(
+            [b'[{"name": "a",', b'"extra": {"x": [1]}}, {"name": "b"},', b'{"name": "c"}]'],
+            ["a", "b", "c"],
+            id="mixed",
+        ),
+        pytest.param(
+            [b"[", b'{"name": "a", "extra": {"x": 1}', b"},", b'{"name": "b"}', b"]"],
+            ["a", "b"],
+            id="partial line looks complete",
+        ),
+        pytest.param(
+            [b'[{"name": "a"},', b'{"name": "b",'],
+            None,
+            marks=pytest.mark.xfail(raises=msgspec.DecodeError),
+            id="truncated",
+        ),
+        pytest.param(
+            [b'{"name": "a"}'],
+            None,
+            marks=pytest.mark.xfail(raises=msgspec.DecodeError),
+            id="not an array",
+        ),
+        pytest.param(
+            [b"[", b'{"name": 7},', b"]"],
+            None,
+            marks=pytest.mark.xfail(raises=msgspec.ValidationError),
+            id="invalid item",
+        ),
+    ],
+)
+def test_iter_json_array(lines: List[bytes], expected: List[str]) -> None:
+    assert [i.name for i in fetcher.iter_json_array(lines, Item)] == expected
+
+
+@pytest.mark.usefixtures("_scryurls")
+def test_scryfetch_stream(cards_data: List[ScryCard]) -> None:
+    scrystream = fetcher.scryfetch_stream()
+    assert not isinstance(scrystream.cards, list)
+    assert list(scrystream.cards) == cards_data
+
+
+@pytest.mark.usefixtures("_scryurls")
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_scryfetch_stream_workers(scryfall_data: ScryfallDataSet, max_workers: int) -> None:
+    scrystream = fetcher.scryfetch_stream(max_workers=max_workers)
+    assert scrystream.sets == scryfall_data.sets
+    assert list(scrystream.cards) == scryfall_data.cards
+    assert scrystream.migrations == scryfall_data.migrations
+
+
+def test_throttle(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(fetcher, "REQUESTS_INTERVAL_SECONDS", 0.05)
+    start = time.monotonic()
+    for _ in range(3):
+        fetcher._throttle()  # noqa: SLF001
+    assert time.monotonic() - start >= 0.1  # noqa: PLR2004
+
+
+@pytest.mark.usefixtures("_scryurls")
+def test_scryfetch_stream_core(cards_data: List[ScryCard]) -> None:
+    scrystream = fetcher.scryfetch_stream(card_type=ScryCardCore)
+    core_cards = list(scrystream.cards)
+    assert all(type(card) is ScryCardCore for card in core_cards)
+    assert core_cards == [
+        ScryCardCore(**{f: getattr(card, f) for f in ScryCardCore.__struct_fields__})
+        for card in cards_data
+    ]
+
+
+@pytest.fixture
+def bulk_data() -> ScryBulkData:
+    """Fixture with the bulk data record for the test cards file."""
+    [cards_bulk_data] = msgspec.json.decode(
+        gen_testdata.TARGET_BULK_FILE.read_bytes(), type=ScryList[ScryBulkData]
+    ).data
+    return cards_bulk_data
+
+
+@pytest.fixture
+def _bulk_cards_url(requests_mock: RequestsMock) -> None:
+    """Populate mock response for only the bulk cards url."""
+    requests_mock.add(
+        "GET",
+        re.compile(BULK_CARDS_REGEX),
+        status=200,
+        content_type="application/json",
+        body=gen_testdata.TARGET_CARDS_FILE.read_bytes(),
+    )
+
+
+@pytest.mark.usefixtures("_bulk_cards_url")
+def test_fetch_bulk_file_unchanged(requests_mock: RequestsMock, bulk_data: ScryBulkData) -> None:
+    path1 = fetcher.fetch_bulk_file(bulk_data)
+    assert len(requests_mock.calls) == 1
+    path2 = fetcher.fetch_bulk_file(bulk_data)
+    assert len(requests_mock.calls) == 1
+    assert path1 == path2
+    assert path1.read_bytes() == gen_testdata.TARGET_CARDS_FILE.read_bytes()
+
+
+@pytest.mark.usefixtures("_bulk_cards_url")
+def test_fetch_bulk_file_updated(requests_mock: RequestsMock, bulk_data: ScryBulkData) -> None:
+    fetcher.fetch_bulk_file(bulk_data)
+    assert len(requests_mock.calls) == 1
+    updated_bulk_data = msgspec.structs.replace(
+        bulk_data, updated_at=bulk_data.updated_at + dt.timedelta(days=1)
+    )
+    fetcher.fetch_bulk_file(updated_bulk_data)
+    assert len(requests_mock.calls) == 2  # noqa: PLR2004
+    fetcher.fetch_bulk_file(updated_bulk_data)
+    assert len(requests_mock.calls) == 2  # noqa: PLR2004
+
+
+@pytest.mark.usefixtures("_bulk_cards_url")
+def test_fetch_bulk_file_missing(requests_mock: RequestsMock, bulk_data: ScryBulkData) -> None:
+    path = fetcher.fetch_bulk_file(bulk_data)
+    path.unlink()
+    fetcher.fetch_bulk_file(bulk_data)
+    assert len(requests_mock.calls) == 2  # noqa: PLR2004
+    assert path.read_bytes() == gen_testdata.TARGET_CARDS_FILE.read_bytes()
+
+
+def test_fetch_bulk_file_failed(requests_mock: RequestsMock, bulk_data: ScryBulkData) -> None:
+    requests_mock.add("GET", re.compile(BULK_CARDS_REGEX), status=500)
+    with pytest.raises(requests.HTTPError):
+        fetcher.fetch_bulk_file(bulk_data)
+    assert list(Path(fetcher.CACHE_DIR).iterdir()) == []
+
+
+@pytest.mark.usefixtures("_bulk_cards_url")
+def test_fetch_bulk_file_removes_legacy_cache(bulk_data: ScryBulkData) -> None:
+    legacy_path = Path(fetcher.CACHE_DIR) / "requests_cache.sqlite"
+    legacy_path.parent.mkdir(parents=True)
+    legacy_path.write_bytes(b"gzipped bulk data")
+    fetcher.fetch_bulk_file(bulk_data)
+    assert not legacy_path.exists()
@@ -1,8 +1,10 @@
 """Tests for mtg_ssm.serialization.csv."""
 
+import gzip
+import io
+import sys
 import textwrap
 from pathlib import Path
-from typing import Dict
 from uuid import UUID
 
 import pytest
@@ -13,8 +15,7 @@ from mtg_ssm.containers.bundles import ScryfallDataSet
 from mtg_ssm.containers.collection import MagicCollection
 from mtg_ssm.containers.counts import ScryfallCardCount
 from mtg_ssm.containers.indexes import Oracle
-from mtg_ssm.scryfall.models import ScryCard
-from mtg_ssm.serialization import csv
+from mtg_ssm.serialization import csv, interface
 
 TEST_CARD_ID = UUID("57f25ead-b3ec-4c40-972d-d750ed2f5319")
 
@@ -42,65 +43,30 @@ def test_header() -> None:
     ] == csv.CSV_HEADER
 
 
-def test_row_for_card(id_to_card: Dict[UUID, ScryCard]) -> None:
-    card = id_to_card[TEST_CARD_ID]
-    card_counts = {counts.CountType.NONFOIL: 3, counts.CountType.FOIL: 5}
-    csv_row = csv.row_for_card(card, card_counts)
-    assert csv_row == {
-        "set": "PHOP",
-        "name": "Stairs to Infinity",
-        "collector_number": "P1",
-        "scryfall_id": TEST_CARD_ID,
-        "nonfoil": 3,
-        "foil": 5,
-    }
-
-
 def test_rows_for_cards_verbose(oracle: Oracle) -> None:
     card_counts: ScryfallCardCount = {TEST_CARD_ID: {counts.CountType.NONFOIL: 3}}
     collection = MagicCollection(oracle=oracle, counts=card_counts)
     rows = csv.rows_for_cards(collection, True)
     assert list(rows) == [
-        {
-            "set": "PDCI",
-            "name": "Tazeem",
-            "collector_number": "41",
-            "scryfall_id": UUID("76e5383d-ac12-4abc-aa30-15e99ded2d6f"),
-        },
-        {
-            "set": "PDCI",
-            "name": "Black Sun's Zenith",
-            "collector_number": "68",
-            "scryfall_id": UUID("dd88131a-2811-4a1f-bb9a-c82e12c1493b"),
-        },
-        {
-            "set": "PHOP",
-            "name": "Stairs to Infinity",
-            "collector_number": "P1",
-            "scryfall_id": TEST_CARD_ID,
-            "nonfoil": 3,
-        },
-        {
-            "set": "PMBS",
-            "name": "Hero of Bladehold",
-            "collector_number": "8★",
-            "scryfall_id": UUID("8829efa0-498a-43ca-91aa-f9caeeafe298"),
-        },
+        ("PDCI", "Tazeem", "41", "76e5383d-ac12-4abc-aa30-15e99ded2d6f", "", ""),
+        ("PDCI", "Black Sun's Zenith", "68", "dd88131a-2811-4a1f-bb9a-c82e12c1493b", "", ""),
+        ("PHOP", "Stairs to Infinity", "P1", str(TEST_CARD_ID), "3", ""),
+        ("PMBS", "Hero of Bladehold", "8★", "8829efa0-498a-43ca-91aa-f9caeeafe298", "", ""),
     ]
 
 
 def test_rows_for_cards_terse(oracle: Oracle) -> None:
-    card_counts: counts.ScryfallCardCount = {TEST_CARD_ID: {counts.CountType.NONFOIL: 3}}
+    card_counts: counts.ScryfallCardCount = {
+        UUID("8829efa0-498a-43ca-91aa-f9caeeafe298"): {counts.CountType.FOIL: -1},
+        TEST_CARD_ID: {counts.CountType.NONFOIL: 3},
+        UUID("76e5383d-ac12-4abc-aa30-15e99ded2d6f"): {counts.CountType.NONFOIL: 1},
+    }
     collection = MagicCollection(oracle=oracle, counts=card_counts)
     rows = csv.rows_for_cards(collection, False)
     assert list(rows) == [
-        {
-            "set": "PHOP",
-            "name": "Stairs to Infinity",
-            "collector_number": "P1",
-            "scryfall_id": TEST_CARD_ID,
-            "nonfoil": 3,
-        }
+        ("PDCI", "Tazeem", "41", "76e5383d-ac12-4abc-aa30-15e99ded2d6f", "1", ""),
+        ("PHOP", "Stairs to Infinity", "P1", str(TEST_CARD_ID), "3", ""),
+        ("PMBS", "Hero of Bladehold", "8★", "8829efa0-498a-43ca-91aa-f9caeeafe298", "", "-1"),
     ]
 
 
@@ -143,3 +109,33 @@ def test_read(oracle: Oracle, tmp_path: Path) -> None:
     assert collection.counts == {
         TEST_CARD_ID: {counts.CountType.NONFOIL: 3, counts.CountType.FOIL: 7}
     }
+
+
+@pytest.mark.parametrize(
+    "extension", [pytest.param(".csv", id="plain"), pytest.param(".csv.gz", id="gzip")]
+)
+def test_write_read_compressed(oracle: Oracle, tmp_path: Path, extension: str) -> None:
+    csv_path = tmp_path / f"outfile{extension}"
+    card_counts: ScryfallCardCount = {TEST_CARD_ID: {counts.CountType.FOIL: 2}}
+    collection = MagicCollection(oracle=oracle, counts=card_counts)
+    serializer = csv.CsvTerseDialect()
+    serializer.write(csv_path, collection)
+    if extension == ".csv.gz":
+        assert gzip.decompress(csv_path.read_bytes()).startswith(b"set,name,")
+    assert serializer.read(csv_path, oracle).counts == card_counts
+
+
+def test_read_stdin(oracle: Oracle, monkeypatch: pytest.MonkeyPatch) -> None:
+    stdin_data = f"scryfall_id,nonfoil\r\n{TEST_CARD_ID},4\r\n".encode()
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(stdin_data)))
+    collection = csv.CsvFullDialect().read(interface.STDIO_PATH, oracle)
+    assert collection.counts == {TEST_CARD_ID: {counts.CountType.NONFOIL: 4}}
+    assert not sys.stdin.closed
+
+
+@pytest.mark.xfail(raises=interface.MissingDependencyError, strict=True)
+def test_read_zstd_missing(
+    oracle: Oracle, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setitem(sys.modules, "zstandard", None)  # make import fail
+    csv.CsvFullDialect().read(tmp_path / "infile.csv.zst", oracle)
@@ -14,6 +14,10 @@ def test_all_dialects() -> None:
     assert sorted(all_formats) == [
         ("csv", "csv", mock.ANY),
         ("csv", "terse", mock.ANY),
+        ("msgpack", "msgpack", mock.ANY),
+        ("sqlite", "sqlite", mock.ANY),
+        ("sqlite", "terse", mock.ANY),
+        ("xlsx", "sparse", mock.ANY),
         ("xlsx", "xlsx", mock.ANY),
     ]
 
@@ -24,7 +28,11 @@ def test_all_dialects() -> None:
         pytest.param("csv", {}, "CsvFullDialect"),
         pytest.param("csv", {"csv": "terse"}, "CsvTerseDialect"),
         pytest.param("csv", {"xlsx": "csv"}, "CsvFullDialect"),
+        pytest.param("msgpack", {}, "MsgpackDialect"),
+        pytest.param("sqlite", {}, "SqliteDialect"),
+        pytest.param("sqlite", {"sqlite": "terse"}, "SqliteTerseDialect"),
         pytest.param("xlsx", {}, "XlsxDialect"),
+        pytest.param("xlsx", {"xlsx": "sparse"}, "XlsxSparseDialect"),
         pytest.param(
             "invalid",
             {},
@@ -46,3 +54,14 @@ def test_extension_lookup(
     assert isinstance(serialization_class, type)
     assert issubclass(serialization_class, interface.SerializationDialect)
     assert serialization_class.__name__ == dialect_name
+
+
+def test_lazy_descriptions() -> None:
+    registered = interface.SerializationDialect._EXT_DIALECT_TO_MODULE  # noqa: SLF001
+    for extension, dialect in registered:
+        serialization_class = interface.SerializationDialect.by_extension(
+            extension, {extension: dialect}
+        )
+        assert serialization_class.__doc__ is not None
+    all_formats = interface.SerializationDialect.dialects()
+    assert len(all_formats) == len(registered)
@@ -0,0 +1,97 @@
+"""Tests for mtg_ssm.serialization.msgpack."""
+
+from pathlib import Path
+from uuid import UUID
+
+import msgspec
+import pytest
+
+from mtg_ssm.containers.bundles import ScryfallDataSet
+from mtg_ssm.containers.collection import MagicCollection
+from mtg_ssm.containers.counts import CountType, ScryfallCardCount
+from mtg_ssm.containers.indexes import Oracle
+from mtg_ssm.serialization import interface, msgpack
+
+TEST_CARD_ID = UUID("57f25ead-b3ec-4c40-972d-d750ed2f5319")
+OLD_CARD_ID = UUID("585fa2cc-4f77-47ab-8d2c-c68258ced283")
+NEW_CARD_ID = UUID("9052f5c7-ee3b-457d-97ca-ac6b4518997c")
+
+
+@pytest.fixture(scope="session")
+def oracle(scryfall_data: ScryfallDataSet) -> Oracle:
+    """Oracle fixture."""
+    return Oracle(scryfall_data)
+
+
+def test_write(oracle: Oracle, tmp_path: Path) -> None:
+    msgpack_path = tmp_path / "outfile.msgpack"
+    card_counts: ScryfallCardCount = {
+        TEST_CARD_ID: {CountType.NONFOIL: 3, CountType.FOIL: 5},
+        NEW_CARD_ID: {},
+    }
+    collection = MagicCollection(oracle=oracle, counts=card_counts)
+    msgpack.MsgpackDialect().write(msgpack_path, collection)
+    assert msgspec.msgpack.decode(msgpack_path.read_bytes()) == [
+        msgpack.SCHEMA_VERSION,
+        [[TEST_CARD_ID.bytes, 3, 5]],
+    ]
+
+
+def test_write_read(oracle: Oracle, tmp_path: Path) -> None:
+    msgpack_path = tmp_path / "outfile.msgpack"
+    card_counts: ScryfallCardCount = {
+        TEST_CARD_ID: {CountType.NONFOIL: 3, CountType.FOIL: 5},
+        NEW_CARD_ID: {CountType.FOIL: 1},
+    }
+    serializer = msgpack.MsgpackDialect()
+    serializer.write(msgpack_path, MagicCollection(oracle=oracle, counts=card_counts))
+    assert serializer.read(msgpack_path, oracle).counts == card_counts
+
+
+def test_read_migrated(oracle: Oracle, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    msgpack_path = tmp_path / "infile.msgpack"
+    msgpack_path.write_bytes(
+        msgspec.msgpack.encode(
+            [msgpack.SCHEMA_VERSION, [[OLD_CARD_ID.bytes, 0, 2], [NEW_CARD_ID.bytes, 1]]]
+        )
+    )
+    collection = msgpack.MsgpackDialect().read(msgpack_path, oracle)
+    assert collection.counts == {NEW_CARD_ID: {CountType.NONFOIL: 1, CountType.FOIL: 2}}
+    assert capsys.readouterr().out == "Migrated 1 of 2 rows to current scryfall ids\n"
+
+
+@pytest.mark.parametrize(
+    "contents",
+    [
+        pytest.param(b"not msgpack", id="garbage"),
+        pytest.param(msgspec.msgpack.encode([msgpack.SCHEMA_VERSION + 1, []]), id="version"),
+        pytest.param(
+            msgspec.msgpack.encode([msgpack.SCHEMA_VERSION, [[b"short", 1, 0]]]), id="id"
+        ),
+        pytest.param(msgspec.msgpack.encode([]), id="empty"),
+        pytest.param(msgspec.msgpack.encode(["1", []]), id="version_type"),
+    ],
+)
+@pytest.mark.xfail(raises=interface.DeserializationError)
+def test_read_invalid(oracle: Oracle, tmp_path: Path, contents: bytes) -> None:
+    msgpack_path = tmp_path / "infile.msgpack"
+    msgpack_path.write_bytes(contents)
+    msgpack.MsgpackDialect().read(msgpack_path, oracle)
+
+
+def test_read_future_version(oracle: Oracle, tmp_path: Path) -> None:
+    msgpack_path = tmp_path / "infile.msgpack"
+    future_version = msgpack.SCHEMA_VERSION + 1
+    msgpack_path.write_bytes(msgspec.msgpack.encode([future_version, {"counts": []}, "extra"]))
+    with pytest.raises(
+        interface.DeserializationError,
+        match=f"Unsupported collection file version: {future_version}",
+    ):
+        msgpack.MsgpackDialect().read(msgpack_path, oracle)
+
+
+def test_count_record_fields() -> None:
+    assert msgpack.CountRecord.__struct_fields__ == (
+        "scryfall_id",
+        *(count_type.value for count_type in CountType),
+    )
@@ -0,0 +1,87 @@
+"""Tests for mtg_ssm.serialization.sqlite."""
+
+import contextlib
+import sqlite3
+from pathlib import Path
+from typing import Type
+from uuid import UUID
+
+import pytest
+
+from mtg_ssm.containers.bundles import ScryfallDataSet
+from mtg_ssm.containers.collection import MagicCollection
+from mtg_ssm.containers.counts import CountType, ScryfallCardCount
+from mtg_ssm.containers.indexes import Oracle
+from mtg_ssm.serialization import interface, sqlite
+
+TEST_CARD_ID = UUID("57f25ead-b3ec-4c40-972d-d750ed2f5319")
+OLD_CARD_ID = UUID("585fa2cc-4f77-47ab-8d2c-c68258ced283")
+NEW_CARD_ID = UUID("9052f5c7-ee3b-457d-97ca-ac6b4518997c")
+
+
+@pytest.fixture(scope="session")
+def oracle(scryfall_data: ScryfallDataSet) -> Oracle:
+    """Oracle fixture."""
+    return Oracle(scryfall_data)
+
+
+@pytest.mark.parametrize(
+    "dialect", [sqlite.SqliteDialect, sqlite.SqliteTerseDialect], ids=["full", "terse"]
+)
+def test_write_read(oracle: Oracle, tmp_path: Path, dialect: Type[sqlite.SqliteDialect]) -> None:
+    db_path = tmp_path / "collection.sqlite"
+    card_counts: ScryfallCardCount = {
+        TEST_CARD_ID: {CountType.NONFOIL: 3, CountType.FOIL: 5},
+        NEW_CARD_ID: {CountType.FOIL: 1},
+    }
+    serializer = dialect()
+    serializer.write(db_path, MagicCollection(oracle=oracle, counts=card_counts))
+    serializer.write(db_path, MagicCollection(oracle=oracle, counts=card_counts))
+    assert serializer.read(db_path, oracle).counts == card_counts
+
+
+def test_write_tables(oracle: Oracle, tmp_path: Path) -> None:
+    db_path = tmp_path / "collection.sqlite"
+    card_counts: ScryfallCardCount = {TEST_CARD_ID: {CountType.NONFOIL: 3}}
+    sqlite.SqliteDialect().write(db_path, MagicCollection(oracle=oracle, counts=card_counts))
+    with contextlib.closing(sqlite3.connect(db_path)) as connection:
+        assert list(
+            connection.execute(
+                "SELECT sets.code, cards.name, cards.collector_number, counts.nonfoil, counts.foil"
+                ' FROM counts JOIN cards USING (scryfall_id) JOIN sets ON cards."set" = sets.code'
+            )
+        ) == [("phop", "Stairs to Infinity", "P1", 3, 0)]
+        assert connection.execute("SELECT count(*) FROM cards").fetchone() == (
+            len(oracle.index.id_to_card),
+        )
+
+
+def test_read_migrated(oracle: Oracle, tmp_path: Path) -> None:
+    db_path = tmp_path / "collection.sqlite"
+    sqlite.SqliteTerseDialect().write(db_path, MagicCollection(oracle=oracle, counts={}))
+    with contextlib.closing(sqlite3.connect(db_path)) as connection, connection:
+        connection.execute("INSERT INTO counts VALUES (?, 0, 2)", (str(OLD_CARD_ID),))
+    assert sqlite.SqliteDialect().read(db_path, oracle).counts == {
+        NEW_CARD_ID: {CountType.FOIL: 2}
+    }
+
+
+@pytest.mark.xfail(raises=interface.DeserializationError)
+def test_read_missing(oracle: Oracle, tmp_path: Path) -> None:
+    sqlite.SqliteDialect().read(tmp_path / "missing.sqlite", oracle)
+
+
+@pytest.mark.xfail(raises=interface.DeserializationError)
+def test_read_not_database(oracle: Oracle, tmp_path: Path) -> None:
+    db_path = tmp_path / "collection.sqlite"
+    db_path.write_text("not a database")
+    sqlite.SqliteDialect().read(db_path, oracle)
+
+
+@pytest.mark.xfail(raises=interface.DeserializationError)
+def test_read_wrong_version(oracle: Oracle, tmp_path: Path) -> None:
+    db_path = tmp_path / "collection.sqlite"
+    sqlite.SqliteDialect().write(db_path, MagicCollection(oracle=oracle, counts={}))
+    with contextlib.closing(sqlite3.connect(db_path)) as connection, connection:
+        connection.execute(f"PRAGMA user_version = {sqlite.SCHEMA_VERSION + 1}")
+    sqlite.SqliteDialect().read(db_path, oracle)
@@ -1,7 +1,9 @@
 """Tests for mtg_ssm.serialization.xlsx."""
 
+import re
+import zipfile
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple, Type
 from uuid import UUID
 
 import openpyxl
@@ -80,6 +82,16 @@ def test_get_references(
     assert print_refs == expected
 
 
+def test_references(oracle: Oracle) -> None:
+    references = xlsx.References(oracle.index)
+    for name, cards in oracle.index.name_to_cards.items():
+        assert references.get(name) == xlsx.get_references(oracle.index, name)
+        for card in cards:
+            assert references.get(name, exclude_sets={card.set}) == xlsx.get_references(
+                oracle.index, name, exclude_sets={card.set}
+            )
+
+
 def test_create_all_cards_sheet(snapshot: SnapshotAssertion, oracle: Oracle) -> None:
     book = openpyxl.Workbook()
     sheet = book.create_sheet()
@@ -123,7 +135,44 @@ def test_write(snapshot: SnapshotAssertion, oracle: Oracle, tmp_path: Path) -> N
         )
 
 
+def _zip_contents(path: Path) -> Dict[str, bytes]:
+    with zipfile.ZipFile(path) as xlsx_zip:
+        return {
+            name: xlsx_zip.read(name)
+            for name in xlsx_zip.namelist()
+            if name != "docProps/core.xml"  # creation timestamps
+        }
+
+
 @pytest.mark.parametrize(
+    "dialect_class",
+    [pytest.param(xlsx.XlsxDialect, id="xlsx"), pytest.param(xlsx.XlsxSparseDialect, id="sparse")],
+)
+def test_write_jobs(
+    oracle: Oracle,
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+    dialect_class: Type[xlsx.XlsxDialect],
+) -> None:
+    card_counts: ScryfallCardCount = {
+        UUID("5d5f3f57-410f-4ee2-b93c-f5051a068828"): {CountType.NONFOIL: 7},
+        UUID("768c4d8f-5700-4f0a-9ff2-58422aeb1dac"): {CountType.FOIL: 4},
+    }
+    collection = MagicCollection(oracle=oracle, counts=card_counts)
+    serial_path = tmp_path / "serial.xlsx"
+    dialect_class().write(serial_path, collection)
+    parallel_path = tmp_path / "parallel.xlsx"
+    dialect_class(jobs=3).write(parallel_path, collection)
+    assert "rewriting all sheets" not in capsys.readouterr().out
+
+    serial_contents = _zip_contents(serial_path)
+    parallel_contents = _zip_contents(parallel_path)
+    assert list(parallel_contents) == list(serial_contents)
+    for name, content in serial_contents.items():
+        assert parallel_contents[name] == content, name
+
+
+SHEETS_AND_ROWS_PARAMS = pytest.mark.parametrize(
     ("sheets_and_rows", "skip_sheets", "expected"),
     [
         pytest.param(
@@ -159,6 +208,9 @@ def test_write(snapshot: SnapshotAssertion, oracle: Oracle, tmp_path: Path) -> N
         ),
     ],
 )
+
+
+@SHEETS_AND_ROWS_PARAMS
 def test_rows_from_workbook(
     sheets_and_rows: List[Tuple[str, List[List[str]]]],
     skip_sheets: Optional[Set[str]],
@@ -173,6 +225,172 @@ def test_rows_from_workbook(
     assert list(xlsx.rows_for_workbook(workbook, skip_sheets=skip_sheets)) == expected
 
 
+@SHEETS_AND_ROWS_PARAMS
+def test_rows_for_xlsx_file(
+    tmp_path: Path,
+    sheets_and_rows: List[Tuple[str, List[List[str]]]],
+    skip_sheets: Optional[Set[str]],
+    expected: List[Dict[str, str]],
+) -> None:
+    xlsx_path = tmp_path / "infile.xlsx"
+    workbook = openpyxl.Workbook()
+    for sheet, rows in sheets_and_rows:
+        worksheet = workbook.create_sheet(title=sheet)
+        for row in rows:
+            worksheet.append(row)
+    del workbook["Sheet"]
+    workbook.save(xlsx_path)
+    assert list(xlsx.rows_for_xlsx_file(xlsx_path, skip_sheets=skip_sheets)) == expected
+
+
+def test_rows_for_xlsx_file_id_columns(tmp_path: Path) -> None:
+    xlsx_path = tmp_path / "infile.xlsx"
+    workbook = openpyxl.Workbook()
+    sheet = workbook["Sheet"]
+    sheet.title = "S00"
+    sheet.append(["have", "name", "scryfall_id", "nonfoil", "foil", "others"])
+    sheet.append(["=D2+E2", "Rhox", "5d5f3f57-410f-4ee2-b93c-f5051a068828", 3, None, "x"])
+    sheet.append(["=D3+E3", "Other", "00000000-0000-0000-0000-000000000001", None, None])
+    sheet.append(["=D4+E4", "Rhox", "5d5f3f57-410f-4ee2-b93c-f5051a068828", 1.0, 2])
+    workbook.save(xlsx_path)
+    assert list(xlsx.rows_for_xlsx_file(xlsx_path, skip_sheets=None)) == [
+        {
+            "set": "S00",
+            "scryfall_id": "5d5f3f57-410f-4ee2-b93c-f5051a068828",
+            "nonfoil": 3,
+            "foil": None,
+        },
+        {
+            "set": "S00",
+            "scryfall_id": "5d5f3f57-410f-4ee2-b93c-f5051a068828",
+            "nonfoil": 1,
+            "foil": 2,
+        },
+    ]
+
+
+def _share_strings(xlsx_path: Path, rich_text: Optional[str] = None) -> None:
+    """Rewrite inline strings in a saved workbook into a shared strings table, as Excel does.
+
+    If given, the rich_text string is stored as formatted runs with a phonetic hint.
+    """
+    with zipfile.ZipFile(xlsx_path) as xlsx_zip:
+        parts = {name: xlsx_zip.read(name).decode() for name in xlsx_zip.namelist()}
+    strings: List[str] = []
+
+    def share(match: "re.Match[str]") -> str:
+        text = match.group(2)
+        if text not in strings:
+            strings.append(text)
+        return f'<c {match.group(1)}t="s"><v>{strings.index(text)}</v></c>'
+
+    for name, content in parts.items():
+        if name.startswith("xl/worksheets/"):
+            parts[name] = re.sub(
+                r'<c ([^>]*?)t="inlineStr"><is><t[^>]*>([^<]*)</t></is></c>', share, content
+            )
+    items = [
+        (
+            f"<r><t>{text[:2]}</t></r><r><rPr><b/></rPr><t>{text[2:]}</t></r>"
+            '<rPh sb="0" eb="1"><t>X</t></rPh>'
+            if text == rich_text
+            else f"<t>{text}</t>"
+        )
+        for text in strings
+    ]
+    parts["xl/sharedStrings.xml"] = (
+        '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        + "".join(f"<si>{item}</si>" for item in items)
+        + "</sst>"
+    )
+    parts["[Content_Types].xml"] = parts["[Content_Types].xml"].replace(
+        "</Types>",
+        '<Override PartName="/xl/sharedStrings.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/></Types>',
+    )
+    parts["xl/_rels/workbook.xml.rels"] = parts["xl/_rels/workbook.xml.rels"].replace(
+        "</Relationships>",
+        '<Relationship Id="rIdShared" Target="sharedStrings.xml" Type="http://schemas.'
+        'openxmlformats.org/officeDocument/2006/relationships/sharedStrings"/></Relationships>',
+    )
+    with zipfile.ZipFile(xlsx_path, "w", zipfile.ZIP_DEFLATED) as xlsx_zip:
+        for name, content in parts.items():
+            xlsx_zip.writestr(name, content)
+
+
+def test_rows_for_xlsx_file_shared_strings(tmp_path: Path) -> None:
+    xlsx_path = tmp_path / "infile.xlsx"
+    workbook = openpyxl.Workbook()
+    sheet = workbook["Sheet"]
+    sheet.title = "S00"
+    sheet.append(["name", "note", "count"])
+    sheet.append(["Rhox", "Rhox", 2])
+    sheet.append(["Other", "Rhox", 1])
+    workbook.save(xlsx_path)
+    _share_strings(xlsx_path, rich_text="Other")
+
+    expected = [
+        {"set": "S00", "name": "Rhox", "note": "Rhox", "count": 2},
+        {"set": "S00", "name": "Other", "note": "Rhox", "count": 1},
+    ]
+    with zipfile.ZipFile(xlsx_path) as xlsx_zip:
+        assert "xl/sharedStrings.xml" in xlsx_zip.namelist()
+    assert list(xlsx.rows_for_xlsx_file(xlsx_path, skip_sheets=None)) == expected
+    workbook = openpyxl.load_workbook(filename=xlsx_path, read_only=True)
+    assert list(xlsx.rows_for_workbook(workbook, skip_sheets=None)) == expected
+
+
+def test_read_shared_strings(oracle: Oracle, tmp_path: Path) -> None:
+    xlsx_path = tmp_path / "infile.xlsx"
+    workbook = openpyxl.Workbook()
+    sheet = workbook["Sheet"]
+    sheet.title = "S00"
+    sheet.append(["scryfall_id", "nonfoil", "foil"])
+    sheet.append(["5d5f3f57-410f-4ee2-b93c-f5051a068828", 3, 7])
+    workbook.save(xlsx_path)
+    _share_strings(xlsx_path)
+    collection = xlsx.XlsxDialect().read(xlsx_path, oracle)
+    assert collection.counts == {
+        UUID("5d5f3f57-410f-4ee2-b93c-f5051a068828"): {
+            CountType.NONFOIL: 3,
+            CountType.FOIL: 7,
+        }
+    }
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        pytest.param(IndexError("list index out of range"), id="shared_string_index"),
+        pytest.param(ValueError("Entities are forbidden"), id="defusedxml"),
+        pytest.param(KeyError("xl/workbook.xml"), id="missing_part"),
+    ],
+)
+def test_read_falls_back_to_openpyxl(
+    monkeypatch: pytest.MonkeyPatch, oracle: Oracle, tmp_path: Path, error: Exception
+) -> None:
+    xlsx_path = tmp_path / "infile.xlsx"
+    workbook = openpyxl.Workbook()
+    sheet = workbook["Sheet"]
+    sheet.title = "S00"
+    sheet.append(["scryfall_id", "nonfoil", "foil"])
+    sheet.append(["5d5f3f57-410f-4ee2-b93c-f5051a068828", 3, 7])
+    workbook.save(xlsx_path)
+
+    def rows_for_xlsx_file(path: Path, skip_sheets: Optional[Set[str]]) -> Any:
+        del path, skip_sheets
+        raise error
+
+    monkeypatch.setattr(xlsx, "rows_for_xlsx_file", rows_for_xlsx_file)
+    collection = xlsx.XlsxDialect().read(xlsx_path, oracle)
+    assert collection.counts == {
+        UUID("5d5f3f57-410f-4ee2-b93c-f5051a068828"): {
+            CountType.NONFOIL: 3,
+            CountType.FOIL: 7,
+        }
+    }
+
+
 def test_read_from_file(oracle: Oracle, tmp_path: Path) -> None:
     xlsx_path = tmp_path / "infile.xlsx"
     serializer = xlsx.XlsxDialect()
@@ -189,3 +407,129 @@ def test_read_from_file(oracle: Oracle, tmp_path: Path) -> None:
             CountType.FOIL: 7,
         }
     }
+
+
+def test_write_read(oracle: Oracle, tmp_path: Path) -> None:
+    xlsx_path = tmp_path / "outfile.xlsx"
+    card_counts: ScryfallCardCount = {
+        UUID("5d5f3f57-410f-4ee2-b93c-f5051a068828"): {CountType.NONFOIL: 7},
+        UUID("768c4d8f-5700-4f0a-9ff2-58422aeb1dac"): {
+            CountType.NONFOIL: 3,
+            CountType.FOIL: 4,
+        },
+    }
+    serializer = xlsx.XlsxDialect()
+    serializer.write(xlsx_path, MagicCollection(oracle=oracle, counts=card_counts))
+    assert serializer.read(xlsx_path, oracle).counts == card_counts
+
+
+def test_write_read_sparse(oracle: Oracle, tmp_path: Path) -> None:
+    xlsx_path = tmp_path / "outfile.xlsx"
+    card_counts: ScryfallCardCount = {
+        UUID("5d5f3f57-410f-4ee2-b93c-f5051a068828"): {CountType.NONFOIL: 7},
+        UUID("768c4d8f-5700-4f0a-9ff2-58422aeb1dac"): {
+            CountType.NONFOIL: 3,
+            CountType.FOIL: 4,
+        },
+    }
+    serializer = xlsx.XlsxSparseDialect()
+    serializer.write(xlsx_path, MagicCollection(oracle=oracle, counts=card_counts))
+
+    workbook = openpyxl.load_workbook(filename=xlsx_path)
+    assert workbook.sheetnames == ["All Sets", "All Cards", "ICE", "S00"]
+    all_sets_rows = list(workbook["All Sets"].values)
+    assert [row[0] for row in all_sets_rows[2:]] == ["ICE", "S00"]
+    all_cards_rows = list(workbook["All Cards"].values)
+    assert [row[0] for row in all_cards_rows[1:]] == sorted(
+        {c.name for c in oracle.index.setcode_to_cards["ice"]}
+        | {c.name for c in oracle.index.setcode_to_cards["s00"]}
+    )
+    referenced_sheets = {
+        sheet_ref
+        for sheet in workbook.worksheets
+        for row in sheet.values
+        for value in row
+        if isinstance(value, str)
+        for sheet_ref in re.findall(r"'(\w+)'!", value)
+    }
+    assert referenced_sheets == {"ICE", "S00"}
+
+    assert serializer.read(xlsx_path, oracle).counts == card_counts
+
+
+def _sheet_values(path: Path) -> Dict[str, List[Tuple[Any, ...]]]:
+    workbook = openpyxl.load_workbook(filename=path)
+    return {str(sheet.title): list(sheet.values) for sheet in workbook.worksheets}
+
+
+def _sheet_part_bytes(path: Path) -> Dict[str, bytes]:
+    with zipfile.ZipFile(path) as xlsx_zip:
+        return {title: xlsx_zip.read(part) for title, part in xlsx.sheet_parts(xlsx_zip)}
+
+
+@pytest.mark.parametrize("jobs", [pytest.param(1, id="serial"), pytest.param(2, id="parallel")])
+def test_update(
+    oracle: Oracle, tmp_path: Path, capsys: pytest.CaptureFixture[str], jobs: int
+) -> None:
+    previous_path = tmp_path / "previous.xlsx"
+    updated_path = tmp_path / "updated.xlsx"
+    full_path = tmp_path / "full.xlsx"
+    serializer = xlsx.XlsxDialect(jobs=jobs)
+    serializer.write(
+        previous_path,
+        MagicCollection(
+            oracle=oracle,
+            counts={UUID("5d5f3f57-410f-4ee2-b93c-f5051a068828"): {CountType.NONFOIL: 7}},
+        ),
+    )
+    collection = MagicCollection(
+        oracle=oracle,
+        counts={UUID("768c4d8f-5700-4f0a-9ff2-58422aeb1dac"): {CountType.FOIL: 4}},
+    )
+    serializer.update(updated_path, collection, previous_path)
+    serializer.write(full_path, collection)
+
+    assert _sheet_values(updated_path) == _sheet_values(full_path)
+    previous_parts = _sheet_part_bytes(previous_path)
+    updated_parts = _sheet_part_bytes(updated_path)
+    changed = {title for title in updated_parts if updated_parts[title] != previous_parts[title]}
+    assert changed == {"ICE", "S00"}  # summary sheets are regenerated, but identical
+    with zipfile.ZipFile(updated_path) as updated_zip:
+        assert updated_zip.testzip() is None
+        assert {info.compress_type for info in updated_zip.infolist()} == {zipfile.ZIP_DEFLATED}
+    reused = len(oracle.index.setcode_to_set) - len(changed)
+    assert f"Reusing {reused} unchanged set sheets" in capsys.readouterr().out
+
+
+def test_update_styles_changed(oracle: Oracle, tmp_path: Path) -> None:
+    previous_path = tmp_path / "previous.xlsx"
+    restyled_path = tmp_path / "restyled.xlsx"
+    updated_path = tmp_path / "updated.xlsx"
+    collection = MagicCollection(oracle=oracle, counts={})
+    serializer = xlsx.XlsxDialect()
+    serializer.write(previous_path, collection)
+    with zipfile.ZipFile(previous_path) as previous_zip, zipfile.ZipFile(
+        restyled_path, "w"
+    ) as restyled_zip:
+        for info in previous_zip.infolist():
+            data = previous_zip.read(info)
+            if info.filename == xlsx.STYLES_PART:
+                data = data.replace(b"Calibri", b"Arial")
+            restyled_zip.writestr(info, data)
+
+    serializer.update(updated_path, collection, restyled_path)
+    with zipfile.ZipFile(updated_path) as updated_zip:
+        assert b"Calibri" in updated_zip.read(xlsx.STYLES_PART)
+    assert _sheet_values(updated_path) == _sheet_values(previous_path)
+
+
+def test_update_without_hashes(oracle: Oracle, tmp_path: Path) -> None:
+    previous_path = tmp_path / "previous.xlsx"
+    updated_path = tmp_path / "updated.xlsx"
+    workbook = openpyxl.Workbook()
+    workbook["Sheet"].title = "ICE"
+    workbook.save(previous_path)
+    collection = MagicCollection(oracle=oracle, counts={})
+    serializer = xlsx.XlsxDialect()
+    serializer.update(updated_path, collection, previous_path)
+    assert "ICE" in _sheet_values(updated_path)
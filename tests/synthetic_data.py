@@ -0,0 +1,175 @@
+"""Generate synthetic Scryfall data at production scale.
+
+Sets, cards and migrations are derived from the real test data templates, so every
+generated object is a valid model instance with a realistic mix of set types, card
+layouts, multi-face names, reprints, promo sets and variant collector numbers.
+"""
+
+import datetime as dt
+import random
+import string
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import msgspec
+
+from mtg_ssm.containers.bundles import ScryfallDataSet
+from mtg_ssm.scryfall.models import (
+    ScryCardCore,
+    ScryList,
+    ScryMigration,
+    ScryMigrationStrategy,
+    ScrySet,
+    ScrySetType,
+)
+from tests import gen_testdata
+
+# Approximate size of the full Scryfall default cards data
+FULL_SCALE_SETS = 800
+FULL_SCALE_CARDS_PER_SET = 112
+FULL_SCALE_MIGRATIONS = 4000
+
+FIRST_RELEASE = dt.date(1993, 8, 5)
+PROMO_SET_FRACTION = 0.15
+REPRINT_FRACTION = 0.3
+VARIANT_FRACTION = 0.05
+MIGRATION_DELETE_FRACTION = 0.1
+MIGRATION_CHAIN_FRACTION = 0.05
+
+
+def load_templates() -> Tuple[List[ScrySet], List[ScryCardCore]]:
+    """Load the real test data sets and cards used as templates."""
+    sets = msgspec.json.decode(
+        gen_testdata.TARGET_SETS_FILE.read_bytes(), type=ScryList[ScrySet]
+    ).data
+    cards = msgspec.json.decode(
+        gen_testdata.TARGET_CARDS_FILE.read_bytes(), type=List[ScryCardCore]
+    )
+    return sets, cards
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _set_code(index: int) -> str:
+    letters = string.ascii_lowercase
+    code = ""
+    index += 26 * 26  # at least three letters
+    while index:
+        index, remainder = divmod(index, 26)
+        code = letters[remainder] + code
+    return code
+
+
+def _named_card(card: ScryCardCore, name: str) -> ScryCardCore:
+    """Rename a card, naming its faces after the parts of a multi-face name."""
+    if not card.card_faces:
+        return msgspec.structs.replace(card, name=name)
+    faces = [
+        msgspec.structs.replace(face, name=f"{name} {part}")
+        for face, part in zip(card.card_faces, string.ascii_uppercase)
+    ]
+    return msgspec.structs.replace(
+        card, name=" // ".join(face.name for face in faces), card_faces=faces
+    )
+
+
+def generate_sets(num_sets: int, rng: random.Random) -> List[ScrySet]:
+    """Generate sets, including promo sets attached to the preceding set."""
+    set_templates, _ = load_templates()
+    non_promo = [s for s in set_templates if s.set_type != ScrySetType.PROMO]
+    promo = [s for s in set_templates if s.set_type == ScrySetType.PROMO]
+    sets: List[ScrySet] = []
+    for index in range(num_sets):
+        released_at = FIRST_RELEASE + dt.timedelta(days=index * 12)
+        fields: Dict[str, Optional[str]]
+        if sets and sets[-1].set_type != ScrySetType.PROMO and rng.random() < PROMO_SET_FRACTION:
+            parent = sets[-1]
+            template = rng.choice(promo)
+            code = f"p{parent.code}"
+            fields = {"parent_set_code": parent.code, "name": f"{parent.name} Promos"}
+        else:
+            template = rng.choice(non_promo)
+            code = _set_code(index)
+            fields = {"parent_set_code": None, "name": f"Synthetic Set {index}"}
+        sets.append(
+            msgspec.structs.replace(
+                template, id=_uuid(rng), code=code, released_at=released_at, **fields
+            )
+        )
+    return sets
+
+
+def generate_cards(
+    sets: List[ScrySet], cards_per_set: int, rng: random.Random
+) -> List[ScryCardCore]:
+    """Generate cards for sets, with reprints sharing names across sets."""
+    _, card_templates = load_templates()
+    artists = [f"Synthetic Artist {i}" for i in range(max(1, cards_per_set * len(sets) // 50))]
+    names: List[Tuple[str, ScryCardCore]] = []
+    cards: List[ScryCardCore] = []
+    multiverse_id = 1
+    for set_ in sets:
+        count = max(1, round(rng.gauss(cards_per_set, cards_per_set / 4)))
+        for number in range(1, count + 1):
+            if names and rng.random() < REPRINT_FRACTION:
+                name, template = rng.choice(names)
+            else:
+                name, template = f"Synthetic Card {len(names)}", rng.choice(card_templates)
+                names.append((name, template))
+            collector_numbers = [str(number)]
+            if rng.random() < VARIANT_FRACTION:
+                collector_numbers = [f"{number}a", f"{number}b"]
+            for collector_number in collector_numbers:
+                card = msgspec.structs.replace(
+                    template,
+                    id=_uuid(rng),
+                    set=set_.code,
+                    collector_number=collector_number,
+                    artist=rng.choice(artists),
+                    released_at=set_.released_at or FIRST_RELEASE,
+                    multiverse_ids=[multiverse_id],
+                    digital=set_.digital,
+                )
+                multiverse_id += 1
+                cards.append(_named_card(card, name))
+    return cards
+
+
+def generate_migrations(
+    cards: List[ScryCardCore], num_migrations: int, rng: random.Random
+) -> List[ScryMigration]:
+    """Generate merge and delete migrations, including chains of merges."""
+    migrations: List[ScryMigration] = []
+    old_ids: List[uuid.UUID] = []
+    for index in range(num_migrations):
+        old_id = _uuid(rng)
+        new_id = rng.choice(cards).id
+        strategy = ScryMigrationStrategy.MERGE
+        if old_ids and rng.random() < MIGRATION_CHAIN_FRACTION:
+            new_id = rng.choice(old_ids)
+        elif rng.random() < MIGRATION_DELETE_FRACTION:
+            strategy = ScryMigrationStrategy.DELETE
+        migration_id = _uuid(rng)
+        migrations.append(
+            ScryMigration(
+                id=migration_id,
+                uri=f"https://api.scryfall.com/migrations/{migration_id}",
+                performed_at=FIRST_RELEASE + dt.timedelta(days=index),
+                migration_strategy=strategy,
+                old_scryfall_id=old_id,
+                new_scryfall_id=None if strategy == ScryMigrationStrategy.DELETE else new_id,
+            )
+        )
+        old_ids.append(old_id)
+    return migrations
+
+
+def generate(scale: float = 1.0, *, seed: int = 0) -> ScryfallDataSet:
+    """Generate a synthetic Scryfall dataset, with scale 1.0 approximating full Scryfall data."""
+    rng = random.Random(seed)  # noqa: S311 - deterministic data, not cryptography
+    sets = generate_sets(max(1, round(FULL_SCALE_SETS * scale)), rng)
+    cards = generate_cards(sets, FULL_SCALE_CARDS_PER_SET, rng)
+    migrations = generate_migrations(cards, round(FULL_SCALE_MIGRATIONS * scale), rng)
+    return ScryfallDataSet(sets=sets, cards=cards, migrations=migrations)
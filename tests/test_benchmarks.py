@@ -0,0 +1,56 @@
+"""Tests for the synthetic data generator and benchmark suite."""
+
+import time
+from pathlib import Path
+
+import pytest
+
+from mtg_ssm.containers.indexes import Oracle
+from mtg_ssm.scryfall.models import ScryMigrationStrategy
+from mtg_ssm.serialization import interface
+from tests import benchmarks, synthetic_data
+
+
+def test_generate() -> None:
+    scryfall_data = synthetic_data.generate(0.01)
+    assert scryfall_data == synthetic_data.generate(0.01)
+    assert len(scryfall_data.sets) == 8  # noqa: PLR2004
+    assert len({card.id for card in scryfall_data.cards}) == len(scryfall_data.cards)
+    assert {card.set for card in scryfall_data.cards} <= {s.code for s in scryfall_data.sets}
+
+    known_ids = {card.id for card in scryfall_data.cards} | {
+        migration.old_scryfall_id for migration in scryfall_data.migrations
+    }
+    for migration in scryfall_data.migrations:
+        if migration.migration_strategy == ScryMigrationStrategy.MERGE:
+            assert migration.new_scryfall_id in known_ids
+        else:
+            assert migration.new_scryfall_id is None
+
+    oracle = Oracle(scryfall_data)
+    assert len(oracle.index.id_to_card) == len(scryfall_data.cards)
+
+
+def test_benchmarks(tmp_path: Path) -> None:
+    names = []
+    for name, benchmark in benchmarks.benchmarks(0.01, tmp_path):
+        benchmark()
+        names.append(name)
+    dialects = interface.SerializationDialect.dialects()
+    assert len(names) == len(set(names)) == 5 + 2 * len(dialects)
+    assert {"filter_cards_and_sets", "write[xlsx:xlsx]", "read[xlsx:xlsx]"} <= set(names)
+
+
+def test_regressions() -> None:
+    baseline = benchmarks.Baseline(
+        scale=1.0, calibration_seconds=1.0, seconds={"fast": 1.0, "slow": 1.0}
+    )
+    seconds = {"fast": 2.0, "slow": 4.0, "new": 100.0}
+    assert benchmarks.regressions(baseline, 2.0, seconds, 1.5) == ["slow: 2.00x baseline"]
+
+
+def test_time_benchmark_median(monkeypatch: pytest.MonkeyPatch) -> None:
+    # start/stop pairs giving runs of 1s, 5s and 2s
+    clock = iter([0.0, 1.0, 10.0, 15.0, 20.0, 22.0])
+    monkeypatch.setattr(time, "perf_counter", lambda: next(clock))
+    assert benchmarks.time_benchmark(lambda: None, repeat=3) == 2.0  # noqa: PLR2004
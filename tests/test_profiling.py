@@ -0,0 +1,53 @@
+"""Tests for mtg_ssm.profiling."""
+
+import pstats
+from pathlib import Path
+
+import msgspec
+
+from mtg_ssm import profiling
+
+
+def test_stage_not_recording() -> None:
+    with profiling.stage("read"):
+        profiling.record_rows(1)
+
+
+def test_recording() -> None:
+    timer = profiling.StageTimer()
+    with profiling.recording(timer):
+        with profiling.stage("read"):
+            sum(range(1000))
+            profiling.record_rows(1000)
+        with profiling.stage("write"):
+            pass
+    with profiling.stage("rename"):
+        pass
+
+    report = timer.report("merge")
+    assert [timing.stage for timing in report.stages] == ["read", "write"]
+    assert [timing.rows for timing in report.stages] == [1000, 0]
+    assert all(timing.wall_seconds >= 0 for timing in report.stages)
+    assert all(timing.max_rss_bytes for timing in report.stages)
+    assert report.wall_seconds >= sum(timing.wall_seconds for timing in report.stages)
+
+    decoded = msgspec.json.decode(msgspec.json.encode(report))
+    assert decoded["command"] == "merge"
+    assert [timing["stage"] for timing in decoded["stages"]] == ["read", "write"]
+    assert set(decoded["stages"][0]) == {
+        "stage",
+        "wall_seconds",
+        "cpu_seconds",
+        "max_rss_bytes",
+        "rows",
+    }
+
+    table = profiling.format_report(report).splitlines()
+    assert [line.split()[0] for line in table] == ["stage", "read", "write", "total"]
+
+
+def test_profiling(tmp_path: Path) -> None:
+    stats_path = tmp_path / "run.pstats"
+    with profiling.profiling(stats_path):
+        sorted(range(1000), reverse=True)
+    assert pstats.Stats(str(stats_path)).total_calls > 0  # type: ignore[attr-defined]
@@ -0,0 +1,234 @@
+"""Tests for mtg_ssm.server."""
+
+import datetime as dt
+import http
+import json
+import socket
+import stat
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+import msgspec
+import pytest
+
+from mtg_ssm import server, ssm
+from mtg_ssm.containers.bundles import ScryfallDataSet, ScryfallDataStream
+from mtg_ssm.containers.indexes import Oracle
+from mtg_ssm.scryfall import fetcher
+from mtg_ssm.scryfall.models import ScryBulkData, ScryCardCore, ScryList
+from tests import gen_testdata
+
+UPDATED_AT = dt.datetime(2020, 1, 1, tzinfo=dt.timezone.utc)
+TOKEN = "test-token"  # noqa: S105
+
+
+@pytest.fixture(scope="session")
+def oracle(scryfall_data: ScryfallDataSet) -> Oracle:
+    """Oracle fixture."""
+    return Oracle(scryfall_data)
+
+
+@pytest.fixture
+def bulk_data() -> ScryBulkData:
+    """Scryfall bulk data record fixture."""
+    return msgspec.json.decode(
+        gen_testdata.TARGET_BULK_FILE.read_bytes(), type=ScryList[ScryBulkData]
+    ).data[0]
+
+
+def _serve(
+    address: Union[Path, Tuple[str, int]], oracle: Oracle, token: Optional[str] = None
+) -> Iterator[Tuple[server.OracleHolder, Any]]:
+    holder = server.OracleHolder(server.WarmOracle(oracle, UPDATED_AT))
+    with server.make_server(address, holder, ssm.run_operation, {}, token) as httpd:
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield holder, httpd
+        finally:
+            httpd.shutdown()
+            thread.join()
+
+
+@pytest.fixture
+def http_server(oracle: Oracle) -> Iterator[Tuple[server.OracleHolder, str]]:
+    """Run a TCP operation server, yielding its holder and base url."""
+    for holder, httpd in _serve(("127.0.0.1", 0), oracle, TOKEN):
+        yield holder, f"http://127.0.0.1:{httpd.server_address[1]}"
+
+
+def _request(
+    url: str, body: Any = None, headers: Optional[Dict[str, str]] = None
+) -> Tuple[int, Dict[str, Any]]:
+    data = None if body is None else json.dumps(body).encode()
+    request = urllib.request.Request(  # noqa: S310
+        url,
+        data=data,
+        headers={
+            "Authorization": f"Bearer {TOKEN}",
+            "Content-Type": "application/json",
+            **(headers or {}),
+        },
+    )
+    try:
+        with urllib.request.urlopen(request) as response:  # noqa: S310
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as err:
+        return err.code, json.load(err)
+
+
+def test_status(oracle: Oracle, http_server: Tuple[server.OracleHolder, str]) -> None:
+    _, url = http_server
+    assert _request(f"{url}/status") == (
+        http.HTTPStatus.OK,
+        {"bulk_updated_at": "2020-01-01T00:00:00Z", "cards": len(oracle.index.id_to_card)},
+    )
+    assert _request(f"{url}/missing")[0] == http.HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        pytest.param(["create", "{path}"], id="list"),
+        pytest.param("create '{path}'", id="string"),
+    ],
+)
+def test_run(
+    tmp_path: Path,
+    http_server: Tuple[server.OracleHolder, str],
+    command: Union[str, List[str]],
+) -> None:
+    _, url = http_server
+    coll_path = tmp_path / "my collection.csv"
+    if isinstance(command, str):
+        command = command.format(path=coll_path)
+    else:
+        command = [arg.format(path=coll_path) for arg in command]
+    status, result = _request(f"{url}/run", {"command": command})
+    assert status == http.HTTPStatus.OK
+    assert result["error"] is None
+    assert coll_path.read_text().startswith("set,name,collector_number,scryfall_id")
+
+
+def test_run_failed(tmp_path: Path, http_server: Tuple[server.OracleHolder, str]) -> None:
+    _, url = http_server
+    status, result = _request(f"{url}/run", {"command": ["update", str(tmp_path / "missing.csv")]})
+    assert status == http.HTTPStatus.UNPROCESSABLE_ENTITY
+    assert result["error"].startswith("FileNotFoundError")
+
+    status, result = _request(f"{url}/run", {"command": ["merge", "-h"]})
+    assert status == http.HTTPStatus.UNPROCESSABLE_ENTITY
+    assert result["error"].startswith("OperationError")
+
+    status, result = _request(f"{url}/run", {"commands": []})
+    assert status == http.HTTPStatus.BAD_REQUEST
+    status, result = _request(f"{url}/run", {"command": "create 'unbalanced"})
+    assert status == http.HTTPStatus.BAD_REQUEST
+    assert result["error"] == "No closing quotation"
+    status, result = _request(f"{url}/run", {"command": []}, {"Content-Length": "many"})
+    assert status == http.HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize(
+    ("headers", "status"),
+    [
+        pytest.param({"Host": "localhost:8080"}, http.HTTPStatus.OK, id="localhost"),
+        pytest.param({"Host": "[::1]:8080"}, http.HTTPStatus.OK, id="ipv6"),
+        pytest.param({"Host": "evil.example:8080"}, http.HTTPStatus.FORBIDDEN, id="host"),
+        pytest.param({"Authorization": "Bearer wrong"}, http.HTTPStatus.UNAUTHORIZED, id="token"),
+        pytest.param(
+            {"Content-Type": "text/plain"}, http.HTTPStatus.UNSUPPORTED_MEDIA_TYPE, id="type"
+        ),
+    ],
+)
+def test_run_access(
+    tmp_path: Path,
+    http_server: Tuple[server.OracleHolder, str],
+    headers: Dict[str, str],
+    status: http.HTTPStatus,
+) -> None:
+    _, url = http_server
+    coll_path = tmp_path / "collection.csv"
+    assert _request(f"{url}/run", {"command": ["create", str(coll_path)]}, headers)[0] == status
+    assert coll_path.exists() == (status == http.HTTPStatus.OK)
+
+
+def test_unix_socket(tmp_path: Path, oracle: Oracle) -> None:
+    socket_path = tmp_path / "ssm.sock"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+        stale.bind(str(socket_path))  # left behind by a previous server
+    for _ in _serve(socket_path, oracle):
+        assert stat.S_IMODE(socket_path.stat().st_mode) == stat.S_IRUSR | stat.S_IWUSR
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(str(socket_path))
+            client.sendall(b"GET /status HTTP/1.0\r\n\r\n")
+            response = b"".join(iter(lambda: client.recv(4096), b""))
+    assert not socket_path.exists()
+    head, _, body = response.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.0 200")
+    assert json.loads(body)["cards"] == len(oracle.index.id_to_card)
+
+
+def test_unix_socket_existing_file(tmp_path: Path, oracle: Oracle) -> None:
+    coll_path = tmp_path / "collection.xlsx"
+    coll_path.write_bytes(b"collection")
+    holder = server.OracleHolder(server.WarmOracle(oracle, UPDATED_AT))
+    with pytest.raises(FileExistsError):
+        server.make_server(coll_path, holder, ssm.run_operation, {})
+    assert coll_path.read_bytes() == b"collection"
+
+
+def test_refresh(monkeypatch: pytest.MonkeyPatch, oracle: Oracle, bulk_data: ScryBulkData) -> None:
+    refreshes = []
+
+    def mock_fetch_bulk_data(*, refresh: bool) -> ScryBulkData:
+        refreshes.append(refresh)
+        return bulk_data
+
+    monkeypatch.setattr(fetcher, "fetch_bulk_data", mock_fetch_bulk_data)
+    new_oracle = Oracle(ScryfallDataSet(sets=[], cards=[], migrations=[]))
+    holder = server.OracleHolder(server.WarmOracle(oracle, UPDATED_AT))
+
+    assert holder.refresh(lambda _bulk: new_oracle)
+    assert holder.current == server.WarmOracle(new_oracle, bulk_data.updated_at)
+    assert not holder.refresh(lambda _bulk: oracle)
+    assert holder.current.oracle is new_oracle
+    assert refreshes == [True, True]
+
+
+def test_refresh_oracle_loader(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    oracle: Oracle,
+    scryfall_data: ScryfallDataSet,
+    bulk_data: ScryBulkData,
+) -> None:
+    def mock_scryfetch_stream(
+        bulk: ScryBulkData, *, card_type: Type[ScryCardCore], max_workers: int
+    ) -> ScryfallDataStream:
+        assert bulk == bulk_data
+        assert card_type is ScryCardCore
+        assert max_workers == fetcher.FETCH_WORKERS
+        return ScryfallDataStream(
+            sets=scryfall_data.sets,
+            cards=iter(scryfall_data.cards),
+            migrations=scryfall_data.migrations,
+        )
+
+    monkeypatch.setattr(fetcher, "CACHE_DIR", str(tmp_path))
+
+    def mock_fetch_bulk_data(*, refresh: bool) -> ScryBulkData:
+        assert refresh
+        return bulk_data
+
+    monkeypatch.setattr(fetcher, "fetch_bulk_data", mock_fetch_bulk_data)
+    monkeypatch.setattr(fetcher, "scryfetch_stream", mock_scryfetch_stream)
+    holder = server.OracleHolder(server.WarmOracle(oracle, UPDATED_AT))
+
+    assert holder.refresh(ssm.oracle_loader(ssm.get_args(["serve"])))
+    assert holder.current.bulk_updated_at == bulk_data.updated_at
+    assert holder.current.oracle is not oracle
+    assert holder.current.oracle.index.id_to_card
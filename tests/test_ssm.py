@@ -1,18 +1,35 @@
 """Tests for mtg_ssm.manager module."""
 
 import argparse as ap
+import gzip
+import io
+import multiprocessing
+import subprocess
+import sys
 import textwrap
+import threading
 from pathlib import Path
+from typing import Any, Dict, Type
 
 import freezegun
+import msgspec
 import pytest
 from _pytest.monkeypatch import MonkeyPatch
 
 import mtg_ssm.scryfall.fetcher
-from mtg_ssm import ssm
-from mtg_ssm.containers.bundles import ScryfallDataSet
+from mtg_ssm import profiling, ssm
+from mtg_ssm.containers.bundles import ScryfallDataSet, ScryfallDataStream
+from mtg_ssm.containers.counts import CountType
 from mtg_ssm.containers.indexes import Oracle
-from mtg_ssm.scryfall.models import ScryCardLayout, ScrySetType
+from mtg_ssm.scryfall.models import (
+    ScryBulkData,
+    ScryCardCore,
+    ScryCardLayout,
+    ScryList,
+    ScrySetType,
+)
+from mtg_ssm.serialization import interface as ser_interface
+from tests import gen_testdata
 
 
 @pytest.fixture(scope="session")
@@ -47,10 +64,43 @@ def _patch_scryfetch(monkeypatch: MonkeyPatch, oracle: Oracle) -> None:
                 action="create",
                 func=ssm.create_cmd,
                 collection=Path("testfilename"),
+                jobs=1,
                 dialect={},
+                timings=False,
+                timings_json=None,
+                profile=None,
                 include_digital=False,
                 include_foreign_only=False,
                 separate_promos=False,
+                fetch_workers=3,
+                exclude_set_types={
+                    ScrySetType.TOKEN,
+                    ScrySetType.MEMORABILIA,
+                    ScrySetType.MINIGAME,
+                },
+                exclude_card_layouts={
+                    ScryCardLayout.ART_SERIES,
+                    ScryCardLayout.DOUBLE_FACED_TOKEN,
+                    ScryCardLayout.EMBLEM,
+                    ScryCardLayout.TOKEN,
+                },
+            ),
+        ),
+        (
+            "--fetch-workers 1 create testfilename",
+            ap.Namespace(
+                action="create",
+                func=ssm.create_cmd,
+                collection=Path("testfilename"),
+                jobs=1,
+                dialect={},
+                timings=False,
+                timings_json=None,
+                profile=None,
+                include_digital=False,
+                include_foreign_only=False,
+                separate_promos=False,
+                fetch_workers=1,
                 exclude_set_types={
                     ScrySetType.TOKEN,
                     ScrySetType.MEMORABILIA,
@@ -70,10 +120,15 @@ def _patch_scryfetch(monkeypatch: MonkeyPatch, oracle: Oracle) -> None:
                 action="create",
                 func=ssm.create_cmd,
                 collection=Path("testfilename"),
+                jobs=1,
                 dialect={},
+                timings=False,
+                timings_json=None,
+                profile=None,
                 include_digital=True,
                 include_foreign_only=False,
                 separate_promos=False,
+                fetch_workers=3,
                 exclude_set_types={
                     ScrySetType.TOKEN,
                     ScrySetType.MEMORABILIA,
@@ -93,10 +148,15 @@ def _patch_scryfetch(monkeypatch: MonkeyPatch, oracle: Oracle) -> None:
                 action="create",
                 func=ssm.create_cmd,
                 collection=Path("testfilename"),
+                jobs=1,
                 dialect={"csv": "terse"},
+                timings=False,
+                timings_json=None,
+                profile=None,
                 include_digital=False,
                 include_foreign_only=False,
                 separate_promos=False,
+                fetch_workers=3,
                 exclude_set_types={
                     ScrySetType.TOKEN,
                     ScrySetType.MEMORABILIA,
@@ -116,10 +176,15 @@ def _patch_scryfetch(monkeypatch: MonkeyPatch, oracle: Oracle) -> None:
                 action="create",
                 func=ssm.create_cmd,
                 collection=Path("testfilename"),
+                jobs=1,
                 dialect={},
+                timings=False,
+                timings_json=None,
+                profile=None,
                 include_digital=False,
                 include_foreign_only=False,
                 separate_promos=False,
+                fetch_workers=3,
                 exclude_set_types={
                     ScrySetType.TOKEN,
                     ScrySetType.MEMORABILIA,
@@ -139,10 +204,15 @@ def _patch_scryfetch(monkeypatch: MonkeyPatch, oracle: Oracle) -> None:
                 action="update",
                 func=ssm.update_cmd,
                 collection=Path("testfilename"),
+                jobs=1,
                 dialect={},
+                timings=False,
+                timings_json=None,
+                profile=None,
                 include_digital=False,
                 include_foreign_only=False,
                 separate_promos=False,
+                fetch_workers=3,
                 exclude_set_types={
                     ScrySetType.TOKEN,
                     ScrySetType.MEMORABILIA,
@@ -163,10 +233,15 @@ def _patch_scryfetch(monkeypatch: MonkeyPatch, oracle: Oracle) -> None:
                 func=ssm.merge_cmd,
                 collection=Path("testfilename"),
                 imports=[Path("otherfile1")],
+                jobs=1,
                 dialect={},
+                timings=False,
+                timings_json=None,
+                profile=None,
                 include_digital=False,
                 include_foreign_only=False,
                 separate_promos=False,
+                fetch_workers=3,
                 exclude_set_types={
                     ScrySetType.TOKEN,
                     ScrySetType.MEMORABILIA,
@@ -187,10 +262,15 @@ def _patch_scryfetch(monkeypatch: MonkeyPatch, oracle: Oracle) -> None:
                 func=ssm.merge_cmd,
                 collection=Path("testfilename"),
                 imports=[Path("otherfile1"), Path("otherfile2"), Path("otherfile3")],
+                jobs=1,
                 dialect={},
+                timings=False,
+                timings_json=None,
+                profile=None,
                 include_digital=False,
                 include_foreign_only=False,
                 separate_promos=False,
+                fetch_workers=3,
                 exclude_set_types={
                     ScrySetType.TOKEN,
                     ScrySetType.MEMORABILIA,
@@ -212,10 +292,15 @@ def _patch_scryfetch(monkeypatch: MonkeyPatch, oracle: Oracle) -> None:
                 output=Path("file3"),
                 left=Path("file1"),
                 right=Path("file2"),
+                jobs=1,
                 dialect={},
+                timings=False,
+                timings_json=None,
+                profile=None,
                 include_digital=False,
                 include_foreign_only=False,
                 separate_promos=False,
+                fetch_workers=3,
                 exclude_set_types={
                     ScrySetType.TOKEN,
                     ScrySetType.MEMORABILIA,
@@ -235,10 +320,25 @@ def test_get_args(cmdline: str, expected: ap.Namespace) -> None:
     assert ssm.get_args(args=cmdline.split()) == expected
 
 
+@pytest.mark.parametrize(
+    "cmdline",
+    [
+        pytest.param("create -", id="create"),
+        pytest.param("update -", id="update"),
+        pytest.param("merge - import.csv", id="merge"),
+        pytest.param("diff left.csv right.csv -", id="diff"),
+    ],
+)
+def test_get_args_stdout_output(cmdline: str, capsys: pytest.CaptureFixture[str]) -> None:
+    with pytest.raises(SystemExit):
+        ssm.get_args(args=cmdline.split())
+    assert "cannot be written to standard output" in capsys.readouterr().err
+
+
 def test_create_cmd(tmp_path: Path, oracle: Oracle) -> None:
     coll_path = tmp_path / "collection.csv"
 
-    args = ap.Namespace(collection=coll_path, dialect={})
+    args = ap.Namespace(collection=coll_path, dialect={}, jobs=1)
     ssm.create_cmd(args, oracle)
 
     assert coll_path.read_text() == textwrap.dedent(
@@ -268,7 +368,7 @@ def test_update_cmd(tmp_path: Path, oracle: Oracle) -> None:
         )
     )
 
-    args = ap.Namespace(collection=coll_path, dialect={})
+    args = ap.Namespace(collection=coll_path, dialect={}, jobs=1)
     ssm.update_cmd(args, oracle)
 
     assert set(work_path.iterdir()) == {coll_path, expected_backup_path}
@@ -304,7 +404,7 @@ def test_merge_cmd_new(tmp_path: Path, oracle: Oracle) -> None:
         )
     )
 
-    args = ap.Namespace(collection=coll_path, imports=[import_path], dialect={})
+    args = ap.Namespace(collection=coll_path, imports=[import_path], dialect={}, jobs=1)
     ssm.merge_cmd(args, oracle)
 
     assert set(work_path.iterdir()) == {coll_path, import_path}
@@ -350,7 +450,7 @@ def test_merge_cmd_existing(tmp_path: Path, oracle: Oracle) -> None:
         )
     )
 
-    args = ap.Namespace(collection=coll_path, imports=[import_path], dialect={})
+    args = ap.Namespace(collection=coll_path, imports=[import_path], dialect={}, jobs=1)
     ssm.merge_cmd(args, oracle)
 
     assert set(work_path.iterdir()) == {coll_path, import_path, expected_backup_path}
@@ -377,8 +477,9 @@ def test_merge_cmd_existing(tmp_path: Path, oracle: Oracle) -> None:
     )
 
 
+@pytest.mark.parametrize("jobs", [pytest.param(1, id="serial"), pytest.param(2, id="parallel")])
 @freezegun.freeze_time("2015-06-28 08:09:10")
-def test_merge_cmd_multiple(tmp_path: Path, oracle: Oracle) -> None:
+def test_merge_cmd_multiple(tmp_path: Path, oracle: Oracle, jobs: int) -> None:
     work_path = tmp_path / "work"
     work_path.mkdir()
     coll_path = work_path / "collection.csv"
@@ -411,7 +512,9 @@ def test_merge_cmd_multiple(tmp_path: Path, oracle: Oracle) -> None:
         )
     )
 
-    args = ap.Namespace(collection=coll_path, imports=[import_path1, import_path2], dialect={})
+    args = ap.Namespace(
+        collection=coll_path, imports=[import_path1, import_path2], dialect={}, jobs=jobs
+    )
     ssm.merge_cmd(args, oracle)
 
     assert set(work_path.iterdir()) == {
@@ -449,7 +552,8 @@ def test_merge_cmd_multiple(tmp_path: Path, oracle: Oracle) -> None:
     )
 
 
-def test_diff_cmd(tmp_path: Path, oracle: Oracle) -> None:
+@pytest.mark.parametrize("jobs", [pytest.param(1, id="serial"), pytest.param(2, id="parallel")])
+def test_diff_cmd(tmp_path: Path, oracle: Oracle, jobs: int) -> None:
     work_path = tmp_path / "work"
     work_path.mkdir()
     left_path = work_path / "left.csv"
@@ -474,7 +578,7 @@ def test_diff_cmd(tmp_path: Path, oracle: Oracle) -> None:
         )
     )
 
-    args = ap.Namespace(output=out_path, left=left_path, right=right_path, dialect={})
+    args = ap.Namespace(output=out_path, left=left_path, right=right_path, dialect={}, jobs=jobs)
     ssm.diff_cmd(args, oracle)
     assert set(work_path.iterdir()) == {left_path, right_path, out_path}
     assert out_path.read_text() == textwrap.dedent(
@@ -486,3 +590,279 @@ def test_diff_cmd(tmp_path: Path, oracle: Oracle) -> None:
         MMA,Thallid,167,69d20d28-76e9-4e6e-95c3-f88c51dfabfd,7,-3
         """
     )
+
+
+def test_get_oracle_snapshot(
+    monkeypatch: MonkeyPatch, tmp_path: Path, scryfall_data: ScryfallDataSet
+) -> None:
+    bulk_data = msgspec.json.decode(
+        gen_testdata.TARGET_BULK_FILE.read_bytes(), type=ScryList[ScryBulkData]
+    ).data[0]
+    fetches = []
+
+    def mock_scryfetch_stream(
+        bulk: ScryBulkData, *, card_type: Type[ScryCardCore], max_workers: int
+    ) -> ScryfallDataStream:
+        assert card_type is ScryCardCore
+        assert max_workers == 1
+        fetches.append(bulk)
+        return ScryfallDataStream(
+            sets=scryfall_data.sets,
+            cards=iter(scryfall_data.cards),
+            migrations=scryfall_data.migrations,
+        )
+
+    monkeypatch.setattr(mtg_ssm.scryfall.fetcher, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(mtg_ssm.scryfall.fetcher, "fetch_bulk_data", lambda: bulk_data)
+    monkeypatch.setattr(mtg_ssm.scryfall.fetcher, "scryfetch_stream", mock_scryfetch_stream)
+    oracle_args: Dict[str, Any] = {
+        "exclude_set_types": {ScrySetType.TOKEN},
+        "exclude_card_layouts": {ScryCardLayout.TOKEN},
+        "include_digital": False,
+        "include_foreign_only": False,
+        "separate_promos": False,
+        "fetch_workers": 1,
+    }
+
+    oracle1 = ssm.get_oracle(**oracle_args)
+    assert fetches == [bulk_data]
+    assert len(list(tmp_path.glob("oracle-*"))) == 1
+
+    assert oracle1.bulk_updated_at == bulk_data.updated_at
+
+    oracle2 = ssm.get_oracle(**oracle_args)
+    assert fetches == [bulk_data]
+    assert oracle2.bulk_updated_at == bulk_data.updated_at
+    assert oracle2.cards == oracle1.cards
+    assert oracle2.index.id_to_card == oracle1.index.id_to_card
+
+    # a snapshot that no longer loads (here int(None) raises TypeError) is rebuilt
+    (snapshot_path,) = tmp_path.glob("oracle-*")
+    snapshot_path.write_bytes(b"\x80\x04cbuiltins\nint\nN\x85R.")
+    oracle3 = ssm.get_oracle(**oracle_args)
+    assert fetches == [bulk_data, bulk_data]
+    assert oracle3.index.id_to_card == oracle1.index.id_to_card
+    assert list(tmp_path.glob("oracle-*")) == [snapshot_path]
+    assert ssm.get_oracle(**oracle_args).cards == oracle1.cards
+    assert fetches == [bulk_data, bulk_data]
+
+    ssm.get_oracle(**{**oracle_args, "separate_promos": True})
+    assert fetches == [bulk_data, bulk_data, bulk_data]
+    assert len(list(tmp_path.glob("oracle-*"))) == 2  # noqa: PLR2004
+
+
+def test_read_manifest(tmp_path: Path) -> None:
+    lines_path = tmp_path / "manifest.txt"
+    lines_path.write_text(
+        textwrap.dedent(
+            """\
+            # nightly merges
+            create "out file.csv"
+
+            merge out.xlsx in1.csv in2.csv  # trailing comment
+            """
+        )
+    )
+    json_path = tmp_path / "manifest.json"
+    json_path.write_text(
+        '["create \'out file.csv\'", ["merge", "out.xlsx", "in1.csv", "in2.csv"]]'
+    )
+
+    expected = [["create", "out file.csv"], ["merge", "out.xlsx", "in1.csv", "in2.csv"]]
+    assert ssm.read_manifest(lines_path) == expected
+    assert ssm.read_manifest(json_path) == expected
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_cmd(
+    tmp_path: Path, oracle: Oracle, capsys: pytest.CaptureFixture[str], workers: int
+) -> None:
+    work_path = tmp_path / "work"
+    work_path.mkdir()
+    import_path = work_path / "import.csv"
+    import_path.write_text(
+        textwrap.dedent(
+            """\
+            scryfall_id,nonfoil,foil
+            69d20d28-76e9-4e6e-95c3-f88c51dfabfd,4,9
+            """
+        )
+    )
+    manifest_path = tmp_path / "manifest.txt"
+    manifest_path.write_text(
+        textwrap.dedent(
+            f"""\
+            create {work_path / "empty.csv"}
+            merge {work_path / "merged.csv"} {import_path}
+            merge {work_path / "failed.csv"} {work_path / "missing.csv"}
+            frobnicate {work_path / "unknown.csv"}
+            merge -h
+            diff --jobs many {import_path} {import_path} {work_path / "out.csv"}
+            """
+        )
+    )
+
+    args = ap.Namespace(manifest=manifest_path, workers=workers, dialect={})
+    with pytest.raises(SystemExit, match="4 of 6 batch operations failed"):
+        ssm.batch_cmd(args, oracle)
+
+    assert set(work_path.iterdir()) == {
+        import_path,
+        work_path / "empty.csv",
+        work_path / "merged.csv",
+    }
+    assert (work_path / "merged.csv").read_text().endswith(
+        "MMA,Thallid,167,69d20d28-76e9-4e6e-95c3-f88c51dfabfd,4,9\n"
+    )
+    report = capsys.readouterr().out.split("Batch results:\n")[1].splitlines()
+    assert [line.split()[0] for line in report[:-1] if not line.startswith(" " * 9)] == [
+        "ok",
+        "ok",
+        "FAILED",
+        "FAILED",
+        "FAILED",
+        "FAILED",
+    ]
+    assert "FileNotFoundError" in report[3]
+    assert "OperationError" in report[5]
+    assert "OperationError: the following arguments are required" in report[7]
+    assert "OperationError: argument -j/--jobs: invalid int value" in report[9]
+    assert report[-1].endswith("2 ok, 4 failed")
+
+
+def test_lazy_imports() -> None:
+    heavy_modules = ["http.server", "openpyxl", "requests", "requests_cache"]
+    script = f"import sys, mtg_ssm.ssm; print([m for m in {heavy_modules!r} if m in sys.modules])"
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", script], capture_output=True, check=True, text=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_merge_cmd_timings(tmp_path: Path, oracle: Oracle) -> None:
+    coll_path = tmp_path / "collection.csv"
+    import_path = tmp_path / "import.csv"
+    import_path.write_text("scryfall_id,nonfoil,foil\n")
+
+    timer = profiling.StageTimer()
+    args = ap.Namespace(
+        collection=coll_path, imports=[import_path, import_path], dialect={}, jobs=1
+    )
+    with profiling.recording(timer):
+        ssm.merge_cmd(args, oracle)
+    assert [timing.stage for timing in timer.stages] == [
+        "read",
+        "merge",
+        "read",
+        "merge",
+        "write",
+        "rename",
+    ]
+
+
+@pytest.mark.parametrize(
+    ("path", "dialect_class"),
+    [
+        pytest.param(Path("collection.csv"), "CsvFullDialect", id="csv"),
+        pytest.param(Path("collection.csv.gz"), "CsvFullDialect", id="gzip"),
+        pytest.param(Path("collection.csv.zst"), "CsvFullDialect", id="zstd"),
+        pytest.param(Path("-"), "CsvFullDialect", id="stdio"),
+        pytest.param(Path("collection.xlsx"), "XlsxDialect", id="xlsx"),
+        pytest.param(
+            Path("collection.xlsx.gz"),
+            "XlsxDialect",
+            id="xlsx_gzip",
+            marks=pytest.mark.xfail(raises=ser_interface.UnknownDialectError, strict=True),
+        ),
+    ],
+)
+def test_get_serializer(path: Path, dialect_class: str) -> None:
+    assert type(ssm.get_serializer({}, path)).__name__ == dialect_class
+
+
+def test_get_serializer_jobs() -> None:
+    serializer = ssm.get_serializer({}, Path("collection.xlsx"), jobs=4)
+    assert serializer.jobs == 4  # noqa: PLR2004
+
+
+def test_merge_cmd_stdin_gzip(tmp_path: Path, oracle: Oracle, monkeypatch: MonkeyPatch) -> None:
+    coll_path = tmp_path / "collection.csv.gz"
+    stdin_data = b"scryfall_id,nonfoil,foil\n69d20d28-76e9-4e6e-95c3-f88c51dfabfd,4,9\n"
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(stdin_data)))
+
+    args = ap.Namespace(
+        collection=coll_path,
+        imports=[ser_interface.STDIO_PATH],
+        dialect={"csv": "terse"},
+        jobs=1,
+    )
+    ssm.merge_cmd(args, oracle)
+
+    assert gzip.decompress(coll_path.read_bytes()).decode() == (
+        "set,name,collector_number,scryfall_id,nonfoil,foil\r\n"
+        "MMA,Thallid,167,69d20d28-76e9-4e6e-95c3-f88c51dfabfd,4,9\r\n"
+    )
+
+
+@pytest.mark.parametrize("jobs", [pytest.param(1, id="serial"), pytest.param(2, id="parallel")])
+def test_merge_cmd_stdin_jobs(
+    tmp_path: Path, oracle: Oracle, monkeypatch: MonkeyPatch, jobs: int
+) -> None:
+    coll_path = tmp_path / "collection.csv"
+    import_path1 = tmp_path / "import1.csv"
+    import_path2 = tmp_path / "import2.csv"
+    stdin_data = b"scryfall_id,nonfoil,foil\n69d20d28-76e9-4e6e-95c3-f88c51dfabfd,4,9\n"
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(stdin_data)))
+    import_path1.write_text("scryfall_id,nonfoil,foil\n69d20d28-76e9-4e6e-95c3-f88c51dfabfd,1,\n")
+    import_path2.write_text("scryfall_id,nonfoil,foil\ndd88131a-2811-4a1f-bb9a-c82e12c1493b,2,\n")
+
+    args = ap.Namespace(
+        collection=coll_path,
+        imports=[import_path1, ser_interface.STDIO_PATH, import_path2],
+        dialect={"csv": "terse"},
+        jobs=jobs,
+    )
+    ssm.merge_cmd(args, oracle)
+
+    assert coll_path.read_text() == (
+        "set,name,collector_number,scryfall_id,nonfoil,foil\n"
+        "PDCI,Black Sun's Zenith,68,dd88131a-2811-4a1f-bb9a-c82e12c1493b,2,\n"
+        "MMA,Thallid,167,69d20d28-76e9-4e6e-95c3-f88c51dfabfd,5,9\n"
+    )
+
+
+def test_merge_cmd_jobs_shutdown(tmp_path: Path, oracle: Oracle, monkeypatch: MonkeyPatch) -> None:
+    import_paths = [tmp_path / "import1.csv", tmp_path / "import2.csv"]
+    for path in import_paths:
+        path.write_text("scryfall_id,nonfoil\n69d20d28-76e9-4e6e-95c3-f88c51dfabfd,1\n")
+    live_workers = []
+
+    def write_file(*args: Any, **kwargs: Any) -> None:
+        del args, kwargs
+        live_workers.extend(multiprocessing.active_children())
+
+    monkeypatch.setattr(ssm, "write_file", write_file)
+    args = ap.Namespace(
+        collection=tmp_path / "collection.csv", imports=import_paths, dialect={}, jobs=2
+    )
+    ssm.merge_cmd(args, oracle)
+    assert live_workers == []
+
+
+def test_read_counts_threaded(tmp_path: Path, oracle: Oracle) -> None:
+    paths = [tmp_path / "import1.csv", tmp_path / "import2.csv"]
+    for count, path in enumerate(paths, start=1):
+        path.write_text(f"scryfall_id,nonfoil\n69d20d28-76e9-4e6e-95c3-f88c51dfabfd,{count}\n")
+    ordinal = oracle.index.id_str_to_ordinal["69d20d28-76e9-4e6e-95c3-f88c51dfabfd"]
+
+    # workers are spawned rather than forked while another thread is running
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        sparse_counts = list(ssm.read_counts(paths, {}, oracle, 2))
+    finally:
+        stop.set()
+        thread.join()
+    assert [list(counts.ordinals) for counts in sparse_counts] == [[ordinal], [ordinal]]
+    assert [counts.columns[CountType.NONFOIL][0] for counts in sparse_counts] == [1, 2]